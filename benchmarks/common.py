@@ -0,0 +1,121 @@
+"""
+Utilidades compartidas por los benchmarks
+
+Medición de latencias, percentiles, memoria pico y escritura de los
+resultados en JSON con los datos del entorno, para poder comparar corridas
+"""
+
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_samples: Sequence[float], q: float) -> float:
+    """Percentil `q` (0-100) por interpolación lineal sobre muestras ordenadas"""
+    if not sorted_samples:
+        return 0.0
+    position = (len(sorted_samples) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    fraction = position - lower
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) * fraction
+
+
+def latency_stats(samples_ms: Sequence[float]) -> Dict[str, float]:
+    """Resumen de latencias en milisegundos: p50, p95, p99, media, mínimo y máximo"""
+    ordered = sorted(samples_ms)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "p50_ms": round(percentile(ordered, 50), 4),
+        "p95_ms": round(percentile(ordered, 95), 4),
+        "p99_ms": round(percentile(ordered, 99), 4),
+        "mean_ms": round(sum(ordered) / len(ordered), 4),
+        "min_ms": round(ordered[0], 4),
+        "max_ms": round(ordered[-1], 4),
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    """
+    Ejecuta `fn` varias veces y resume sus latencias
+
+    Las primeras `warmup` ejecuciones no se cuentan
+    """
+    for _ in range(warmup):
+        fn()
+    samples: List[float] = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    elapsed = time.perf_counter() - started
+    stats = latency_stats(samples)
+    stats["ops_per_s"] = round(repeat / elapsed, 2) if elapsed > 0 else 0.0
+    return stats
+
+
+def peak_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """
+    Memoria residente pico (VmHWM) del proceso en MB
+
+    Sin /proc (macOS, Windows) solo se puede medir el proceso actual
+    """
+    status_path = f"/proc/{pid or 'self'}/status"
+    try:
+        with open(status_path) as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024.0, 1)
+    except OSError:
+        pass
+    if pid is not None and pid != os.getpid():
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    return round(peak / (1024.0 * 1024.0 if sys.platform == "darwin" else 1024.0), 1)
+
+
+def environment() -> Dict[str, Any]:
+    """Datos de la corrida que afectan la comparación entre resultados"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(path: Optional[str], kind: str, params: Dict[str, Any], results: Any) -> Dict[str, Any]:
+    """
+    Arma el documento de resultados y lo escribe en `path` (si se indica)
+
+    Returns:
+        dict: Documento con `kind`, `environment`, `params` y `results`
+    """
+    document = {"kind": kind, "environment": environment(), "params": params, "results": results}
+    if path:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as out:
+            json.dump(document, out, ensure_ascii=False, indent=2)
+    return document
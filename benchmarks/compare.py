@@ -0,0 +1,101 @@
+"""
+Compara dos archivos de resultados de benchmarks (micro o de carga)
+
+Muestra, por benchmark o endpoint, p50/p95/p99 y throughput de la corrida
+base y de la nueva con su variación. Termina con código 1 si algún p95
+empeoró más que el umbral, para poder usarlo en CI
+
+Uso:
+    python -m benchmarks.compare base.json nuevo.json --threshold 15
+"""
+
+import argparse
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def load_rows(document: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Filas comparables `etiqueta -> métricas` de un documento de resultados"""
+    results = document["results"]
+    if document["kind"] == "micro":
+        rows = {}
+        for bench in results["benchmarks"]:
+            labels = [f"{k}={v}" for k, v in bench.items() if k in {"size", "turns"}]
+            rows[" ".join([bench["name"], *labels])] = {**bench, "throughput": bench.get("ops_per_s")}
+        return rows
+    rows = {
+        f"endpoint={name}": {**stats, "throughput": stats.get("throughput_rps")}
+        for name, stats in results["endpoints"].items()
+    }
+    rows["total"] = {**results["latency"], "throughput": results.get("throughput_rps")}
+    return rows
+
+
+def change_pct(base: Optional[float], new: Optional[float]) -> Optional[float]:
+    """Variación porcentual de `new` respecto de `base`"""
+    if not base or new is None:
+        return None
+    return round((new - base) / base * 100.0, 1)
+
+
+def compare(
+    base: Dict[str, Any], new: Dict[str, Any], threshold_pct: float
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Compara las filas presentes en ambas corridas
+
+    Returns:
+        tuple[list[dict], list[str]]: Filas con valores y variaciones, y
+        etiquetas cuyo p95 empeoró más que el umbral
+    """
+    if base["kind"] != new["kind"]:
+        raise ValueError(f"No se pueden comparar resultados {base['kind']!r} y {new['kind']!r}")
+    base_rows, new_rows = load_rows(base), load_rows(new)
+    rows: List[Dict[str, Any]] = []
+    regressions: List[str] = []
+    for label in base_rows.keys() & new_rows.keys():
+        old, current = base_rows[label], new_rows[label]
+        row: Dict[str, Any] = {"label": label}
+        for metric in METRICS + ("throughput",):
+            row[metric] = (old.get(metric), current.get(metric), change_pct(old.get(metric), current.get(metric)))
+        p95_change = row["p95_ms"][2]
+        if p95_change is not None and p95_change > threshold_pct:
+            regressions.append(label)
+        rows.append(row)
+    rows.sort(key=lambda row: row["label"])
+    return rows, regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Compara dos corridas de benchmarks")
+    parser.add_argument("base", help="Resultados de referencia")
+    parser.add_argument("new", help="Resultados nuevos")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Empeoramiento de p95 tolerado (%%)")
+    args = parser.parse_args(argv)
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    rows, regressions = compare(base, new, args.threshold)
+
+    def fmt(values: Tuple[Any, Any, Optional[float]]) -> str:
+        old, current, pct = values
+        delta = f"{pct:+.1f}%" if pct is not None else "n/a"
+        return f"{old} -> {current} ({delta})"
+
+    for row in rows:
+        print(row["label"])
+        for metric in METRICS + ("throughput",):
+            print(f"    {metric:<10} {fmt(row[metric])}")
+    if regressions:
+        print(f"\np95 empeoró más de {args.threshold}% en: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,97 @@
+"""
+Datos sintéticos y reproducibles para los benchmarks
+
+Catálogos de cualquier tamaño y sesiones de chat largas generados con una
+semilla fija, de modo que dos corridas miden exactamente lo mismo
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+
+from src.domain.entities import ChatMessage
+from src.infrastructure.db.catalog_import import CatalogImporter
+from src.infrastructure.db.models import Base, ChatMessageModel
+
+BRANDS = ("Nike", "Adidas", "Puma", "Reebok", "New Balance", "Asics", "Vans", "Converse", "Fila", "Skechers")
+CATEGORIES = ("Running", "Casual", "Basketball", "Training", "Trail", "Skate", "Tenis", "Formal")
+COLORS = ("Negro", "Blanco", "Azul", "Rojo", "Gris", "Verde", "Beige", "Rosa")
+SIZES = tuple(str(size) for size in range(36, 47))
+MODELS = ("Air", "Zoom", "Boost", "Classic", "Pro", "Flex", "Ultra", "Street", "Runner", "Court")
+WORDS = (
+    "busco", "zapatillas", "para", "correr", "talla", "color", "precio", "menos", "de",
+    "hay", "stock", "del", "modelo", "cómodas", "livianas", "recomiendas", "marca", "oferta",
+)
+CHAT_MESSAGES = (
+    "Busco zapatillas Nike para correr",
+    "¿Tienen algo en talla 42 color negro?",
+    "Quiero algo casual por menos de 100",
+    "¿Cuál me recomiendas para trail?",
+    "¿Hay stock del Ultraboost?",
+    "Necesito zapatillas cómodas para el trabajo",
+)
+
+CSV_HEADER = "name,brand,category,size,color,price,stock,description\n"
+
+
+def catalog_lines(count: int, seed: int = 42) -> Iterator[str]:
+    """Líneas CSV (con encabezado) de un catálogo sintético de `count` productos"""
+    rng = random.Random(seed)
+    yield CSV_HEADER
+    for index in range(count):
+        brand = rng.choice(BRANDS)
+        category = rng.choice(CATEGORIES)
+        yield (
+            f"{brand} {rng.choice(MODELS)} {index},{brand},{category},{rng.choice(SIZES)},"
+            f"{rng.choice(COLORS)},{rng.randint(30, 250)}.{rng.choice((0, 50, 99))},"
+            f"{rng.randint(0, 40)},Modelo {category.lower()} de {brand} número {index}\n"
+        )
+
+
+def populate_catalog(engine: Engine, count: int, seed: int = 42) -> None:
+    """Crea el esquema y carga `count` productos con el importador por lotes"""
+    Base.metadata.create_all(bind=engine)
+    CatalogImporter(engine).run(catalog_lines(count, seed), "csv")
+
+
+def generate_session(session_id: str, turns: int, seed: int = 42) -> List[ChatMessage]:
+    """Conversación alternando usuario y asistente con `turns` mensajes"""
+    rng = random.Random(f"{seed}-{session_id}")
+    started = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    messages = []
+    for index in range(turns):
+        role = "user" if index % 2 == 0 else "assistant"
+        length = rng.randint(6, 20) if role == "user" else rng.randint(30, 90)
+        messages.append(
+            ChatMessage(
+                id=None,
+                session_id=session_id,
+                role=role,
+                message=" ".join(rng.choice(WORDS) for _ in range(length)),
+                timestamp=started + timedelta(seconds=index * 30),
+            )
+        )
+    return messages
+
+
+def populate_sessions(engine: Engine, sessions: int, turns: int, seed: int = 42) -> List[str]:
+    """Carga `sessions` conversaciones de `turns` mensajes y retorna sus ids"""
+    Base.metadata.create_all(bind=engine)
+    session_ids = [f"bench-{index}" for index in range(sessions)]
+    with engine.begin() as conn:
+        for session_id in session_ids:
+            rows = [
+                {
+                    "session_id": m.session_id,
+                    "role": m.role,
+                    "message": m.message,
+                    "timestamp": m.timestamp,
+                }
+                for m in generate_session(session_id, turns, seed)
+            ]
+            if rows:
+                conn.execute(insert(ChatMessageModel), rows)
+    return session_ids
@@ -0,0 +1,325 @@
+"""
+Generador de carga HTTP contra la API con el proveedor de LLM local
+
+Por defecto levanta su propio servidor (uvicorn) sobre una base SQLite
+temporal con un catálogo y sesiones sintéticas, usando `LLM_PROVIDER=local`
+con la latencia indicada, de modo que la corrida no depende de la red ni de
+Gemini. Con `--url` se usa un servidor ya levantado
+
+Las requests se reparten entre /products, /chat y /chat/history según
+`--mix`. El resultado incluye p50/p95/p99 y throughput por endpoint, el
+tiempo hasta que el servidor quedó listo y la memoria pico del servidor
+
+Uso:
+    python -m benchmarks.load --products 10000 --concurrency 32 --duration 30 \\
+        --llm-latency-ms 300 --out benchmarks/results/load.json
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import create_engine
+
+from .common import ROOT, latency_stats, peak_rss_mb, write_results
+from .data import BRANDS, CATEGORIES, CHAT_MESSAGES, populate_catalog, populate_sessions
+
+DEFAULT_MIX = "products=6,chat=2,history=2"
+ENDPOINTS = ("products", "chat", "history")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Pesos por endpoint a partir de 'products=6,chat=2,history=2'"""
+    weights: Dict[str, float] = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Endpoint desconocido en --mix: {name!r}")
+        weights[name] = float(weight or 1)
+    if not any(weights.values()):
+        raise ValueError("--mix no tiene ningún peso positivo")
+    return weights
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class LocalServer:
+    """
+    Servidor uvicorn en un subproceso sobre una base temporal ya poblada
+
+    Args:
+        db_path: Archivo SQLite a usar
+        llm_latency_ms: Latencia simulada del proveedor local
+        extra_env: Variables de entorno adicionales (p. ej. ASYNC_MODE=true)
+    """
+
+    def __init__(self, db_path: str, llm_latency_ms: float, extra_env: Dict[str, str]) -> None:
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._env = dict(
+            os.environ,
+            PYTHONPATH=ROOT,
+            DATABASE_URL=f"sqlite:///{db_path}",
+            LLM_PROVIDER="local",
+            LOCAL_LLM_LATENCY_MS=str(llm_latency_ms),
+            ENVIRONMENT="benchmark",
+        )
+        self._env.pop("DATABASE_READ_URL", None)
+        self._env.update(extra_env)
+        self._process: Optional[subprocess.Popen] = None
+        self.started_at = 0.0
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process is not None else None
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._process = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "src.infrastructure.api.main:app",
+                "--host", "127.0.0.1", "--port", str(self.port), "--log-level", "warning",
+            ],
+            cwd=ROOT,
+            env=self._env,
+        )
+
+    def stop(self) -> None:
+        if self._process is None:
+            return
+        self._process.terminate()
+        try:
+            self._process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+
+
+async def wait_ready(client: httpx.AsyncClient, url: str, timeout_s: float) -> Dict[str, Any]:
+    """Espera a que /ready responda 200 y retorna su reporte"""
+    deadline = time.perf_counter() + timeout_s
+    while time.perf_counter() < deadline:
+        try:
+            response = await client.get(f"{url}/ready")
+            if response.status_code == 200:
+                return response.json()
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.05)
+    raise TimeoutError(f"El servidor no quedó listo en {timeout_s}s")
+
+
+class LoadGenerator:
+    """
+    Trabajadores concurrentes que eligen un endpoint por peso y registran
+    la latencia y el código de cada respuesta
+
+    Args:
+        url: URL base del servidor
+        mix: Pesos por endpoint
+        session_ids: Sesiones sobre las que se chatea y se lee historial
+        use_llm_cache: Si /chat puede responder desde la caché del LLM
+        seed: Semilla de las decisiones aleatorias
+    """
+
+    def __init__(
+        self,
+        url: str,
+        mix: Dict[str, float],
+        session_ids: List[str],
+        use_llm_cache: bool = True,
+        seed: int = 42,
+    ) -> None:
+        self._url = url
+        self._names = [name for name, weight in mix.items() if weight > 0]
+        self._weights = [mix[name] for name in self._names]
+        self._sessions = session_ids
+        self._use_llm_cache = use_llm_cache
+        self._rng = random.Random(seed)
+        self._samples: Dict[str, List[float]] = defaultdict(list)
+        self._statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def _next_request(self) -> Tuple[str, str, str, Optional[Dict[str, Any]]]:
+        """(endpoint, método, ruta, cuerpo JSON) de la próxima request"""
+        rng = self._rng
+        name = rng.choices(self._names, self._weights)[0]
+        if name == "products":
+            params = [f"limit={rng.choice((20, 50, 100))}"]
+            if rng.random() < 0.5:
+                params.append(f"brand={rng.choice(BRANDS)}")
+            if rng.random() < 0.3:
+                params.append(f"category={rng.choice(CATEGORIES)}")
+            if rng.random() < 0.3:
+                params.append(f"max_price={rng.randint(60, 200)}")
+            if rng.random() < 0.3:
+                params.append(f"sort={rng.choice(('price_asc', 'price_desc', 'name'))}")
+            if rng.random() < 0.1:
+                params.append("facets=true")
+            return name, "GET", "/products?" + "&".join(params).replace(" ", "%20"), None
+        session_id = rng.choice(self._sessions)
+        if name == "chat":
+            body = {
+                "session_id": session_id,
+                "message": rng.choice(CHAT_MESSAGES),
+                "use_cache": self._use_llm_cache,
+            }
+            return name, "POST", "/chat", body
+        return name, "GET", f"/chat/history/{session_id}?limit=50", None
+
+    async def _worker(self, client: httpx.AsyncClient, deadline: float, budget: List[int]) -> None:
+        while time.perf_counter() < deadline and budget[0] != 0:
+            budget[0] -= 1
+            name, method, path, body = self._next_request()
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, self._url + path, json=body)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            self._samples[name].append((time.perf_counter() - started) * 1000.0)
+            self._statuses[name][status] += 1
+
+    async def run(
+        self, client: httpx.AsyncClient, concurrency: int, duration_s: float, max_requests: int
+    ) -> Dict[str, Any]:
+        """
+        Ejecuta la carga hasta cumplir la duración o el total de requests
+
+        Returns:
+            dict: Totales y, por endpoint, latencias, throughput y códigos
+        """
+        budget = [max_requests if max_requests > 0 else -1]
+        started = time.perf_counter()
+        deadline = started + duration_s
+        await asyncio.gather(*(self._worker(client, deadline, budget) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        endpoints: Dict[str, Any] = {}
+        all_samples: List[float] = []
+        errors = 0
+        for name, samples in self._samples.items():
+            statuses = dict(self._statuses[name])
+            failed = sum(count for status, count in statuses.items() if not status.startswith("2"))
+            errors += failed
+            all_samples.extend(samples)
+            endpoints[name] = {
+                **latency_stats(samples),
+                "throughput_rps": round(len(samples) / elapsed, 2),
+                "errors": failed,
+                "statuses": statuses,
+            }
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "requests": len(all_samples),
+            "errors": errors,
+            "throughput_rps": round(len(all_samples) / elapsed, 2) if elapsed > 0 else 0.0,
+            "latency": latency_stats(all_samples),
+            "endpoints": endpoints,
+        }
+
+
+async def run_load(args: argparse.Namespace, url: str, session_ids: List[str]) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        ready = await wait_ready(client, url, args.ready_timeout)
+        ready_s = time.perf_counter() - args.server_started_at if args.server_started_at else None
+        generator = LoadGenerator(
+            url, parse_mix(args.mix), session_ids, use_llm_cache=not args.no_llm_cache, seed=args.seed
+        )
+        if args.warmup > 0:
+            await LoadGenerator(url, parse_mix(args.mix), session_ids, seed=args.seed + 1).run(
+                client, args.concurrency, args.warmup, 0
+            )
+        results = await generator.run(client, args.concurrency, args.duration, args.requests)
+    results["startup"] = {
+        "time_to_ready_s": round(ready_s, 3) if ready_s is not None else None,
+        "server": ready,
+    }
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada de línea de comandos; escribe los resultados en JSON"""
+    parser = argparse.ArgumentParser(description="Prueba de carga HTTP con LLM local")
+    parser.add_argument("--url", help="Servidor ya levantado (por defecto se levanta uno)")
+    parser.add_argument("--products", type=int, default=10_000, help="Productos del catálogo sintético")
+    parser.add_argument("--sessions", type=int, default=50, help="Sesiones de chat precargadas")
+    parser.add_argument("--session-turns", type=int, default=200, help="Mensajes por sesión precargada")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="Latencia del LLM local")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Enviar use_cache=false en /chat")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Pesos por endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="Segundos de carga")
+    parser.add_argument("--requests", type=int, default=0, help="Máximo de requests (0 = sin límite)")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Segundos de calentamiento sin medir")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por request")
+    parser.add_argument("--ready-timeout", type=float, default=60.0)
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE extra para el servidor")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+    args.server_started_at = 0.0
+
+    server: Optional[LocalServer] = None
+    with tempfile.TemporaryDirectory(prefix="load-") as tmp_dir:
+        if args.url:
+            url = args.url.rstrip("/")
+            session_ids = [f"bench-{index}" for index in range(max(args.sessions, 1))]
+        else:
+            db_path = os.path.join(tmp_dir, "load.db")
+            engine = create_engine(f"sqlite:///{db_path}")
+            populate_catalog(engine, args.products, args.seed)
+            session_ids = populate_sessions(engine, max(args.sessions, 1), args.session_turns, args.seed)
+            engine.dispose()
+            extra_env = dict(item.split("=", 1) for item in args.env)
+            server = LocalServer(db_path, args.llm_latency_ms, extra_env)
+            server.start()
+            args.server_started_at = server.started_at
+            url = server.url
+        try:
+            results = asyncio.run(run_load(args, url, session_ids))
+            results["server_peak_rss_mb"] = peak_rss_mb(server.pid) if server else None
+        finally:
+            if server is not None:
+                server.stop()
+    results["client_peak_rss_mb"] = peak_rss_mb()
+
+    params = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in {"out", "server_started_at"}
+    }
+    write_results(args.out, "load", params, results)
+    latency = results["latency"]
+    print(
+        f"{results['requests']} requests en {results['elapsed_s']}s "
+        f"({results['throughput_rps']} req/s, {results['errors']} errores)"
+    )
+    for name, stats in sorted(results["endpoints"].items()):
+        print(
+            f"  {name:<10} p50={stats['p50_ms']:>8.2f}ms p95={stats['p95_ms']:>8.2f}ms "
+            f"p99={stats['p99_ms']:>8.2f}ms {stats['throughput_rps']:>8.1f} req/s"
+        )
+    print(f"  total      p50={latency.get('p50_ms', 0):>8.2f}ms p99={latency.get('p99_ms', 0):>8.2f}ms")
+    print(f"listo en {results['startup']['time_to_ready_s']}s; memoria pico del servidor: {results['server_peak_rss_mb']} MB")
+    if args.out:
+        print(f"resultados en {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,224 @@
+"""
+Micro-benchmarks del camino de lectura, sin red ni LLM
+
+Sobre catálogos sintéticos de distintos tamaños mide las lecturas del
+repositorio (listado completo, por id, búsqueda con filtros y facetas), la
+caché del catálogo, la serialización de DTOs y el armado del prompt
+(búsqueda en el índice + PromptBuilder). Sobre una sesión larga mide la
+lectura paginada del historial, el ContextBuilder y la serialización del
+historial
+
+Uso:
+    python -m benchmarks.micro --sizes 1000,100000 --out benchmarks/results/micro.json
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from itertools import cycle
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from src.application.chat_service import build_history_page
+from src.application.context_builder import ContextBudget, ContextBuilder
+from src.application.dtos import PRODUCT_LIST_ADAPTER
+from src.application.product_service import ProductService
+from src.domain.entities import ChatContext, ProductQuery
+from src.infrastructure.db.database import build_engine
+from src.infrastructure.llm_providers.prompt_builder import PromptBuilder
+from src.infrastructure.llm_providers.tokens import build_token_estimator
+from src.infrastructure.repositories.cached_product_repository import (
+    CachedProductRepository,
+    CatalogCache,
+)
+from src.infrastructure.repositories.chat_repository import SqlAlchemyChatRepository
+from src.infrastructure.repositories.product_repository import SqlAlchemyProductRepository
+from src.infrastructure.search.bm25_index import BM25ProductIndex
+from .common import measure, peak_rss_mb, write_results
+from .data import BRANDS, CATEGORIES, CHAT_MESSAGES, populate_catalog, populate_sessions
+
+# Consultas de búsqueda que se alternan en cada repetición
+SEARCH_QUERIES = (
+    ProductQuery(brands=["Nike"], sort="price_asc"),
+    ProductQuery(categories=["Running", "Trail"], max_price=120.0, in_stock=True),
+    ProductQuery(brands=["Adidas", "Puma"], sizes=["42"], sort="price_desc"),
+    ProductQuery(min_price=50.0, max_price=90.0, sort="name"),
+)
+
+
+def _bench(
+    results: List[Dict[str, Any]],
+    name: str,
+    fn: Callable[[], Any],
+    repeat: int,
+    **labels: Any,
+) -> None:
+    """Mide `fn`, agrega el resultado y lo muestra en una línea"""
+    stats = measure(fn, repeat)
+    results.append({"name": name, **labels, **stats})
+    label = " ".join(f"{k}={v}" for k, v in labels.items())
+    print(
+        f"{name:<28} {label:<16} p50={stats['p50_ms']:>9.3f}ms "
+        f"p95={stats['p95_ms']:>9.3f}ms p99={stats['p99_ms']:>9.3f}ms "
+        f"{stats['ops_per_s']:>10.1f} op/s"
+    )
+
+
+def bench_catalog(
+    db_dir: str, size: int, repeat: int, scan_repeat: int, seed: int
+) -> List[Dict[str, Any]]:
+    """Benchmarks de lectura del catálogo con `size` productos"""
+    engine = build_engine(f"sqlite:///{os.path.join(db_dir, f'catalog_{size}.db')}")
+    started = time.perf_counter()
+    populate_catalog(engine, size, seed)
+    print(f"\n# catálogo de {size} productos (carga en {time.perf_counter() - started:.1f}s)")
+
+    results: List[Dict[str, Any]] = []
+    rng = random.Random(seed)
+    db = Session(bind=engine)
+    try:
+        repo = SqlAlchemyProductRepository(db)
+        _bench(results, "product_repo.get_all", repo.get_all, scan_repeat, size=size)
+        _bench(
+            results, "product_repo.get_by_id",
+            lambda: repo.get_by_id(rng.randint(1, size)), repeat, size=size,
+        )
+        queries = cycle(SEARCH_QUERIES)
+        _bench(results, "product_repo.search", lambda: repo.search(next(queries)), repeat, size=size)
+        facet_queries = cycle(
+            ProductQuery(brands=q.brands, categories=q.categories, with_facets=True) for q in SEARCH_QUERIES
+        )
+        _bench(
+            results, "product_repo.search_facets",
+            lambda: repo.search(next(facet_queries)), max(repeat // 10, 3), size=size,
+        )
+
+        cached = CachedProductRepository(repo, CatalogCache(ttl_seconds=3600))
+        cached.snapshot()
+        _bench(results, "catalog_cache.snapshot", cached.snapshot, repeat, size=size)
+
+        service = ProductService(product_repository=repo)
+        page_queries = cycle(SEARCH_QUERIES)
+        _bench(
+            results, "dto.product_page_json",
+            lambda: service.search_products(next(page_queries)).model_dump_json(), repeat, size=size,
+        )
+        _bench(
+            results, "dto.catalog_list",
+            lambda: PRODUCT_LIST_ADAPTER.validate_python(cached.get_all(), from_attributes=True),
+            scan_repeat, size=size,
+        )
+
+        products = list(cached.snapshot().products)
+        _bench(
+            results, "index.build",
+            lambda: BM25ProductIndex(top_k=5).sync(products), scan_repeat, size=size,
+        )
+        index = BM25ProductIndex(top_k=5)
+        index.sync(products)
+        builder = PromptBuilder()
+        history = ChatContext(messages=[]).format_for_prompt()
+        messages = cycle(CHAT_MESSAGES)
+
+        def retrieve_and_build() -> str:
+            message = next(messages)
+            hits = [product for product, _ in index.search(message)] or products[:5]
+            return builder.build(message, hits, history)
+
+        _bench(results, "prompt.retrieve_and_build", retrieve_and_build, repeat, size=size)
+        brand_cycle = cycle(BRANDS)
+        category_cycle = cycle(CATEGORIES)
+        _bench(
+            results, "prompt.build_cold",
+            lambda: PromptBuilder().build(
+                f"{next(brand_cycle)} {next(category_cycle)}", products[:20], history
+            ),
+            repeat, size=size,
+        )
+    finally:
+        db.close()
+        engine.dispose()
+    return results
+
+
+def bench_sessions(db_dir: str, turns: int, repeat: int, seed: int) -> List[Dict[str, Any]]:
+    """Benchmarks del historial sobre una sesión de `turns` mensajes"""
+    engine = build_engine(f"sqlite:///{os.path.join(db_dir, f'sessions_{turns}.db')}")
+    populate_catalog(engine, 0, seed)
+    session_id = populate_sessions(engine, sessions=1, turns=turns, seed=seed)[0]
+    print(f"\n# sesión de {turns} mensajes")
+
+    results: List[Dict[str, Any]] = []
+    rng = random.Random(seed)
+    db = Session(bind=engine)
+    try:
+        repo = SqlAlchemyChatRepository(db)
+        _bench(
+            results, "chat_repo.recent",
+            lambda: repo.get_recent_messages(session_id, limit=6), repeat, turns=turns,
+        )
+        _bench(
+            results, "chat_repo.page_before",
+            lambda: repo.get_messages_page(session_id, limit=51, before=rng.randint(60, turns)),
+            repeat, turns=turns,
+        )
+        page = repo.get_messages_page(session_id, limit=101)
+        _bench(
+            results, "dto.history_page_json",
+            lambda: build_history_page(session_id, page, 100, None).model_dump_json(),
+            repeat, turns=turns,
+        )
+        history = repo.get_recent_messages(session_id, limit=50)
+        products = SqlAlchemyProductRepository(db).get_all()[:5]
+        context_builder = ContextBuilder(build_token_estimator("chars"), ContextBudget())
+        messages = cycle(CHAT_MESSAGES)
+        _bench(
+            results, "context_builder.build",
+            lambda: context_builder.build(next(messages), history, products), repeat, turns=turns,
+        )
+    finally:
+        db.close()
+        engine.dispose()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada de línea de comandos; escribe los resultados en JSON"""
+    parser = argparse.ArgumentParser(description="Micro-benchmarks del camino de lectura")
+    parser.add_argument("--sizes", default="1000,10000", help="Tamaños de catálogo separados por coma")
+    parser.add_argument("--session-turns", type=int, default=2000, help="Mensajes de la sesión larga")
+    parser.add_argument("--repeat", type=int, default=200, help="Repeticiones de las operaciones cortas")
+    parser.add_argument("--scan-repeat", type=int, default=5, help="Repeticiones de las lecturas completas")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db-dir", help="Directorio de las bases (por defecto uno temporal)")
+    parser.add_argument("--out", help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp_dir:
+        db_dir = args.db_dir or tmp_dir
+        for size in sizes:
+            results.extend(bench_catalog(db_dir, size, args.repeat, args.scan_repeat, args.seed))
+        if args.session_turns > 0:
+            results.extend(bench_sessions(db_dir, args.session_turns, args.repeat, args.seed))
+
+    params = {
+        "sizes": sizes,
+        "session_turns": args.session_turns,
+        "repeat": args.repeat,
+        "scan_repeat": args.scan_repeat,
+        "seed": args.seed,
+    }
+    document = write_results(args.out, "micro", params, {"benchmarks": results, "peak_rss_mb": peak_rss_mb()})
+    print(f"\npico de memoria: {document['results']['peak_rss_mb']} MB")
+    if args.out:
+        print(f"resultados en {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,219 @@
+"""
+Servicio de aplicación asíncrono para el chat con IA
+
+Es el equivalente de ChatService para el modo async de la API: usa
+repositorios sobre AsyncSession y la llamada asíncrona a Gemini, de modo
+que un solo worker puede mantener muchas conversaciones en vuelo. El
+trabajo sincrónico que puede tardar (sincronizar índices, que con un
+embedder remoto hace llamadas de red, o recorrer el catálogo) corre en un
+hilo para no frenar el event loop
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterator, List, Optional
+from .dtos import ChatRequestDTO, ChatResponseDTO, ChatHistoryDTO
+from .chat_service import (
+    PreparedContext,
+    StreamEvent,
+    answer_structured_query,
+    apply_context_budget,
+    build_history_page,
+    build_turn_messages,
+    local_chunks,
+    new_message,
+    select_products,
+)
+from src.domain.repositories import IAsyncProductRepository, IAsyncChatRepository
+from src.domain.entities import ChatContext, ChatMessage, ConversationSummary
+from src.infrastructure.llm_providers.gemini_service import GeminiService, StreamChunk
+from src.infrastructure.observability.metrics import stage
+from src.infrastructure.search.query_engine import CatalogQueryEngine
+from .context_builder import ContextBuilder
+from src.infrastructure.search.base import IProductIndex
+
+
+async def _as_async(chunks: Iterator[StreamChunk]) -> AsyncIterator[StreamChunk]:
+    for chunk in chunks:
+        yield chunk
+
+
+class AsyncChatService:
+    """
+    Orquesta el mismo flujo que ChatService sin bloquear el event loop
+    """
+
+    def __init__(
+        self,
+        product_repository: IAsyncProductRepository,
+        chat_repository: IAsyncChatRepository,
+        gemini_service: GeminiService,
+        product_index: Optional[IProductIndex] = None,
+        context_builder: Optional[ContextBuilder] = None,
+        query_engine: Optional[CatalogQueryEngine] = None,
+    ) -> None:
+        self._product_repository = product_repository
+        self._chat_repository = chat_repository
+        self._gemini_service = gemini_service
+        self._product_index = product_index
+        self._context_builder = context_builder
+        self._query_engine = query_engine
+
+    async def process_message(self, request: ChatRequestDTO) -> ChatResponseDTO:
+        """
+        Procesa un mensaje del usuario y devuelve la respuesta de la IA
+
+        Args:
+            request (ChatRequestDTO): Datos del mensaje del usuario
+
+        Returns:
+            ChatResponseDTO: Respuesta generada por la IA
+        """
+        # Consultas estructuradas simples: respuesta local, sin LLM
+        with stage("local_answer"):
+            assistant_message = await self._answer_locally(request.message)
+        summary, overflow = None, []
+
+        if assistant_message is None:
+            # 1 y 2. Recuperar historial y seleccionar productos relevantes
+            context, products, summary, overflow = await self._prepare_context(request)
+
+            # 3. Llamar a Gemini sin ocupar un hilo
+            with stage("llm"):
+                assistant_message = await self._gemini_service.generate_response_async(
+                    user_message=request.message,
+                    products=products,
+                    chat_context=context,
+                    use_cache=request.use_cache,
+                )
+
+        now = datetime.now(timezone.utc)
+
+        # 4. Crear entidades de mensaje y guardar
+        user_chat, assistant_chat = build_turn_messages(
+            request.session_id, request.message, assistant_message, now
+        )
+        with stage("persist"):
+            await self._chat_repository.save_messages([user_chat, assistant_chat])
+            await self._update_summary(request.session_id, summary, overflow, now)
+
+        # 5. Construir DTO de respuesta
+        with stage("dto_build"):
+            response = ChatResponseDTO(
+                session_id=request.session_id,
+                user_message=request.message,
+                assistant_message=assistant_message,
+                timestamp=now,
+            )
+        return response
+
+    async def stream_message(self, request: ChatRequestDTO) -> AsyncIterator[StreamEvent]:
+        """Versión asíncrona de ChatService.stream_message (mismos eventos)"""
+        with stage("local_answer"):
+            local_answer = await self._answer_locally(request.message)
+        summary, overflow = None, []
+        if local_answer is None:
+            context, products, summary, overflow = await self._prepare_context(request)
+
+        now = datetime.now(timezone.utc)
+        user_chat = new_message(request.session_id, "user", request.message, now)
+        with stage("persist"):
+            await self._chat_repository.save_message(user_chat)
+        yield "start", {"session_id": request.session_id, "message_id": user_chat.id}
+
+        if local_answer is not None:
+            chunks = _as_async(local_chunks(local_answer))
+        else:
+            chunks = self._gemini_service.stream_response_async(
+                user_message=request.message,
+                products=products,
+                chat_context=context,
+                use_cache=request.use_cache,
+            )
+
+        parts: List[str] = []
+        async for chunk in chunks:
+            if chunk.reset:
+                parts.clear()
+                yield "reset", {}
+            parts.append(chunk.text)
+            yield "delta", {"text": chunk.text}
+
+        assistant_message = "".join(parts).strip()
+        with stage("persist"):
+            await self._chat_repository.save_message(
+                new_message(request.session_id, "assistant", assistant_message, now)
+            )
+            await self._update_summary(request.session_id, summary, overflow, now)
+        response = ChatResponseDTO(
+            session_id=request.session_id,
+            user_message=request.message,
+            assistant_message=assistant_message,
+            timestamp=now,
+        )
+        yield "end", response.model_dump(mode="json")
+
+    async def _answer_locally(self, user_message: str) -> Optional[str]:
+        """Respuesta del motor de consultas local, o None para usar el LLM"""
+        if self._query_engine is None:
+            return None
+        catalog = await self._product_repository.get_all()
+        return await asyncio.to_thread(
+            answer_structured_query,
+            self._query_engine,
+            catalog,
+            self._product_repository.catalog_version(),
+            user_message,
+        )
+
+    async def _prepare_context(self, request: ChatRequestDTO) -> PreparedContext:
+        """Lee historial y resumen, elige productos y aplica el presupuesto"""
+        builder = self._context_builder
+        summary = None
+        with stage("history_fetch"):
+            if builder is not None:
+                summary = await self._chat_repository.get_summary(request.session_id)
+            history = await self._chat_repository.get_recent_messages(
+                session_id=request.session_id,
+                limit=builder.fetch_limit if builder is not None else 6,
+            )
+        with stage("product_fetch"):
+            catalog = await self._product_repository.get_all()
+            products = await asyncio.to_thread(
+                select_products,
+                self._product_index,
+                catalog,
+                self._product_repository.catalog_version(),
+                request.message,
+                ChatContext(messages=history),
+            )
+        with stage("context_budget"):
+            prepared = apply_context_budget(builder, request.message, history, products, summary)
+        return prepared
+
+    async def _update_summary(
+        self,
+        session_id: str,
+        summary: Optional[ConversationSummary],
+        overflow: List[ChatMessage],
+        now: datetime,
+    ) -> None:
+        """Incorpora al resumen de la sesión los mensajes que quedaron fuera"""
+        if self._context_builder is None:
+            return
+        updated = self._context_builder.fold(session_id, summary, overflow, now)
+        if updated is not None:
+            await self._chat_repository.save_summary(updated)
+
+    async def get_history(
+        self,
+        session_id: str,
+        limit: int = 100,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+    ) -> ChatHistoryDTO:
+        """Obtiene una página del historial de mensajes de una sesión"""
+        messages = await self._chat_repository.get_messages_page(
+            session_id=session_id, limit=limit + 1, before=before, after=after
+        )
+        return build_history_page(session_id, messages, limit, after)
@@ -3,21 +3,156 @@ Servicio de aplicación para el chat con IA
 """
 
 from datetime import datetime, timezone
-from .dtos import ChatRequestDTO, ChatResponseDTO, ChatHistoryDTO, ChatMessageDTO
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from .dtos import CHAT_MESSAGE_LIST_ADAPTER, ChatRequestDTO, ChatResponseDTO, ChatHistoryDTO
 from src.domain.repositories import IProductRepository, IChatRepository
-from src.domain.entities import ChatMessage, ChatContext
-from src.infrastructure.llm_providers.gemini_service import GeminiService  
+from src.domain.entities import ChatMessage, ChatContext, ConversationSummary, Product
+from src.infrastructure.llm_providers.gemini_service import (
+    GeminiService,
+    StreamChunk,
+    split_into_chunks,
+)
+from src.infrastructure.observability.metrics import stage
+from src.infrastructure.search.query_engine import CatalogQueryEngine
+from .context_builder import ContextBuilder
+from src.infrastructure.search.base import IProductIndex
+
+
+def select_products(
+    product_index: Optional[IProductIndex],
+    catalog: Sequence[Product],
+    catalog_version: Optional[int],
+    user_message: str,
+    context: ChatContext,
+) -> List[Product]:
+    """
+    Elige los productos que se envian al LLM
+
+    Sin indice se usa el catalogo completo. Con indice se sincroniza con
+    el catalogo (solo si cambio su version) y se buscan los top-k para el
+    mensaje mas el historial; si nada supera el umbral se envian los
+    primeros k del catalogo
+    """
+    if product_index is None:
+        return list(catalog)
+
+    product_index.ensure_synced(catalog, catalog_version)
+    query = " ".join([m.message for m in context.get_recent_messages()] + [user_message])
+    hits = product_index.search(query)
+    if hits:
+        return [product for product, _ in hits]
+    return list(catalog[: product_index.top_k])
+
+
+def answer_structured_query(
+    query_engine: Optional[CatalogQueryEngine],
+    catalog: Sequence[Product],
+    catalog_version: Optional[int],
+    user_message: str,
+) -> Optional[str]:
+    """
+    Respuesta local para consultas estructuradas claras ("Nike por menos de
+    130", "¿hay stock del Ultraboost?"), o None si el mensaje debe ir al LLM
+    """
+    if query_engine is None:
+        return None
+    query_engine.ensure_synced(catalog, catalog_version)
+    return query_engine.answer_if_confident(user_message)
+
+
+def local_chunks(text: str) -> Iterator[StreamChunk]:
+    """Emite una respuesta local por fragmentos, como el streaming del LLM"""
+    for piece in split_into_chunks(text):
+        yield StreamChunk(text=piece)
+
+
+# Contexto preparado para una request: (contexto, productos del prompt,
+# resumen vigente, mensajes que deben pasar al resumen)
+PreparedContext = Tuple[ChatContext, List[Product], Optional[ConversationSummary], List[ChatMessage]]
+
+
+def apply_context_budget(
+    context_builder: Optional[ContextBuilder],
+    user_message: str,
+    history: List[ChatMessage],
+    products: List[Product],
+    summary: Optional[ConversationSummary],
+) -> PreparedContext:
+    """
+    Aplica el presupuesto de tokens al historial y a los productos
+
+    Sin ContextBuilder se usan los ultimos mensajes y todos los productos
+    seleccionados, como antes
+    """
+    if context_builder is None:
+        return ChatContext(messages=history), products, None, []
+    window = context_builder.build(user_message, history, products, summary)
+    return window.context, window.products, summary, window.overflow
+
+
+# Evento de streaming: (nombre del evento SSE, datos serializables a JSON)
+StreamEvent = Tuple[str, Dict[str, Any]]
+
+
+def new_message(session_id: str, role: str, text: str, now: datetime) -> ChatMessage:
+    """Crea la entidad de un mensaje nuevo (aun sin id)"""
+    return ChatMessage(
+        id=None,
+        session_id=session_id,
+        role=role,
+        message=text,
+        timestamp=now,
+    )
+
+
+def build_turn_messages(
+    session_id: str, user_message: str, assistant_message: str, now: datetime
+) -> Tuple[ChatMessage, ChatMessage]:
+    """Crea las entidades del mensaje del usuario y de la respuesta"""
+    return (
+        new_message(session_id, "user", user_message, now),
+        new_message(session_id, "assistant", assistant_message, now),
+    )
+
+
+def build_history_page(
+    session_id: str,
+    messages: List[ChatMessage],
+    limit: int,
+    after: Optional[int],
+) -> ChatHistoryDTO:
+    """
+    Arma el DTO de una página de historial
+
+    `messages` debe traer hasta `limit + 1` mensajes: el extra solo indica
+    que quedan más y se descarta del extremo opuesto al cursor
+    """
+    has_more = len(messages) > limit
+    if has_more:
+        messages = messages[:limit] if after is not None else messages[1:]
+
+    dto_messages = CHAT_MESSAGE_LIST_ADAPTER.validate_python(messages, from_attributes=True)
+    return ChatHistoryDTO.model_construct(
+        session_id=session_id, messages=dto_messages, has_more=has_more
+    )
 
 
 class ChatService:
     """
     Servicio que orquesta el flujo completo del chat inteligente:
 
-    1. Obtiene productos del repositorio
-    2. Recupera historial de chat
-    3. Construye el contexto conversacional
-    4. Llama a GeminiService para obtener respuesta
-    5. Guarda mensajes en la base de datos
+    1. Recupera historial de chat y construye el contexto conversacional
+    2. Selecciona los productos relevantes del catalogo
+    3. Llama a GeminiService para obtener respuesta
+    4. Guarda mensajes en la base de datos
+    5. Construye el DTO de respuesta
+
+    Si se inyecta un indice de productos (BM25 o vectorial), solo los top-k
+    productos mas relevantes para el mensaje y el historial llegan al prompt.
+    Con un ContextBuilder el historial y el catalogo se ajustan a un
+    presupuesto de tokens y los mensajes viejos pasan a un resumen por sesion.
+    Con un CatalogQueryEngine las consultas estructuradas claras se
+    responden localmente sin llamar al LLM
     """
 
     def __init__(
@@ -25,10 +160,16 @@ class ChatService:
         product_repository: IProductRepository,
         chat_repository: IChatRepository,
         gemini_service: GeminiService,
+        product_index: Optional[IProductIndex] = None,
+        context_builder: Optional[ContextBuilder] = None,
+        query_engine: Optional[CatalogQueryEngine] = None,
     ) -> None:
         self._product_repository = product_repository
         self._chat_repository = chat_repository
         self._gemini_service = gemini_service
+        self._product_index = product_index
+        self._context_builder = context_builder
+        self._query_engine = query_engine
 
     def process_message(self, request: ChatRequestDTO) -> ChatResponseDTO:
         """
@@ -40,57 +181,169 @@ class ChatService:
         Returns:
             ChatResponseDTO: Respuesta generada por la IA
         """
-        # 1. Obtener productos
-        products = self._product_repository.get_all()
+        # Consultas estructuradas simples: respuesta local, sin LLM
+        with stage("local_answer"):
+            assistant_message = self._answer_locally(request.message)
+        summary, overflow = None, []
 
-        # 2. Recuperar historial reciente
-        history = self._chat_repository.get_recent_messages(
-            session_id=request.session_id, limit=6
-        )
-        context = ChatContext(messages=history)
+        if assistant_message is None:
+            # 1 y 2. Recuperar historial y seleccionar productos relevantes
+            context, products, summary, overflow = self._prepare_context(request)
 
-        # 3. Llamar a Gemini
-        assistant_message = self._gemini_service.generate_response(
-            user_message=request.message,
-            products=products,
-            chat_context=context,
-        )
+            # 3. Llamar a Gemini
+            with stage("llm"):
+                assistant_message = self._gemini_service.generate_response(
+                    user_message=request.message,
+                    products=products,
+                    chat_context=context,
+                    use_cache=request.use_cache,
+                )
 
         now = datetime.now(timezone.utc)
 
         # 4. Crear entidades de mensaje y guardar
-        user_chat = ChatMessage(
-            id=None,
-            session_id=request.session_id,
-            role="user",
-            message=request.message,
-            timestamp=now,
+        user_chat, assistant_chat = build_turn_messages(
+            request.session_id, request.message, assistant_message, now
         )
-        assistant_chat = ChatMessage(
-            id=None,
-            session_id=request.session_id,
-            role="assistant",
-            message=assistant_message,
-            timestamp=now,
-        )
-
-        self._chat_repository.save_message(user_chat)
-        self._chat_repository.save_message(assistant_chat)
+        with stage("persist"):
+            self._chat_repository.save_messages([user_chat, assistant_chat])
+            self._update_summary(request.session_id, summary, overflow, now)
 
         # 5. Construir DTO de respuesta
-        return ChatResponseDTO(
+        with stage("dto_build"):
+            response = ChatResponseDTO(
+                session_id=request.session_id,
+                user_message=request.message,
+                assistant_message=assistant_message,
+                timestamp=now,
+            )
+        return response
+
+    def stream_message(self, request: ChatRequestDTO) -> Iterator[StreamEvent]:
+        """
+        Procesa un mensaje emitiendo la respuesta a medida que se genera
+
+        El mensaje del usuario se guarda antes de llamar al LLM y la
+        respuesta completa al terminar el flujo. Eventos emitidos:
+        `start`, `delta` (fragmento de texto), `reset` (descartar lo recibido,
+        el proveedor falló y sigue el fallback) y `end` (ChatResponseDTO).
+        El `message_id` de `start` es null si el mensaje quedó en la cola de
+        escritura diferida y todavía no tiene id
+        """
+        with stage("local_answer"):
+            local_answer = self._answer_locally(request.message)
+        summary, overflow = None, []
+        if local_answer is None:
+            context, products, summary, overflow = self._prepare_context(request)
+
+        now = datetime.now(timezone.utc)
+        user_chat = new_message(request.session_id, "user", request.message, now)
+        with stage("persist"):
+            self._chat_repository.save_message(user_chat)
+        yield "start", {"session_id": request.session_id, "message_id": user_chat.id}
+
+        if local_answer is not None:
+            chunks = local_chunks(local_answer)
+        else:
+            chunks = self._gemini_service.stream_response(
+                user_message=request.message,
+                products=products,
+                chat_context=context,
+                use_cache=request.use_cache,
+            )
+
+        parts: List[str] = []
+        for chunk in chunks:
+            if chunk.reset:
+                parts.clear()
+                yield "reset", {}
+            parts.append(chunk.text)
+            yield "delta", {"text": chunk.text}
+
+        assistant_message = "".join(parts).strip()
+        with stage("persist"):
+            self._chat_repository.save_message(
+                new_message(request.session_id, "assistant", assistant_message, now)
+            )
+            self._update_summary(request.session_id, summary, overflow, now)
+        response = ChatResponseDTO(
             session_id=request.session_id,
             user_message=request.message,
             assistant_message=assistant_message,
             timestamp=now,
         )
+        yield "end", response.model_dump(mode="json")
 
-    def get_history(self, session_id: str) -> ChatHistoryDTO:
+    def _answer_locally(self, user_message: str) -> Optional[str]:
+        """Respuesta del motor de consultas local, o None para usar el LLM"""
+        if self._query_engine is None:
+            return None
+        return answer_structured_query(
+            self._query_engine,
+            self._product_repository.get_all(),
+            self._product_repository.catalog_version(),
+            user_message,
+        )
+
+    def _prepare_context(self, request: ChatRequestDTO) -> PreparedContext:
+        """Lee historial y resumen, elige productos y aplica el presupuesto"""
+        builder = self._context_builder
+        summary = None
+        with stage("history_fetch"):
+            if builder is not None:
+                summary = self._chat_repository.get_summary(request.session_id)
+            history = self._chat_repository.get_recent_messages(
+                session_id=request.session_id,
+                limit=builder.fetch_limit if builder is not None else 6,
+            )
+        with stage("product_fetch"):
+            products = self._select_products(request.message, ChatContext(messages=history))
+        with stage("context_budget"):
+            prepared = apply_context_budget(builder, request.message, history, products, summary)
+        return prepared
+
+    def _update_summary(
+        self,
+        session_id: str,
+        summary: Optional[ConversationSummary],
+        overflow: List[ChatMessage],
+        now: datetime,
+    ) -> None:
+        """Incorpora al resumen de la sesion los mensajes que quedaron fuera"""
+        if self._context_builder is None:
+            return
+        updated = self._context_builder.fold(session_id, summary, overflow, now)
+        if updated is not None:
+            self._chat_repository.save_summary(updated)
+
+    def _select_products(self, user_message: str, context: ChatContext) -> List[Product]:
+        """Elige los productos del catalogo que se envian al LLM"""
+        return select_products(
+            self._product_index,
+            self._product_repository.get_all(),
+            self._product_repository.catalog_version(),
+            user_message,
+            context,
+        )
+
+    def get_history(
+        self,
+        session_id: str,
+        limit: int = 100,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+    ) -> ChatHistoryDTO:
         """
-        Obtiene el historial de mensajes de una sesión especifica
+        Obtiene una página del historial de mensajes de una sesión especifica
+
+        Args:
+            session_id (str): Sesión a consultar
+            limit (int): Máximo de mensajes de la página
+            before (int | None): Cursor para traer mensajes anteriores a ese id
+            after (int | None): Cursor para traer mensajes posteriores a ese id
         """
-        messages = self._chat_repository.get_recent_messages(
-            session_id=session_id, limit=100
+        # Se pide un mensaje extra solo para saber si quedan más
+        messages = self._chat_repository.get_messages_page(
+            session_id=session_id, limit=limit + 1, before=before, after=after
         )
-        dto_messages = [ChatMessageDTO.model_validate(m) for m in messages]
-        return ChatHistoryDTO(session_id=session_id, messages=dto_messages)
+        return build_history_page(session_id, messages, limit, after)
@@ -0,0 +1,256 @@
+"""
+Contexto conversacional con presupuesto de tokens
+
+En lugar de un número fijo de mensajes, el prompt tiene un presupuesto de
+tokens repartido entre el historial y el catálogo. Los mensajes que no
+entran (por presupuesto o por ser más viejos que la ventana) se incorporan
+a un resumen acumulado por sesión, guardado junto a `chat_memory`, que va
+al principio del historial
+"""
+
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.domain.entities import ChatContext, ChatMessage, ConversationSummary, Product
+from src.infrastructure.llm_providers.prompt_builder import render_product_line
+from src.infrastructure.llm_providers.tokens import ITokenEstimator
+from src.infrastructure.search.text import normalize_text
+
+# Tokens aproximados por mensaje además de su texto ("Usuario: ", salto de línea)
+_MESSAGE_OVERHEAD = 3
+_ELLIPSIS = "…"
+_MAX_CACHED_PRODUCTS = 50_000
+
+# Palabras que no aportan al resumen de lo que pidió el cliente
+_SUMMARY_STOPWORDS = frozenset(
+    {
+        "", "a", "al", "con", "de", "del", "el", "en", "es", "hola", "la", "las", "lo",
+        "los", "me", "mi", "por", "que", "se", "un", "una", "unos", "unas", "y", "o",
+        "quiero", "busco", "puedes", "podrias", "gracias", "favor",
+    }
+)
+
+
+@dataclass(frozen=True)
+class ContextBudget:
+    """
+    Reparto del presupuesto de tokens del prompt
+
+    Attributes:
+        total_tokens: Presupuesto total del prompt
+        history_ratio: Parte (0-1) disponible para historial y resumen; lo
+            que el historial no use queda para el catálogo
+        summary_ratio: Parte (0-1) del presupuesto del historial reservada
+            al resumen
+        max_messages: Máximo de mensajes textuales en el historial
+        template_tokens: Tokens fijos de las instrucciones del prompt
+    """
+
+    total_tokens: int = 4000
+    history_ratio: float = 0.35
+    summary_ratio: float = 0.3
+    max_messages: int = 12
+    template_tokens: int = 80
+
+    @property
+    def summary_tokens(self) -> int:
+        """Tamaño máximo del resumen acumulado"""
+        return int(self.total_tokens * self.history_ratio * self.summary_ratio)
+
+
+@dataclass
+class ContextWindow:
+    """
+    Resultado de aplicar el presupuesto a una request
+
+    Attributes:
+        context: Contexto con los mensajes que entran y el resumen
+        products: Productos que entran en el presupuesto del catálogo
+        overflow: Mensajes que quedaron fuera y deben pasar al resumen
+        tokens: Tokens estimados por parte del prompt
+    """
+
+    context: ChatContext
+    products: List[Product]
+    overflow: List[ChatMessage]
+    tokens: Dict[str, int] = field(default_factory=dict)
+
+
+class ExtractiveSummarizer:
+    """
+    Resumen local y sin LLM: una línea corta por mensaje
+
+    De los mensajes del usuario conserva las palabras con contenido (marca,
+    talla, color...) y de las respuestas la primera oración. Cuando el
+    resumen supera su presupuesto se descartan las líneas más antiguas
+    """
+
+    SEPARATOR = "; "
+
+    def __init__(self, estimator: ITokenEstimator, user_words: int = 12, assistant_words: int = 16) -> None:
+        self._estimator = estimator
+        self._user_words = user_words
+        self._assistant_words = assistant_words
+
+    def update(self, previous: str, messages: Sequence[ChatMessage], max_tokens: int) -> str:
+        """Agrega los mensajes al resumen y lo recorta a `max_tokens`"""
+        segments = previous.split(self.SEPARATOR) if previous else []
+        segments.extend(s for s in (self._segment(m) for m in messages) if s)
+        text = self.SEPARATOR.join(segments)
+        while len(segments) > 1 and self._estimator.count(text) > max_tokens:
+            segments.pop(0)
+            text = self.SEPARATOR.join(segments)
+        return self._estimator.truncate(text, max_tokens)
+
+    def _segment(self, message: ChatMessage) -> str:
+        text = " ".join(message.message.replace(";", ",").split())
+        if message.is_from_user():
+            words = [w for w in text.split() if normalize_text(w.strip(".,¿?¡!")) not in _SUMMARY_STOPWORDS]
+            return "Cliente: " + " ".join(words[: self._user_words]) if words else ""
+        sentence = text.split(". ")[0]
+        return "Asistente: " + " ".join(sentence.split()[: self._assistant_words])
+
+
+class ContextBuilder:
+    """
+    Arma el contexto de cada request respetando el presupuesto de tokens
+
+    Es de larga vida y se comparte entre requests; el costo en tokens de
+    cada línea de producto se calcula una vez por versión del producto
+    """
+
+    def __init__(
+        self,
+        estimator: ITokenEstimator,
+        budget: Optional[ContextBudget] = None,
+        summarizer: Optional[ExtractiveSummarizer] = None,
+    ) -> None:
+        self._estimator = estimator
+        self._budget = budget or ContextBudget()
+        self._summarizer = summarizer or ExtractiveSummarizer(estimator)
+        self._product_tokens: Dict[int, Tuple[Product, int]] = {}
+
+    @property
+    def budget(self) -> ContextBudget:
+        """Reparto del presupuesto en uso"""
+        return self._budget
+
+    @property
+    def fetch_limit(self) -> int:
+        """
+        Mensajes a leer del historial
+
+        Se leen dos más que la ventana (un turno) para que cada mensaje
+        pase por el resumen antes de dejar de leerse
+        """
+        return self._budget.max_messages + 2
+
+    def build(
+        self,
+        user_message: str,
+        history: List[ChatMessage],
+        products: List[Product],
+        summary: Optional[ConversationSummary] = None,
+    ) -> ContextWindow:
+        """
+        Selecciona los mensajes y productos que entran en el prompt
+
+        El historial se llena desde el mensaje más nuevo hacia atrás; un
+        mensaje más largo que la mitad del presupuesto del historial se
+        recorta. El catálogo usa lo que queda, en el orden de relevancia
+        recibido y con al menos un producto
+        """
+        budget = self._budget
+        estimator = self._estimator
+        message_tokens = estimator.count(user_message)
+        available = max(budget.total_tokens - budget.template_tokens - message_tokens, 0)
+        history_budget = int(available * budget.history_ratio)
+
+        summary_text = ""
+        covered = None
+        if summary is not None:
+            covered = summary.covered_until_id
+            summary_text = estimator.truncate(summary.summary, budget.summary_tokens)
+            history = [m for m in history if m.id is None or covered is None or m.id > covered]
+        summary_tokens = estimator.count(summary_text) if summary_text else 0
+
+        remaining = max(history_budget - summary_tokens, 0)
+        per_message = max(history_budget // 2, 1)
+        window = history[-budget.max_messages :] if budget.max_messages > 0 else []
+        selected: List[ChatMessage] = []
+        history_tokens = 0
+        for message in reversed(window):
+            message = self._fit_message(message, per_message)
+            cost = estimator.count(message.message) + _MESSAGE_OVERHEAD
+            if history_tokens + cost > remaining:
+                break
+            selected.append(message)
+            history_tokens += cost
+        selected.reverse()
+
+        catalog_budget = available - summary_tokens - history_tokens
+        chosen: List[Product] = []
+        catalog_tokens = 0
+        for product in products:
+            cost = self._product_cost(product)
+            if chosen and catalog_tokens + cost > catalog_budget:
+                break
+            chosen.append(product)
+            catalog_tokens += cost
+
+        return ContextWindow(
+            context=ChatContext(messages=selected, max_messages=len(selected), summary=summary_text),
+            products=chosen,
+            overflow=history[: len(history) - len(selected)],
+            tokens={
+                "message": message_tokens,
+                "summary": summary_tokens,
+                "history": history_tokens,
+                "catalog": catalog_tokens,
+            },
+        )
+
+    def fold(
+        self,
+        session_id: str,
+        summary: Optional[ConversationSummary],
+        overflow: List[ChatMessage],
+        now: datetime,
+    ) -> Optional[ConversationSummary]:
+        """
+        Incorpora al resumen los mensajes que quedaron fuera del contexto
+
+        Returns:
+            ConversationSummary | None: El resumen actualizado, o None si
+            no había mensajes nuevos que resumir (los que aún no tienen id
+            se resumirán en un turno posterior)
+        """
+        covered = summary.covered_until_id if summary is not None else None
+        fresh = [m for m in overflow if m.id is not None and (covered is None or m.id > covered)]
+        if not fresh:
+            return None
+        previous = summary.summary if summary is not None else ""
+        return ConversationSummary(
+            session_id=session_id,
+            summary=self._summarizer.update(previous, fresh, self._budget.summary_tokens),
+            covered_until_id=max(m.id for m in fresh),
+            message_count=(summary.message_count if summary is not None else 0) + len(fresh),
+            updated_at=now,
+        )
+
+    def _fit_message(self, message: ChatMessage, max_tokens: int) -> ChatMessage:
+        if self._estimator.count(message.message) <= max_tokens:
+            return message
+        text = self._estimator.truncate(message.message, max_tokens - 1).rstrip()
+        return replace(message, message=(text or message.message[:1]) + _ELLIPSIS)
+
+    def _product_cost(self, product: Product) -> int:
+        entry = self._product_tokens.get(product.id)
+        if entry is not None and (entry[0] is product or entry[0] == product):
+            return entry[1]
+        cost = self._estimator.count(render_product_line(product)) + 1
+        if len(self._product_tokens) >= _MAX_CACHED_PRODUCTS:
+            self._product_tokens.clear()
+        self._product_tokens[product.id] = (product, cost)
+        return cost
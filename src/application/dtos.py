@@ -4,9 +4,9 @@ DTOs (Data Transfer Objects) usados para comunicar capas
 Se basan en Pydantic para validación automática
 """
 
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
 
 class ProductDTO(BaseModel):
@@ -25,6 +25,31 @@ class ProductDTO(BaseModel):
     description: str
 
 
+# Validación de listas en una sola llamada a pydantic-core en lugar de un
+# model_validate por elemento
+PRODUCT_LIST_ADAPTER = TypeAdapter(List[ProductDTO])
+
+
+class ProductPageDTO(BaseModel):
+    """
+    DTO para una página de la búsqueda de productos
+
+    Para la página siguiente se repite la consulta con `cursor=next_cursor`
+    """
+
+    items: List[ProductDTO]
+    next_cursor: Optional[str] = Field(
+        None, description="Cursor de la página siguiente (None si no hay más)"
+    )
+    total: Optional[int] = Field(
+        None, description="Productos que cumplen los filtros (solo con facets=true)"
+    )
+    facets: Dict[str, Dict[str, int]] = Field(
+        default_factory=dict,
+        description="Conteos por marca, categoria, talla y color (solo con facets=true)",
+    )
+
+
 class ChatMessageDTO(BaseModel):
     """DTO para mensajes individuales de chat"""
 
@@ -37,11 +62,17 @@ class ChatMessageDTO(BaseModel):
     timestamp: datetime
 
 
+CHAT_MESSAGE_LIST_ADAPTER = TypeAdapter(List[ChatMessageDTO])
+
+
 class ChatRequestDTO(BaseModel):
     """DTO de entrada para el endpoint de chat"""
 
     session_id: str
     message: str
+    use_cache: bool = Field(
+        True, description="False para forzar una respuesta nueva del LLM"
+    )
 
 
 class ChatResponseDTO(BaseModel):
@@ -54,7 +85,15 @@ class ChatResponseDTO(BaseModel):
 
 
 class ChatHistoryDTO(BaseModel):
-    """DTO para retornar el historial completo de una sesión"""
+    """
+    DTO para retornar una página del historial de una sesión
+
+    Para seguir paginando se usa el id del primer mensaje como `before`
+    (mensajes anteriores) o el del último como `after` (mensajes nuevos)
+    """
 
     session_id: str
     messages: List[ChatMessageDTO]
+    has_more: bool = Field(
+        False, description="Indica si hay más mensajes en la dirección consultada"
+    )
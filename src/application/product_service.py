@@ -2,11 +2,67 @@
 Servicio de aplicación para casos de uso relacionados con productos
 """
 
-from typing import List
+import base64
+import json
+import math
+from dataclasses import replace
+from typing import Any, Optional, Tuple
 from datetime import datetime
-from .dtos import ProductDTO
+from .dtos import PRODUCT_LIST_ADAPTER, ProductDTO, ProductPageDTO
+from src.domain.entities import PRODUCT_SORTS, Product, ProductQuery
 from src.domain.repositories import IProductRepository
-from src.domain.exceptions import ProductNotFoundError
+from src.domain.exceptions import InvalidCursorError, ProductNotFoundError
+
+
+def encode_cursor(sort: str, product: Product) -> str:
+    """
+    Codifica la clave de orden del producto como cursor opaco
+
+    Incluye el orden para rechazar cursores usados con otro `sort`
+    """
+    field_name, _ = PRODUCT_SORTS[sort]
+    raw = json.dumps([sort, getattr(product, field_name), product.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value: Any) -> bool:
+    return (_is_int(value) or isinstance(value, float)) and math.isfinite(value)
+
+
+# Tipo que debe tener el valor del cursor según el campo de orden
+_CURSOR_VALUE_CHECKS = {
+    "id": _is_int,
+    "name": lambda value: isinstance(value, str),
+    "price": _is_number,
+}
+
+
+def decode_cursor(sort: str, cursor: str) -> Tuple[Any, int]:
+    """
+    Decodifica un cursor generado por `encode_cursor`
+
+    El valor se valida contra el tipo del campo de orden para no enlazar,
+    por ejemplo, un texto o una lista a `price > :value`
+
+    Raises:
+        InvalidCursorError: Si el cursor está mal formado, es de otro orden o
+            sus valores no tienen el tipo esperado
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise InvalidCursorError(cursor) from None
+    if cursor_sort != sort or not _is_int(last_id):
+        raise InvalidCursorError(cursor)
+    field_name, _ = PRODUCT_SORTS[sort]
+    if not _CURSOR_VALUE_CHECKS[field_name](value):
+        raise InvalidCursorError(cursor)
+    return value, last_id
 
 
 class ProductService:
@@ -20,16 +76,6 @@ class ProductService:
     def __init__(self, product_repository: IProductRepository) -> None:
         self._product_repository = product_repository
 
-    def list_products(self) -> List[ProductDTO]:
-        """
-        Retorna todos los productos del catalogo
-
-        Returns:
-            list[ProductDTO]: Lista de productos disponibles
-        """
-        products = self._product_repository.get_all()
-        return [ProductDTO.model_validate(p) for p in products]
-
     def get_product(self, product_id: int) -> ProductDTO:
         """
         Obtiene un producto por su ID
@@ -41,3 +87,27 @@ class ProductService:
         if not product:
             raise ProductNotFoundError(product_id)
         return ProductDTO.model_validate(product)
+
+    def search_products(self, query: ProductQuery, cursor: Optional[str] = None) -> ProductPageDTO:
+        """
+        Busca productos con filtros, orden y paginación por cursor
+
+        Args:
+            query: Filtros, orden, tamaño de página y si se piden facetas
+            cursor: `next_cursor` de la página anterior
+
+        Raises:
+            InvalidCursorError: Si el cursor no corresponde a la consulta
+        """
+        if cursor:
+            query = replace(query, after=decode_cursor(query.sort, cursor))
+        page = self._product_repository.search(query)
+        next_cursor = None
+        if page.has_more and page.products:
+            next_cursor = encode_cursor(query.sort, page.products[-1])
+        return ProductPageDTO.model_construct(
+            items=PRODUCT_LIST_ADAPTER.validate_python(page.products, from_attributes=True),
+            next_cursor=next_cursor,
+            total=page.total,
+            facets=page.facets,
+        )
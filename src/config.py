@@ -19,6 +19,126 @@ class Settings(BaseModel):
     database_url: str
     environment: str = "development"
 
+    # Si es True, /chat y /chat/history usan AsyncSession y la llamada
+    # asíncrona a Gemini en lugar del threadpool
+    async_mode: bool = False
+
+    # Proveedor de LLM: 'gemini' o 'local' (determinista, para pruebas de
+    # carga y entornos sin conexión)
+    llm_provider: str = "gemini"
+    gemini_model: str = "gemini-1.5-flash"
+    llm_warmup: bool = True
+    local_llm_latency_ms: float = 0.0
+    local_llm_output_words: int = 60
+
+    # Coalescencia de llamadas idénticas concurrentes al LLM
+    llm_single_flight: bool = True
+
+    # Resiliencia: timeout por llamada, reintentos con backoff y jitter
+    # limitados por presupuesto, y circuit breaker
+    llm_resilience: bool = True
+    llm_timeout_s: float = 20.0
+    llm_stream_deadline_s: float = 120.0
+    llm_timeout_workers: int = 32
+    llm_max_retries: int = 2
+    llm_retry_budget_ratio: float = 0.2
+    llm_backoff_base_ms: float = 200.0
+    llm_backoff_max_ms: float = 2000.0
+    llm_breaker_failures: int = 5
+    llm_breaker_cooldown_s: float = 30.0
+
+    # Control de admisión: llamadas simultáneas (0 = sin límite), cola de
+    # espera y plazo máximo en cola antes de responder con el fallback
+    llm_max_concurrency: int = 16
+    llm_max_queue: int = 128
+    llm_queue_deadline_ms: float = 10_000.0
+
+    # Caché de respuestas del LLM (memoria + SQLite opcional)
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 1024
+    llm_cache_ttl_seconds: float = 600.0
+    llm_cache_sqlite_path: str = ""
+    llm_cache_sqlite_max_entries: int = 100_000
+
+    # Escritura diferida del historial de chat (group commit)
+    chat_write_behind: bool = False
+    chat_write_batch_ms: float = 50.0
+    chat_write_batch_rows: int = 200
+    chat_write_queue_size: int = 10_000
+
+    # Presupuesto de tokens del prompt y resumen acumulado por sesión
+    context_budget: bool = True
+    token_estimator: str = "chars"  # 'chars' o 'words'
+    prompt_token_budget: int = 4000
+    history_budget_ratio: float = 0.35
+    summary_budget_ratio: float = 0.3
+    context_max_messages: int = 12
+
+    # Respuestas locales a consultas estructuradas (marca, talla, color,
+    # precio...) sin llamar al LLM
+    intent_fast_path: bool = True
+    intent_min_confidence: float = 0.8
+
+    # Importación masiva del catálogo: filas por lote, filas entre COMMITs y
+    # tamaño máximo del cuerpo aceptado por el endpoint de importación
+    import_batch_size: int = 5000
+    import_commit_rows: int = 100_000
+    import_max_bytes: int = 256 * 1024 * 1024
+
+    # Token para los endpoints /admin (vacío = deshabilitados)
+    admin_token: str = ""
+
+    # ETag / 304 y cuerpos precomprimidos de /products por versión del catálogo
+    http_cache_enabled: bool = True
+    http_cache_max_entries: int = 512
+    http_cache_min_compress_bytes: int = 1024
+
+    # Perfil del engine: 'auto' (según la URL), 'sqlite', 'postgresql' o 'default'
+    db_profile: str = "auto"
+    # Réplica de solo lectura opcional: las lecturas (get_*) de los
+    # repositorios van a esta URL y las escrituras a database_url
+    database_read_url: str = ""
+    # SQLite: WAL + synchronous=NORMAL, espera ante bloqueos y cachés
+    sqlite_wal: bool = True
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size_mb: int = 256
+    sqlite_cache_size_mb: int = 64
+    # PostgreSQL (y otros motores con pool): tamaño, desborde y validación
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout_s: float = 30.0
+    db_pool_recycle_s: int = 1800
+    db_pool_pre_ping: bool = True
+
+    # Métricas (/metrics) y log estructurado de tiempos por request
+    metrics_enabled: bool = True
+    timing_log: bool = True
+    timing_log_min_ms: float = 0.0
+    # Consultas SQL: umbral de consulta lenta (con su plan) y de sentencia repetida (N+1)
+    slow_query_ms: float = 200.0
+    slow_query_explain: bool = True
+    n_plus_one_threshold: int = 5
+
+    # Perfilado por muestreo: a pedido (X-Profile + X-Admin-Token) y 1 de cada N
+    profiling_enabled: bool = False
+    profile_sample_every: int = 0
+    profile_dir: str = "./data/profiles"
+    profile_interval_ms: float = 5.0
+    profile_max_files: int = 200
+
+    # Caché en proceso del catálogo
+    catalog_cache_ttl_seconds: float = 30.0
+
+    # Recuperación de productos para el prompt
+    retrieval_backend: str = "bm25"  # 'bm25' o 'vector'
+    retrieval_top_k: int = 5
+    retrieval_min_score: float = 0.0
+
+    # Índice vectorial (retrieval_backend='vector')
+    embedder: str = "hashed"  # 'hashed' (local) o 'gemini'
+    embedding_dim: int = 512
+    vector_index_path: str = "./data/product_vectors.npy"
+
     class Config:
         frozen = True
 
@@ -32,4 +152,77 @@ def get_settings() -> Settings:
         gemini_api_key=os.environ.get("GEMINI_API_KEY", ""),
         database_url=os.environ.get("DATABASE_URL", "sqlite:///./data/ecommerce_chat.db"),
         environment=os.environ.get("ENVIRONMENT", "development"),
+        async_mode=os.environ.get("ASYNC_MODE", "false").lower() in {"1", "true", "yes"},
+        llm_provider=os.environ.get("LLM_PROVIDER", "gemini"),
+        gemini_model=os.environ.get("GEMINI_MODEL", "gemini-1.5-flash"),
+        llm_warmup=os.environ.get("LLM_WARMUP", "true").lower() in {"1", "true", "yes"},
+        local_llm_latency_ms=float(os.environ.get("LOCAL_LLM_LATENCY_MS", "0")),
+        local_llm_output_words=int(os.environ.get("LOCAL_LLM_OUTPUT_WORDS", "60")),
+        llm_single_flight=os.environ.get("LLM_SINGLE_FLIGHT", "true").lower() in {"1", "true", "yes"},
+        llm_resilience=os.environ.get("LLM_RESILIENCE", "true").lower() in {"1", "true", "yes"},
+        llm_timeout_s=float(os.environ.get("LLM_TIMEOUT_S", "20")),
+        llm_stream_deadline_s=float(os.environ.get("LLM_STREAM_DEADLINE_S", "120")),
+        llm_timeout_workers=int(os.environ.get("LLM_TIMEOUT_WORKERS", "32")),
+        llm_max_retries=int(os.environ.get("LLM_MAX_RETRIES", "2")),
+        llm_retry_budget_ratio=float(os.environ.get("LLM_RETRY_BUDGET_RATIO", "0.2")),
+        llm_backoff_base_ms=float(os.environ.get("LLM_BACKOFF_BASE_MS", "200")),
+        llm_backoff_max_ms=float(os.environ.get("LLM_BACKOFF_MAX_MS", "2000")),
+        llm_breaker_failures=int(os.environ.get("LLM_BREAKER_FAILURES", "5")),
+        llm_breaker_cooldown_s=float(os.environ.get("LLM_BREAKER_COOLDOWN_S", "30")),
+        llm_max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", "16")),
+        llm_max_queue=int(os.environ.get("LLM_MAX_QUEUE", "128")),
+        llm_queue_deadline_ms=float(os.environ.get("LLM_QUEUE_DEADLINE_MS", "10000")),
+        llm_cache_enabled=os.environ.get("LLM_CACHE_ENABLED", "true").lower() in {"1", "true", "yes"},
+        llm_cache_max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "1024")),
+        llm_cache_ttl_seconds=float(os.environ.get("LLM_CACHE_TTL_SECONDS", "600")),
+        llm_cache_sqlite_path=os.environ.get("LLM_CACHE_SQLITE_PATH", ""),
+        llm_cache_sqlite_max_entries=int(os.environ.get("LLM_CACHE_SQLITE_MAX_ENTRIES", "100000")),
+        chat_write_behind=os.environ.get("CHAT_WRITE_BEHIND", "false").lower() in {"1", "true", "yes"},
+        chat_write_batch_ms=float(os.environ.get("CHAT_WRITE_BATCH_MS", "50")),
+        chat_write_batch_rows=int(os.environ.get("CHAT_WRITE_BATCH_ROWS", "200")),
+        chat_write_queue_size=int(os.environ.get("CHAT_WRITE_QUEUE_SIZE", "10000")),
+        context_budget=os.environ.get("CONTEXT_BUDGET", "true").lower() in {"1", "true", "yes"},
+        token_estimator=os.environ.get("TOKEN_ESTIMATOR", "chars"),
+        prompt_token_budget=int(os.environ.get("PROMPT_TOKEN_BUDGET", "4000")),
+        history_budget_ratio=float(os.environ.get("HISTORY_BUDGET_RATIO", "0.35")),
+        summary_budget_ratio=float(os.environ.get("SUMMARY_BUDGET_RATIO", "0.3")),
+        context_max_messages=int(os.environ.get("CONTEXT_MAX_MESSAGES", "12")),
+        intent_fast_path=os.environ.get("INTENT_FAST_PATH", "true").lower() in {"1", "true", "yes"},
+        intent_min_confidence=float(os.environ.get("INTENT_MIN_CONFIDENCE", "0.8")),
+        import_batch_size=int(os.environ.get("IMPORT_BATCH_SIZE", "5000")),
+        import_commit_rows=int(os.environ.get("IMPORT_COMMIT_ROWS", "100000")),
+        import_max_bytes=int(os.environ.get("IMPORT_MAX_BYTES", str(256 * 1024 * 1024))),
+        admin_token=os.environ.get("ADMIN_TOKEN", ""),
+        db_profile=os.environ.get("DB_PROFILE", "auto"),
+        database_read_url=os.environ.get("DATABASE_READ_URL", ""),
+        sqlite_wal=os.environ.get("SQLITE_WAL", "true").lower() in {"1", "true", "yes"},
+        sqlite_busy_timeout_ms=int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        sqlite_mmap_size_mb=int(os.environ.get("SQLITE_MMAP_SIZE_MB", "256")),
+        sqlite_cache_size_mb=int(os.environ.get("SQLITE_CACHE_SIZE_MB", "64")),
+        db_pool_size=int(os.environ.get("DB_POOL_SIZE", "10")),
+        db_max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", "20")),
+        db_pool_timeout_s=float(os.environ.get("DB_POOL_TIMEOUT_S", "30")),
+        db_pool_recycle_s=int(os.environ.get("DB_POOL_RECYCLE_S", "1800")),
+        db_pool_pre_ping=os.environ.get("DB_POOL_PRE_PING", "true").lower() in {"1", "true", "yes"},
+        http_cache_enabled=os.environ.get("HTTP_CACHE_ENABLED", "true").lower() in {"1", "true", "yes"},
+        http_cache_max_entries=int(os.environ.get("HTTP_CACHE_MAX_ENTRIES", "512")),
+        http_cache_min_compress_bytes=int(os.environ.get("HTTP_CACHE_MIN_COMPRESS_BYTES", "1024")),
+        metrics_enabled=os.environ.get("METRICS_ENABLED", "true").lower() in {"1", "true", "yes"},
+        timing_log=os.environ.get("TIMING_LOG", "true").lower() in {"1", "true", "yes"},
+        timing_log_min_ms=float(os.environ.get("TIMING_LOG_MIN_MS", "0")),
+        slow_query_ms=float(os.environ.get("SLOW_QUERY_MS", "200")),
+        slow_query_explain=os.environ.get("SLOW_QUERY_EXPLAIN", "true").lower() in {"1", "true", "yes"},
+        n_plus_one_threshold=int(os.environ.get("N_PLUS_ONE_THRESHOLD", "5")),
+        profiling_enabled=os.environ.get("PROFILING_ENABLED", "false").lower() in {"1", "true", "yes"},
+        profile_sample_every=int(os.environ.get("PROFILE_SAMPLE_EVERY", "0")),
+        profile_dir=os.environ.get("PROFILE_DIR", "./data/profiles"),
+        profile_interval_ms=float(os.environ.get("PROFILE_INTERVAL_MS", "5")),
+        profile_max_files=int(os.environ.get("PROFILE_MAX_FILES", "200")),
+        catalog_cache_ttl_seconds=float(os.environ.get("CATALOG_CACHE_TTL_SECONDS", "30")),
+        retrieval_backend=os.environ.get("RETRIEVAL_BACKEND", "bm25"),
+        retrieval_top_k=int(os.environ.get("RETRIEVAL_TOP_K", "5")),
+        retrieval_min_score=float(os.environ.get("RETRIEVAL_MIN_SCORE", "0.0")),
+        embedder=os.environ.get("EMBEDDER", "hashed"),
+        embedding_dim=int(os.environ.get("EMBEDDING_DIM", "512")),
+        vector_index_path=os.environ.get("VECTOR_INDEX_PATH", "./data/product_vectors.npy"),
     )
@@ -5,16 +5,21 @@ Aqui se definen las entidades puras del negocio
 - Product
 - ChatMessage
 - ChatContext
+- ConversationSummary
+- ProductQuery / ProductPage
 
 No hay dependencias a frameworks ni a la base de datos
 """
 
-from dataclasses import dataclass
-from typing import Optional, List
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
 
-@dataclass
+_new = object.__new__
+
+
+@dataclass(slots=True)
 class Product:
     """
     Entidad que representa un producto (zapato) en el e-commerce
@@ -23,6 +28,10 @@ class Product:
     - El precio debe ser mayor que 0
     - El stock no puede ser negativo
     - El nombre no puede estar vacío
+
+    Usa __slots__ para reducir memoria en catálogos grandes. Las filas
+    leídas de la base de datos (ya validadas al escribirse) se construyen
+    con `from_trusted`, que omite la validación
     """
 
     id: Optional[int]
@@ -44,6 +53,32 @@ class Product:
         if self.stock < 0:
             raise ValueError("El stock no puede ser negativo")
 
+    @classmethod
+    def from_trusted(
+        cls,
+        id: Optional[int],
+        name: str,
+        brand: str,
+        category: str,
+        size: str,
+        color: str,
+        price: float,
+        stock: int,
+        description: str,
+    ) -> "Product":
+        """Construye el producto sin validar (solo para datos ya validados)"""
+        product = _new(cls)
+        product.id = id
+        product.name = name
+        product.brand = brand
+        product.category = category
+        product.size = size
+        product.color = color
+        product.price = price
+        product.stock = stock
+        product.description = description
+        return product
+
     def is_available(self) -> bool:
         """
         Indica si el producto tiene stock disponible
@@ -84,11 +119,14 @@ class Product:
         self.stock += quantity
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatMessage:
     """
     Entidad que representa un mensaje dentro de una conversación de chat
 
+    Como Product, usa __slots__ y ofrece `from_trusted` para filas leídas
+    de la base de datos
+
     Attributes:
         id: Identificador opcional en la base de datos
         session_id: Identificador de la sesión del cliente
@@ -112,6 +150,24 @@ class ChatMessage:
         if not self.message or not self.message.strip():
             raise ValueError("El mensaje no puede estar vacío")
 
+    @classmethod
+    def from_trusted(
+        cls,
+        id: Optional[int],
+        session_id: str,
+        role: str,
+        message: str,
+        timestamp: datetime,
+    ) -> "ChatMessage":
+        """Construye el mensaje sin validar (solo para datos ya validados)"""
+        chat_message = _new(cls)
+        chat_message.id = id
+        chat_message.session_id = session_id
+        chat_message.role = role
+        chat_message.message = message
+        chat_message.timestamp = timestamp
+        return chat_message
+
     def is_from_user(self) -> bool:
         """Retorna True si el mensaje fue enviado por el usuario"""
         return self.role == "user"
@@ -126,11 +182,13 @@ class ChatContext:
     """
     Value Object que encapsula el contexto de una conversación
 
-    Mantiene los mensajes recientes para dar coherencia al chat
+    Mantiene los mensajes recientes para dar coherencia al chat y,
+    opcionalmente, el resumen de la parte más antigua de la conversación
     """
 
     messages: List[ChatMessage]
     max_messages: int = 6
+    summary: str = ""
 
     def get_recent_messages(self) -> List[ChatMessage]:
         """
@@ -146,11 +204,102 @@ class ChatContext:
         Formatea los mensajes recientes para incluirlos en el prompt de IA
 
         Formato:
+            Resumen de la conversación anterior: ... (si hay resumen)
             Usuario: ...
             Asistente: ...
         """
         lines: list[str] = []
+        if self.summary:
+            lines.append(f"Resumen de la conversación anterior: {self.summary}")
         for msg in self.get_recent_messages():
             prefix = "Usuario" if msg.is_from_user() else "Asistente"
             lines.append(f"{prefix}: {msg.message}")
         return "\n".join(lines)
+
+
+@dataclass
+class ConversationSummary:
+    """
+    Resumen acumulado de los mensajes que ya salieron del contexto del prompt
+
+    Attributes:
+        session_id: Sesión a la que pertenece
+        summary: Texto del resumen
+        covered_until_id: Id del último mensaje incorporado al resumen
+        message_count: Cantidad de mensajes resumidos
+        updated_at: Momento de la última actualización
+    """
+
+    session_id: str
+    summary: str
+    covered_until_id: Optional[int]
+    message_count: int
+    updated_at: datetime
+
+
+# Ordenamientos del catálogo: nombre -> (campo, descendente)
+PRODUCT_SORTS: Dict[str, Tuple[str, bool]] = {
+    "id": ("id", False),
+    "name": ("name", False),
+    "price_asc": ("price", False),
+    "price_desc": ("price", True),
+}
+
+# Campos del producto sobre los que se calculan facetas
+PRODUCT_FACETS: Tuple[str, ...] = ("brand", "category", "size", "color")
+
+
+@dataclass
+class ProductQuery:
+    """
+    Criterios de búsqueda del catálogo
+
+    Los filtros de lista aceptan varios valores (OR dentro del campo, AND
+    entre campos). El cursor es la clave de orden del último producto de
+    la página anterior: `(valor del campo de orden, id)`
+
+    Attributes:
+        brands, categories, sizes, colors: Valores exactos aceptados
+        min_price, max_price: Rango de precio (inclusive)
+        in_stock: Solo productos con stock
+        sort: Uno de PRODUCT_SORTS
+        after: Cursor keyset
+        limit: Tamaño de la página
+        with_facets: Calcular conteos por faceta y total
+    """
+
+    brands: List[str] = field(default_factory=list)
+    categories: List[str] = field(default_factory=list)
+    sizes: List[str] = field(default_factory=list)
+    colors: List[str] = field(default_factory=list)
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    in_stock: bool = False
+    sort: str = "id"
+    after: Optional[Tuple[Any, int]] = None
+    limit: int = 50
+    with_facets: bool = False
+
+    def __post_init__(self) -> None:
+        if self.sort not in PRODUCT_SORTS:
+            raise ValueError(f"Orden no soportado: {self.sort}")
+        if self.limit <= 0:
+            raise ValueError("limit debe ser mayor que 0")
+
+
+@dataclass
+class ProductPage:
+    """
+    Página de resultados de una búsqueda del catálogo
+
+    Attributes:
+        products: Productos de la página, en el orden pedido
+        has_more: Si hay más productos después del último
+        facets: `campo -> {valor: cantidad}` (vacío si no se pidieron)
+        total: Productos que cumplen los filtros (None si no se pidieron facetas)
+    """
+
+    products: List[Product]
+    has_more: bool = False
+    facets: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    total: Optional[int] = None
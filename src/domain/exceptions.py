@@ -18,3 +18,11 @@ class InvalidProductDataError(Exception):
 
     def __init__(self, message: str) -> None:
         super().__init__(message)
+
+
+class InvalidCursorError(Exception):
+    """Se lanza cuando un cursor de paginación no es válido para la consulta"""
+
+    def __init__(self, cursor: str) -> None:
+        super().__init__(f"Cursor de paginación inválido: {cursor}")
+        self.cursor = cursor
@@ -6,8 +6,8 @@ depender de una implementación concreta
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Optional
-from .entities import Product, ChatMessage
+from typing import List, Optional, Sequence, Tuple
+from .entities import Product, ProductPage, ProductQuery, ChatMessage, ConversationSummary
 
 
 class IProductRepository(ABC):
@@ -17,8 +17,13 @@ class IProductRepository(ABC):
     """
 
     @abstractmethod
-    def get_all(self) -> List[Product]:
-        """Obtiene todos los productos disponibles"""
+    def get_all(self) -> Sequence[Product]:
+        """
+        Obtiene todos los productos disponibles
+
+        Las implementaciones con caché pueden devolver una secuencia
+        compartida de solo lectura: no debe modificarse
+        """
         raise NotImplementedError
 
     @abstractmethod
@@ -26,6 +31,45 @@ class IProductRepository(ABC):
         """Obtiene un producto por su identificador"""
         raise NotImplementedError
 
+    @abstractmethod
+    def save(self, product: Product) -> Product:
+        """Crea o actualiza un producto y lo retorna con su id asignado"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, product_id: int) -> bool:
+        """Elimina un producto; retorna False si no existia"""
+        raise NotImplementedError
+
+    def catalog_version(self) -> Optional[int]:
+        """
+        Versión (generación) actual del catálogo, si la implementación la conoce
+
+        Permite que otras cachés (índices, respuestas) se invaliden solo
+        cuando el catálogo cambió. Por defecto no hay versión disponible
+        """
+        return None
+
+    def catalog_stamp(self) -> Optional[Tuple]:
+        """
+        Sello barato del contenido del catálogo (p. ej. una versión que la
+        base de datos sube en cada escritura)
+
+        Debe cambiar con cualquier alta, cambio o baja, hecha por este u
+        otro proceso, sin tener que leer el catálogo completo. Por defecto
+        no hay sello disponible
+        """
+        return None
+
+    def search(self, query: ProductQuery) -> ProductPage:
+        """
+        Busca productos con filtros, orden y paginación por cursor (keyset)
+
+        Las implementaciones deben resolver filtros, orden, límite y
+        facetas en el origen de datos en lugar de leer todo el catálogo
+        """
+        raise NotImplementedError
+
 
 class IChatRepository(ABC):
     """
@@ -37,7 +81,103 @@ class IChatRepository(ABC):
         """Obtiene los últimos mensajes de una sesión"""
         raise NotImplementedError
 
+    @abstractmethod
+    def get_messages_page(
+        self,
+        session_id: str,
+        limit: int,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+    ) -> List[ChatMessage]:
+        """
+        Obtiene una página del historial usando paginación por cursor (keyset)
+
+        Los cursores son ids de mensajes: `before` devuelve los mensajes
+        anteriores a ese mensaje y `after` los posteriores. Sin cursores se
+        devuelven los más recientes. El resultado siempre va en orden
+        cronológico
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def save_message(self, message: ChatMessage) -> ChatMessage:
         """Guarda un mensaje nuevo en la conversación"""
         raise NotImplementedError
+
+    @abstractmethod
+    def save_messages(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        """Guarda varios mensajes (por ejemplo, un turno completo) en una sola transacción"""
+        raise NotImplementedError
+
+    def get_summary(self, session_id: str) -> Optional[ConversationSummary]:
+        """
+        Resumen acumulado de la sesión, si la implementación guarda resúmenes
+
+        Por defecto no hay resumen y el contexto se limita a los mensajes
+        recientes
+        """
+        return None
+
+    def save_summary(self, summary: ConversationSummary) -> None:
+        """Crea o reemplaza el resumen de la sesión (por defecto no hace nada)"""
+        return None
+
+
+class IAsyncProductRepository(ABC):
+    """
+    Versión asíncrona de IProductRepository para el modo async de la API
+    """
+
+    @abstractmethod
+    async def get_all(self) -> Sequence[Product]:
+        """Obtiene todos los productos disponibles (secuencia de solo lectura)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_by_id(self, product_id: int) -> Optional[Product]:
+        """Obtiene un producto por su identificador"""
+        raise NotImplementedError
+
+    def catalog_version(self) -> Optional[int]:
+        """Versión (generación) actual del catálogo, si se conoce"""
+        return None
+
+
+class IAsyncChatRepository(ABC):
+    """
+    Versión asíncrona de IChatRepository para el modo async de la API
+    """
+
+    @abstractmethod
+    async def get_recent_messages(self, session_id: str, limit: int = 6) -> List[ChatMessage]:
+        """Obtiene los últimos mensajes de una sesión"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_messages_page(
+        self,
+        session_id: str,
+        limit: int,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+    ) -> List[ChatMessage]:
+        """Obtiene una página del historial usando paginación por cursor"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def save_message(self, message: ChatMessage) -> ChatMessage:
+        """Guarda un mensaje nuevo en la conversación"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def save_messages(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        """Guarda varios mensajes en una sola transacción"""
+        raise NotImplementedError
+
+    async def get_summary(self, session_id: str) -> Optional[ConversationSummary]:
+        """Resumen acumulado de la sesión, si la implementación guarda resúmenes"""
+        return None
+
+    async def save_summary(self, summary: ConversationSummary) -> None:
+        """Crea o reemplaza el resumen de la sesión (por defecto no hace nada)"""
+        return None
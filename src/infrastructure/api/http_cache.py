@@ -0,0 +1,225 @@
+"""
+Caché HTTP de las respuestas del catálogo
+
+Las respuestas de /products y /products/{id} dependen solo del contenido
+del catálogo y de la URL. Se identifican con un ETag derivado de una
+versión barata del catálogo (ver `CatalogCache.version`), de modo que un
+`If-None-Match` vigente se responde con 304 sin cargar el catálogo ni
+serializar nada
+
+Los cuerpos ya serializados se guardan por versión del catálogo y URL,
+junto con sus variantes comprimidas (gzip y, si está instalado, brotli),
+que se calculan una sola vez por codificación
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional
+    brotli = None
+
+
+def _compress_gzip(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def _compress_brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=5)
+
+
+# Codificaciones soportadas en orden de preferencia
+ENCODERS: Dict[str, Callable[[bytes], bytes]] = {}
+if brotli is not None:
+    ENCODERS["br"] = _compress_brotli
+ENCODERS["gzip"] = _compress_gzip
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Codificación -> peso q del header Accept-Encoding"""
+    accepted: Dict[str, float] = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def choose_encoding(header: str, available: Iterable[str] = ()) -> Optional[str]:
+    """
+    Elige la codificación a usar según Accept-Encoding
+
+    Entre las aceptadas con q > 0 gana la de mayor peso; a igual peso, la
+    primera de ENCODERS. None significa sin comprimir
+    """
+    accepted = parse_accept_encoding(header) if header else {}
+    best: Optional[str] = None
+    best_q = 0.0
+    for name in available or ENCODERS:
+        q = accepted.get(name, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparación débil de If-None-Match contra el ETag actual"""
+    if if_none_match.strip() == "*":
+        return True
+    current = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == current:
+            return True
+    return False
+
+
+class CachedBody:
+    """Cuerpo serializado de una respuesta y sus variantes comprimidas"""
+
+    __slots__ = ("etag", "identity", "encoded", "_lock")
+
+    def __init__(self, etag: str, identity: bytes) -> None:
+        self.etag = etag
+        self.identity = identity
+        self.encoded: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def body_for(self, encoding: Optional[str], min_bytes: int) -> Tuple[bytes, Optional[str], bool]:
+        """
+        Cuerpo para la codificación pedida
+
+        Returns:
+            tuple[bytes, str | None, bool]: Cuerpo, codificación aplicada
+            (None si va sin comprimir) y si hubo que comprimirlo ahora
+        """
+        if encoding is None or len(self.identity) < min_bytes:
+            return self.identity, None, False
+        body = self.encoded.get(encoding)
+        if body is not None:
+            return body, encoding, False
+        with self._lock:
+            body = self.encoded.get(encoding)
+            if body is not None:
+                return body, encoding, False
+            body = ENCODERS[encoding](self.identity)
+            self.encoded[encoding] = body
+        return body, encoding, True
+
+
+class CatalogResponseCache:
+    """
+    Cuerpos de respuesta del catálogo por (versión del catálogo, URL)
+
+    Al cambiar la versión se descartan todas las entradas anteriores; dentro
+    de una misma versión se mantiene un LRU acotado
+
+    Args:
+        max_entries: URLs distintas guardadas
+        min_compress_bytes: Tamaño mínimo para comprimir (los cuerpos más
+            chicos van sin comprimir)
+    """
+
+    def __init__(self, max_entries: int = 512, min_compress_bytes: int = 1024) -> None:
+        self._max_entries = max(max_entries, 1)
+        self._min_bytes = min_compress_bytes
+        self._version: Optional[str] = None
+        self._entries: "OrderedDict[str, CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "not_modified": 0,
+            "compressions": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def etag_for(version: str, key: str) -> str:
+        """ETag de la URL para la versión del catálogo"""
+        tag = hashlib.blake2b(version.encode("utf-8"), digest_size=8).hexdigest()
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=6).hexdigest()
+        return f'W/"{tag}-{digest}"'
+
+    def get(self, version: str, key: str) -> Optional[CachedBody]:
+        """Cuerpo guardado para la URL en esta versión del catálogo"""
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry
+
+    def put(self, version: str, key: str, body: bytes) -> CachedBody:
+        """
+        Guarda el cuerpo serializado de la URL
+
+        Si entretanto otra request ya vio una versión distinta del catálogo
+        el cuerpo se retorna sin guardarse
+        """
+        entry = CachedBody(self.etag_for(version, key), body)
+        with self._lock:
+            if self._version != version:
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def encoded_body(self, entry: CachedBody, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        """Cuerpo de la entrada en la codificación negociada (y la codificación)"""
+        body, encoding, compressed = entry.body_for(choose_encoding(accept_encoding), self._min_bytes)
+        if compressed:
+            with self._lock:
+                self._stats["compressions"] += 1
+        return body, encoding
+
+    def record_not_modified(self) -> None:
+        with self._lock:
+            self._stats["not_modified"] += 1
+
+    def stats(self) -> Dict[str, object]:
+        """Aciertos, 304 enviados, compresiones y tamaño de la caché"""
+        with self._lock:
+            stats: Dict[str, object] = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = sum(
+                len(e.identity) + sum(len(b) for b in e.encoded.values())
+                for e in self._entries.values()
+            )
+        stats["encodings"] = list(ENCODERS)
+        return stats
+
+    def _check_version(self, version: str) -> None:
+        """Con el lock tomado: descarta todo si cambió el catálogo"""
+        if version != self._version:
+            if self._entries:
+                self._stats["invalidations"] += 1
+            self._entries.clear()
+            self._version = version
+
+
+def cache_key(path: str, query_items: List[Tuple[str, str]]) -> str:
+    """URL normalizada: ruta más parámetros ordenados"""
+    if not query_items:
+        return path
+    return path + "?" + "&".join(f"{k}={v}" for k, v in sorted(query_items))
@@ -4,34 +4,294 @@ Punto de entrada de la API (FastAPI)
 Define los endpoints HTTP y ensambla las dependencias entre capas
 """
 
-from fastapi import FastAPI, Depends, HTTPException
+import time
+
+# Inicio del arranque: el import de la app se mide como primera fase
+BOOT_STARTED = time.perf_counter()
+
+import asyncio
+import csv
+import hmac
+import io
+import json
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Callable, List, Literal, Optional
+
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from src.infrastructure.db.database import engine, Base, get_db
-from src.infrastructure.db.init_data import init_db
+from src.infrastructure.db.database import (
+    engine,
+    ReadSessionLocal,
+    SessionLocal,
+    get_db,
+    get_read_db,
+    get_async_db,
+    get_async_read_db,
+)
+from src.infrastructure.db.init_data import ensure_initialized
+from src.infrastructure.api.http_cache import CatalogResponseCache, cache_key, etag_matches
+from src.infrastructure.api.middleware import MetricsMiddleware, configure_timing_log
+from src.infrastructure.api.profiling import ProfiledRoute, ProfilingMiddleware
+from src.infrastructure.api.startup import StartupTracker
+from src.infrastructure.db.catalog_import import FORMATS, CatalogImporter, detect_format
 from src.infrastructure.repositories.product_repository import SqlAlchemyProductRepository
 from src.infrastructure.repositories.chat_repository import SqlAlchemyChatRepository
+from src.infrastructure.repositories.async_product_repository import AsyncSqlAlchemyProductRepository
+from src.infrastructure.repositories.async_chat_repository import AsyncSqlAlchemyChatRepository
+from src.infrastructure.repositories.chat_write_behind import (
+    AsyncWriteBehindChatRepository,
+    ChatWriteBehind,
+    WriteBehindChatRepository,
+)
+from src.infrastructure.repositories.cached_product_repository import (
+    CachedAsyncProductRepository,
+    CachedProductRepository,
+    CatalogCache,
+)
+from src.infrastructure.llm_providers.admission import AdmissionController
 from src.infrastructure.llm_providers.gemini_service import GeminiService
-from src.application.product_service import ProductService
+from src.infrastructure.llm_providers.base import ILLMProvider
+from src.infrastructure.llm_providers.registry import LLMProviderRegistry
+from src.infrastructure.llm_providers.resilience import (
+    CircuitBreaker,
+    ResilientProvider,
+    RetryBudget,
+)
+from src.infrastructure.llm_providers.response_cache import (
+    MemoryLRUTier,
+    ResponseCache,
+    SqliteTier,
+)
+from src.infrastructure.llm_providers.single_flight import SingleFlight
+from src.infrastructure.observability.metrics import REGISTRY
+from src.infrastructure.observability.profiling import ProfileStore, RequestProfiler, StackSampler
+from src.infrastructure.llm_providers.tokens import build_token_estimator
+from src.infrastructure.search.base import IProductIndex
+from src.infrastructure.search.bm25_index import BM25ProductIndex
+from src.infrastructure.search.query_engine import CatalogQueryEngine
+from src.application.product_service import ProductService, decode_cursor
 from src.application.chat_service import ChatService
+from src.application.async_chat_service import AsyncChatService
+from src.application.context_builder import ContextBudget, ContextBuilder
 from src.application.dtos import (
     ProductDTO,
+    ProductPageDTO,
     ChatRequestDTO,
     ChatResponseDTO,
     ChatHistoryDTO,
 )
-from src.domain.exceptions import ProductNotFoundError
+from src.domain.entities import ProductQuery
+from src.domain.exceptions import InvalidCursorError, ProductNotFoundError
+from src.domain.repositories import IAsyncChatRepository, IChatRepository, IProductRepository
+from src.config import get_settings
+
+settings = get_settings()
+
+# Importar este módulo no toca la base de datos ni carga SDKs de proveedores:
+# el esquema, los datos iniciales y el calentamiento corren en el lifespan
+startup = StartupTracker(started_at=BOOT_STARTED)
+
+
+def build_product_index() -> IProductIndex:
+    """Crea el indice de productos configurado (BM25 o vectorial)"""
+    if settings.retrieval_backend == "vector":
+        from src.infrastructure.embeddings.embedders import GeminiEmbedder, HashedNgramEmbedder
+        from src.infrastructure.embeddings.vector_index import VectorProductIndex
+
+        embedder = (
+            GeminiEmbedder()
+            if settings.embedder == "gemini"
+            else HashedNgramEmbedder(dim=settings.embedding_dim)
+        )
+        return VectorProductIndex(
+            embedder=embedder,
+            top_k=settings.retrieval_top_k,
+            min_score=settings.retrieval_min_score,
+            path=settings.vector_index_path or None,
+        )
+    return BM25ProductIndex(
+        top_k=settings.retrieval_top_k,
+        min_score=settings.retrieval_min_score,
+    )
+
+
+# Caché del catálogo e índice compartidos entre requests; el índice solo se
+# resincroniza cuando cambia la generación del catálogo
+catalog_cache = CatalogCache(ttl_seconds=settings.catalog_cache_ttl_seconds)
+
+# Cuerpos serializados y comprimidos de /products por versión del catálogo
+http_cache = (
+    CatalogResponseCache(
+        max_entries=settings.http_cache_max_entries,
+        min_compress_bytes=settings.http_cache_min_compress_bytes,
+    )
+    if settings.http_cache_enabled
+    else None
+)
+product_index = build_product_index()
+query_engine = CatalogQueryEngine(min_confidence=settings.intent_min_confidence)
+
+
+def build_response_cache() -> Optional[ResponseCache]:
+    """Crea la caché de respuestas del LLM según la configuración"""
+    if not settings.llm_cache_enabled:
+        return None
+    sqlite_tier = None
+    if settings.llm_cache_sqlite_path:
+        sqlite_tier = SqliteTier(
+            settings.llm_cache_sqlite_path,
+            max_entries=settings.llm_cache_sqlite_max_entries,
+            ttl_seconds=settings.llm_cache_ttl_seconds,
+        )
+    memory = MemoryLRUTier(
+        max_entries=settings.llm_cache_max_entries,
+        ttl_seconds=settings.llm_cache_ttl_seconds,
+    )
+    return ResponseCache(memory, sqlite_tier)
+
+
+def build_llm_provider() -> ILLMProvider:
+    """Proveedor activo, envuelto en la capa de resiliencia si está habilitada"""
+    provider = llm_registry.get()
+    if not settings.llm_resilience:
+        return provider
+    return ResilientProvider(
+        provider,
+        timeout_s=settings.llm_timeout_s,
+        stream_deadline_s=settings.llm_stream_deadline_s,
+        max_workers=settings.llm_timeout_workers,
+        max_retries=settings.llm_max_retries,
+        backoff_base_ms=settings.llm_backoff_base_ms,
+        backoff_max_ms=settings.llm_backoff_max_ms,
+        retry_budget=RetryBudget(ratio=settings.llm_retry_budget_ratio),
+        breaker=CircuitBreaker(
+            failure_threshold=settings.llm_breaker_failures,
+            cool_down_s=settings.llm_breaker_cooldown_s,
+            name=provider.name,
+        ),
+    )
+
+
+# Proveedor de LLM de larga vida: se crea una vez y se reutiliza entre requests
+llm_registry = LLMProviderRegistry(settings)
+response_cache = build_response_cache()
+llm_provider = build_llm_provider()
+single_flight = SingleFlight() if settings.llm_single_flight else None
+admission = (
+    AdmissionController(
+        max_concurrency=settings.llm_max_concurrency,
+        max_queue=settings.llm_max_queue,
+        deadline_ms=settings.llm_queue_deadline_ms,
+    )
+    if settings.llm_max_concurrency > 0
+    else None
+)
+llm_service = GeminiService(
+    provider=llm_provider,
+    response_cache=response_cache,
+    single_flight=single_flight,
+    admission=admission,
+    query_engine=query_engine,
+)
+
+# Presupuesto de tokens del contexto (historial + resumen + catálogo)
+context_builder = (
+    ContextBuilder(
+        build_token_estimator(settings.token_estimator),
+        ContextBudget(
+            total_tokens=settings.prompt_token_budget,
+            history_ratio=settings.history_budget_ratio,
+            summary_ratio=settings.summary_budget_ratio,
+            max_messages=settings.context_max_messages,
+        ),
+    )
+    if settings.context_budget
+    else None
+)
+
+# Escritor de fondo del historial (solo si está habilitado el write-behind)
+chat_writer = (
+    ChatWriteBehind(
+        SessionLocal,
+        batch_interval_ms=settings.chat_write_batch_ms,
+        batch_max_rows=settings.chat_write_batch_rows,
+        queue_size=settings.chat_write_queue_size,
+    )
+    if settings.chat_write_behind
+    else None
+)
+
+
+def warm_up() -> None:
+    """
+    Deja listas las cachés antes de declarar la app lista
+
+    Carga la instantánea del catálogo, sincroniza el índice de productos y
+    el motor de consultas, abre la caché de respuestas y calienta el
+    proveedor de LLM
+    """
+    try:
+        with startup.phase("catalog_ms"):
+            db = SessionLocal()
+            read_db = ReadSessionLocal()
+            try:
+                repo = CachedProductRepository(SqlAlchemyProductRepository(db, read_db), catalog_cache)
+                snapshot = repo.snapshot()
+            finally:
+                read_db.close()
+                db.close()
+        with startup.phase("index_ms"):
+            products = list(snapshot.products)
+            product_index.ensure_synced(products, snapshot.generation)
+            query_engine.ensure_synced(products, snapshot.generation)
+        if response_cache is not None:
+            with startup.phase("response_cache_ms"):
+                response_cache.warm_up()
+        if settings.llm_warmup:
+            with startup.phase("llm_ms"):
+                llm_registry.warm_up()
+    except Exception as e:
+        startup.fail(e)
+        return
+    startup.mark_ready()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """
+    Inicializa el esquema y los datos (una sola vez, con lock), arranca el
+    escritor del historial y calienta las cachés en segundo plano; al
+    apagar escribe los mensajes de chat pendientes
+
+    Mientras dura el calentamiento la API ya responde, pero /ready
+    contesta 503
+    """
+    startup.mark("import_ms")
+    with startup.phase("schema_ms"):
+        await run_in_threadpool(ensure_initialized)
+    if chat_writer is not None:
+        chat_writer.start()
+    warm_up_task = asyncio.create_task(run_in_threadpool(warm_up))
+    yield
+    await warm_up_task
+    if chat_writer is not None:
+        chat_writer.stop()
 
-# Crear tablas y datos iniciales al iniciar la app
-Base.metadata.create_all(bind=engine)
-init_db()
 
 app = FastAPI(
     title="E-commerce Chat API",
     description="API REST de e-commerce de zapatos con chat inteligente",
-    version="1.0.0",
+    version="2.0.0",
+    lifespan=lifespan,
 )
+app.router.route_class = ProfiledRoute
 
 app.add_middleware(
     CORSMiddleware,
@@ -41,35 +301,271 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.metrics_enabled:
+    app.add_middleware(
+        MetricsMiddleware,
+        timing_log=settings.timing_log,
+        timing_log_min_ms=settings.timing_log_min_ms,
+        db_headers=settings.environment != "production",
+        n_plus_one_threshold=settings.n_plus_one_threshold,
+    )
+    if settings.timing_log:
+        configure_timing_log()
+    REGISTRY.gauge_function("app_ready", "1 cuando terminó el calentamiento", lambda: startup.ready)
+    REGISTRY.gauge_function(
+        "catalog_generation", "Generación de la instantánea del catálogo", lambda: catalog_cache.generation
+    )
+    if isinstance(llm_provider, ResilientProvider):
+        REGISTRY.gauge_function(
+            "llm_circuit_open",
+            "1 si el circuit breaker del LLM está abierto",
+            lambda: llm_provider.breaker.state == "open",
+        )
+        REGISTRY.gauge_function(
+            "llm_provider_busy_threads",
+            "Hilos del pool del LLM ocupados, incluidas las llamadas vencidas",
+            lambda: llm_provider.busy_workers,
+        )
+    if admission is not None:
+        REGISTRY.gauge_function(
+            "llm_admission_in_flight", "Llamadas al LLM en curso", lambda: admission.in_flight
+        )
+        REGISTRY.gauge_function(
+            "llm_admission_queue_depth", "Requests esperando lugar para llamar al LLM", lambda: admission.queue_depth
+        )
 
-def get_product_service(db: Session = Depends(get_db)) -> ProductService:
+
+# Perfilado por muestreo: solo se instala si se pidió a pedido o 1 de cada N
+profile_store = ProfileStore(settings.profile_dir, max_files=settings.profile_max_files)
+profiler: Optional[RequestProfiler] = None
+if settings.profiling_enabled or settings.profile_sample_every > 0:
+    profiler = RequestProfiler(
+        profile_store,
+        StackSampler(interval_ms=settings.profile_interval_ms),
+        sample_every=settings.profile_sample_every,
+    )
+    app.add_middleware(
+        ProfilingMiddleware,
+        profiler=profiler,
+        admin_token=settings.admin_token if settings.profiling_enabled else "",
+        interval_ms=settings.profile_interval_ms,
+    )
+
+
+def get_product_repository(
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+) -> IProductRepository:
+    """Crea el repositorio de productos servido desde la caché del catálogo"""
+    return CachedProductRepository(SqlAlchemyProductRepository(db, read_db), catalog_cache)
+
+
+def get_product_service(
+    product_repo: IProductRepository = Depends(get_product_repository),
+) -> ProductService:
     """Crea una instancia de ProductService con su repositorio concreto"""
-    repo = SqlAlchemyProductRepository(db)
-    return ProductService(product_repository=repo)
+    return ProductService(product_repository=product_repo)
 
 
-def get_chat_service(db: Session = Depends(get_db)) -> ChatService:
+def get_chat_service(
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+    product_repo: IProductRepository = Depends(get_product_repository),
+) -> ChatService:
     """Crea una instancia de ChatService con sus dependencias"""
-    product_repo = SqlAlchemyProductRepository(db)
-    chat_repo = SqlAlchemyChatRepository(db)
-    gemini = GeminiService()
+    chat_repo: IChatRepository = SqlAlchemyChatRepository(db, read_db)
+    if chat_writer is not None:
+        chat_repo = WriteBehindChatRepository(chat_repo, chat_writer)
     return ChatService(
         product_repository=product_repo,
         chat_repository=chat_repo,
-        gemini_service=gemini,
+        gemini_service=llm_service,
+        product_index=product_index,
+        context_builder=context_builder,
+        query_engine=query_engine if settings.intent_fast_path else None,
     )
 
 
+def get_async_chat_service(
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_async_read_db),
+) -> AsyncChatService:
+    """Crea una instancia de AsyncChatService con repositorios asíncronos"""
+    chat_repo: IAsyncChatRepository = AsyncSqlAlchemyChatRepository(db, read_db)
+    if chat_writer is not None:
+        chat_repo = AsyncWriteBehindChatRepository(chat_repo, chat_writer)
+    return AsyncChatService(
+        product_repository=CachedAsyncProductRepository(
+            AsyncSqlAlchemyProductRepository(read_db), catalog_cache
+        ),
+        chat_repository=chat_repo,
+        gemini_service=llm_service,
+        product_index=product_index,
+        context_builder=context_builder,
+        query_engine=query_engine if settings.intent_fast_path else None,
+    )
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Exige el header X-Admin-Token igual a ADMIN_TOKEN"""
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Endpoints de administración deshabilitados")
+    # Se comparan bytes: compare_digest falla con str no ASCII. Starlette
+    # decodifica los headers como latin-1, así que eso recupera los bytes
+    if not x_admin_token or not hmac.compare_digest(
+        x_admin_token.encode("latin-1"), settings.admin_token.encode("utf-8")
+    ):
+        raise HTTPException(status_code=401, detail="X-Admin-Token inválido")
+
+
+def json_response(model: BaseModel) -> Response:
+    """
+    Serializa el DTO directamente a JSON con pydantic-core
+
+    Al retornar un Response, FastAPI no vuelve a validar el response_model
+    ni pasa por jsonable_encoder + json.dumps; el response_model del
+    endpoint se mantiene para la documentación
+    """
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+def catalog_response(
+    request: Request,
+    product_repo: IProductRepository,
+    build: Callable[[], BaseModel],
+) -> Response:
+    """
+    Respuesta del catálogo con ETag, 304 y cuerpos cacheados por versión
+
+    El ETag se calcula con una versión barata del catálogo (la que suben
+    los triggers de `products` en cada escritura, releída como mucho una
+    vez por TTL), de modo que un `If-None-Match` vigente o un cuerpo ya
+    cacheado no cargan el catálogo. `build` solo se llama si falta el cuerpo
+    """
+    if http_cache is None or not isinstance(product_repo, CachedProductRepository):
+        return json_response(build())
+
+    version = product_repo.version()
+    key = cache_key(request.url.path, request.query_params.multi_items())
+    etag = http_cache.etag_for(version, key)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        http_cache.record_not_modified()
+        return Response(status_code=304, headers=headers)
+
+    entry = http_cache.get(version, key)
+    if entry is None:
+        entry = http_cache.put(version, key, build().model_dump_json().encode("utf-8"))
+    body, encoding = http_cache.encoded_body(entry, request.headers.get("accept-encoding", ""))
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _sse(event: str, data: dict) -> str:
+    """Formatea un evento Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+# Evita que proxies (nginx) acumulen la respuesta antes de enviarla
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
 @app.get("/health", tags=["Health"])
 def health_check() -> dict:
     """Endpoint simple para verificar que la API esta viva"""
     return {"status": "ok"}
 
 
-@app.get("/products", response_model=list[ProductDTO], tags=["Productos"])
-def list_products(service: ProductService = Depends(get_product_service)):
-    """Lista todos los productos del catalogo."""
-    return service.list_products()
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+def metrics() -> Response:
+    """Métricas en formato de texto de Prometheus"""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Métricas deshabilitadas")
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/ready", tags=["Health"])
+def readiness() -> Response:
+    """
+    Indica si la app terminó de calentar sus cachés (503 mientras tanto)
+
+    Incluye la duración de cada fase del arranque
+    """
+    report = startup.report()
+    return Response(
+        content=json.dumps(report),
+        media_type="application/json",
+        status_code=200 if report["ready"] else 503,
+    )
+
+
+@app.get("/health/catalog", tags=["Health"])
+def catalog_health() -> dict:
+    """Generación de la caché del catálogo y estado de la caché HTTP de /products"""
+    status = {"generation": catalog_cache.generation}
+    if http_cache is not None:
+        status["http_cache"] = http_cache.stats()
+    return status
+
+
+@app.get("/health/llm", tags=["Health"])
+def llm_health(deep: bool = Query(False, description="Verificar conexión con el proveedor")) -> dict:
+    """Estado del proveedor de LLM activo, de la caché de respuestas y del armado de prompts"""
+    status = llm_provider.health(deep=deep)
+    status["prompt_builder"] = llm_service.prompt_builder.stats()
+    status["query_engine"] = query_engine.stats()
+    if response_cache is not None:
+        status["response_cache"] = response_cache.stats()
+    if single_flight is not None:
+        status["single_flight"] = single_flight.stats()
+    if admission is not None:
+        status["admission"] = admission.stats()
+    if isinstance(llm_provider, ResilientProvider):
+        status["resilience"] = llm_provider.stats()
+    return status
+
+
+@app.get("/products", response_model=ProductPageDTO, tags=["Productos"])
+def list_products(
+    request: Request,
+    brand: Optional[List[str]] = Query(None, description="Marcas (se puede repetir)"),
+    category: Optional[List[str]] = Query(None, description="Categorias (se puede repetir)"),
+    size: Optional[List[str]] = Query(None, description="Tallas (se puede repetir)"),
+    color: Optional[List[str]] = Query(None, description="Colores (se puede repetir)"),
+    min_price: Optional[float] = Query(None, ge=0, description="Precio minimo"),
+    max_price: Optional[float] = Query(None, ge=0, description="Precio maximo"),
+    in_stock: bool = Query(False, description="Solo productos con stock"),
+    sort: Literal["id", "name", "price_asc", "price_desc"] = Query("id", description="Orden"),
+    limit: int = Query(50, ge=1, le=500, description="Productos por página"),
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    facets: bool = Query(False, description="Incluir conteos por faceta y total"),
+    service: ProductService = Depends(get_product_service),
+    product_repo: IProductRepository = Depends(get_product_repository),
+):
+    """Lista los productos del catalogo con filtros, orden, paginación por cursor y facetas."""
+    query = ProductQuery(
+        brands=brand or [],
+        categories=category or [],
+        sizes=size or [],
+        colors=color or [],
+        min_price=min_price,
+        max_price=max_price,
+        in_stock=in_stock,
+        sort=sort,
+        limit=limit,
+        with_facets=facets,
+    )
+
+    # El cursor se valida antes del chequeo condicional: uno inválido es 400,
+    # no 304
+    if cursor:
+        try:
+            decode_cursor(sort, cursor)
+        except InvalidCursorError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+
+    return catalog_response(request, product_repo, lambda: service.search_products(query, cursor=cursor))
 
 
 @app.get(
@@ -79,32 +575,153 @@ def list_products(service: ProductService = Depends(get_product_service)):
 )
 def get_product(
     product_id: int,
+    request: Request,
     service: ProductService = Depends(get_product_service),
+    product_repo: IProductRepository = Depends(get_product_repository),
 ):
     """Obtiene los detalles de un producto especifico."""
+    # El 404 se resuelve antes del chequeo condicional: `If-None-Match: *`
+    # no debe responder 304 para un producto que no existe
     try:
-        return service.get_product(product_id)
+        product = service.get_product(product_id)
     except ProductNotFoundError as exc:
         raise HTTPException(status_code=404, detail=str(exc))
 
+    return catalog_response(request, product_repo, lambda: product)
 
-@app.post("/chat", response_model=ChatResponseDTO, tags=["Chat"])
-def chat(
-    request: ChatRequestDTO,
-    service: ChatService = Depends(get_chat_service),
-):
-    """Procesa un mensaje de chat y devuelve la respuesta de la IA"""
-    return service.process_message(request)
 
+@app.post("/admin/catalog/import", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def import_catalog(
+    request: Request,
+    format: Optional[str] = Query(None, description="csv o jsonl (por defecto según el content-type)"),
+) -> dict:
+    """
+    Importa productos desde el cuerpo de la request (CSV con encabezado o JSONL)
 
-@app.get(
-    "/chat/history/{session_id}",
-    response_model=ChatHistoryDTO,
-    tags=["Chat"],
-)
-def chat_history(
-    session_id: str,
-    service: ChatService = Depends(get_chat_service),
-):
-    """Obtiene el historial de conversación de una sesión"""
-    return service.get_history(session_id)
+    El cuerpo se recibe por partes en un archivo temporal (en memoria hasta
+    8 MB), con un máximo de IMPORT_MAX_BYTES (413 si se excede), y se
+    importa en lotes en el threadpool. Retorna el reporte con filas
+    importadas, rechazadas y throughput
+    """
+    fmt = format or detect_format("", request.headers.get("content-type", ""))
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato no soportado: {fmt}")
+    too_large = HTTPException(status_code=413, detail=f"El archivo supera {settings.import_max_bytes} bytes")
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > settings.import_max_bytes:
+        raise too_large
+
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > settings.import_max_bytes:
+                raise too_large
+            spool.write(chunk)
+        spool.seek(0)
+        stream = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+        importer = CatalogImporter(
+            engine,
+            batch_size=settings.import_batch_size,
+            commit_rows=settings.import_commit_rows,
+        )
+        try:
+            report = await run_in_threadpool(importer.run, stream, fmt)
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise HTTPException(status_code=400, detail=f"Archivo ilegible: {exc}")
+        finally:
+            catalog_cache.invalidate(dirty=True)
+            stream.detach()
+    return report.to_dict()
+
+
+@app.get("/admin/profiles", tags=["Admin"], dependencies=[Depends(require_admin)])
+def list_profiles() -> dict:
+    """Perfiles capturados, del más nuevo al más viejo"""
+    return {"profiles": profile_store.list()}
+
+
+@app.get("/admin/profiles/{name}", tags=["Admin"], dependencies=[Depends(require_admin)])
+def download_profile(name: str) -> FileResponse:
+    """Descarga un perfil en formato collapsed stacks (flamegraph.pl, speedscope)"""
+    path = profile_store.path_for(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Perfil {name} no encontrado")
+    return FileResponse(path, media_type="text/plain", filename=f"{name}.collapsed")
+
+
+if settings.async_mode:
+
+    @app.post("/chat", response_model=ChatResponseDTO, tags=["Chat"])
+    async def chat(
+        request: ChatRequestDTO,
+        service: AsyncChatService = Depends(get_async_chat_service),
+    ):
+        """Procesa un mensaje de chat y devuelve la respuesta de la IA"""
+        return await service.process_message(request)
+
+    @app.post("/chat/stream", tags=["Chat"])
+    async def chat_stream(
+        request: ChatRequestDTO,
+        service: AsyncChatService = Depends(get_async_chat_service),
+    ):
+        """Procesa un mensaje y transmite la respuesta como Server-Sent Events"""
+
+        async def events():
+            async for event, data in service.stream_message(request):
+                yield _sse(event, data)
+
+        return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    @app.get(
+        "/chat/history/{session_id}",
+        response_model=ChatHistoryDTO,
+        tags=["Chat"],
+    )
+    async def chat_history(
+        session_id: str,
+        limit: int = Query(100, ge=1, le=500, description="Mensajes por página"),
+        before: Optional[int] = Query(None, description="Id de mensaje: trae los anteriores"),
+        after: Optional[int] = Query(None, description="Id de mensaje: trae los posteriores"),
+        service: AsyncChatService = Depends(get_async_chat_service),
+    ):
+        """Obtiene el historial de conversación de una sesión, paginado por cursor"""
+        return json_response(
+            await service.get_history(session_id, limit=limit, before=before, after=after)
+        )
+
+else:
+
+    @app.post("/chat", response_model=ChatResponseDTO, tags=["Chat"])
+    def chat(
+        request: ChatRequestDTO,
+        service: ChatService = Depends(get_chat_service),
+    ):
+        """Procesa un mensaje de chat y devuelve la respuesta de la IA"""
+        return service.process_message(request)
+
+    @app.post("/chat/stream", tags=["Chat"])
+    def chat_stream(
+        request: ChatRequestDTO,
+        service: ChatService = Depends(get_chat_service),
+    ):
+        """Procesa un mensaje y transmite la respuesta como Server-Sent Events"""
+        events = (_sse(event, data) for event, data in service.stream_message(request))
+        return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+    @app.get(
+        "/chat/history/{session_id}",
+        response_model=ChatHistoryDTO,
+        tags=["Chat"],
+    )
+    def chat_history(
+        session_id: str,
+        limit: int = Query(100, ge=1, le=500, description="Mensajes por página"),
+        before: Optional[int] = Query(None, description="Id de mensaje: trae los anteriores"),
+        after: Optional[int] = Query(None, description="Id de mensaje: trae los posteriores"),
+        service: ChatService = Depends(get_chat_service),
+    ):
+        """Obtiene el historial de conversación de una sesión, paginado por cursor"""
+        return json_response(
+            service.get_history(session_id, limit=limit, before=before, after=after)
+        )
@@ -0,0 +1,146 @@
+"""
+Middleware ASGI de métricas y log estructurado de tiempos
+
+Mide cada request HTTP con la plantilla de la ruta (no la URL, para no
+crear una serie por id o sesión), registra las consultas SQL que hizo y,
+si está habilitado, deja una línea JSON en el log con la duración total,
+las etapas del chat y el tiempo en la base de datos. Las sentencias SQL que
+se repiten dentro de una misma request (patrón N+1) se avisan en el log, y
+fuera de producción la respuesta lleva la cantidad y el tiempo de las
+consultas en headers
+
+Es un middleware ASGI puro (no BaseHTTPMiddleware): no agrega tareas ni
+copia el cuerpo, y en respuestas por streaming mide hasta el último
+fragmento
+"""
+
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, MutableMapping
+
+from src.infrastructure.observability.metrics import (
+    DB_QUERIES_PER_REQUEST,
+    DB_REPEATED_STATEMENTS,
+    HTTP_REQUEST_SECONDS,
+    compact_sql,
+    end_request,
+    start_request,
+)
+
+logger = logging.getLogger(__name__)
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+
+class MetricsMiddleware:
+    """
+    Args:
+        app: Aplicación ASGI envuelta
+        timing_log: Escribir una línea JSON por request en el log
+        timing_log_min_ms: Solo loguear requests que tarden al menos esto
+        excluded_paths: Rutas que no se miden (p. ej. el propio /metrics)
+        db_headers: Agregar X-DB-Queries y X-DB-Time-ms a la respuesta
+        n_plus_one_threshold: Ejecuciones de una misma sentencia en una
+            request a partir de las cuales se avisa (0 = no avisar)
+    """
+
+    def __init__(
+        self,
+        app,
+        timing_log: bool = True,
+        timing_log_min_ms: float = 0.0,
+        excluded_paths: tuple = ("/metrics",),
+        db_headers: bool = False,
+        n_plus_one_threshold: int = 0,
+    ) -> None:
+        self.app = app
+        self._timing_log = timing_log
+        self._min_seconds = timing_log_min_ms / 1000.0
+        self._excluded = frozenset(excluded_paths)
+        self._db_headers = db_headers
+        self._n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self._excluded:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        request_metrics, token = start_request()
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self._db_headers:
+                    # En streaming solo cuenta las consultas previas al primer fragmento
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"x-db-queries", str(request_metrics.db_queries).encode("latin-1")),
+                        (b"x-db-time-ms", f"{request_metrics.db_seconds * 1000.0:.2f}".encode("latin-1")),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            end_request(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route_path, str(status)).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(route_path).observe(request_metrics.db_queries)
+            repeated = request_metrics.repeated_statements(self._n_plus_one_threshold)
+            if repeated:
+                self._warn_repeated(scope["method"], route_path, repeated)
+            if self._timing_log and elapsed >= self._min_seconds and logger.isEnabledFor(logging.INFO):
+                record: Dict[str, Any] = {
+                    "event": "request",
+                    "method": scope["method"],
+                    "route": route_path,
+                    "status": status,
+                    "duration_ms": round(elapsed * 1000.0, 2),
+                    "db_queries": request_metrics.db_queries,
+                    "db_ms": round(request_metrics.db_seconds * 1000.0, 2),
+                }
+                if repeated:
+                    record["db_repeated"] = len(repeated)
+                if request_metrics.stages:
+                    record["stages_ms"] = {
+                        name: round(seconds * 1000.0, 2) for name, seconds in request_metrics.stages.items()
+                    }
+                logger.info(json.dumps(record, separators=(",", ":")))
+
+    @staticmethod
+    def _warn_repeated(method: str, route_path: str, repeated) -> None:
+        """Avisa las sentencias que se repitieron en la request (posible N+1)"""
+        DB_REPEATED_STATEMENTS.labels(route_path).inc(len(repeated))
+        for statement, count in repeated:
+            record = {
+                "event": "repeated_query",
+                "method": method,
+                "route": route_path,
+                "count": count,
+                "statement": compact_sql(statement),
+            }
+            logger.warning(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+
+
+def configure_timing_log() -> None:
+    """
+    Envía el log de tiempos a stderr (una línea JSON por request)
+
+    Si la aplicación ya configuró handlers para este logger no se toca
+    """
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
@@ -0,0 +1,136 @@
+"""
+Integración del perfilador por muestreo con la API
+
+`ProfilingMiddleware` decide qué requests se perfilan: a pedido (header
+`X-Profile: 1` o `?profile=1` junto con un `X-Admin-Token` válido) o 1 de
+cada N si está configurado el muestreo. `ProfiledRoute` registra el hilo
+del threadpool que ejecuta un endpoint síncrono, para que sus pilas
+también entren en el perfil
+"""
+
+import functools
+import hmac
+import inspect
+import threading
+import time
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qsl
+
+import anyio
+from fastapi.routing import APIRoute
+
+from src.infrastructure.api.middleware import Message, Receive, Scope, Send
+from src.infrastructure.observability.profiling import (
+    RequestProfile,
+    RequestProfiler,
+    current_profile,
+    reset_current_profile,
+    set_current_profile,
+)
+
+_TRUE = {"1", "true", "yes"}
+
+
+def _track_thread(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Envuelve un endpoint síncrono para que su hilo se muestree"""
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        profile = current_profile()
+        if profile is None:
+            return func(*args, **kwargs)
+        thread_id = threading.get_ident()
+        profile.add_thread(thread_id)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.remove_thread(thread_id)
+
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """Ruta que incluye en el perfil el hilo de los endpoints síncronos"""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        if not inspect.iscoroutinefunction(endpoint) and not inspect.isasyncgenfunction(endpoint):
+            endpoint = _track_thread(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+class ProfilingMiddleware:
+    """
+    Args:
+        app: Aplicación ASGI envuelta
+        profiler: Decide el muestreo y guarda los perfiles
+        admin_token: Token exigido para perfilar a pedido (vacío = deshabilitado)
+        interval_ms: Intervalo de muestreo, se guarda junto al perfil
+    """
+
+    def __init__(self, app, profiler: RequestProfiler, admin_token: str = "", interval_ms: float = 5.0) -> None:
+        self.app = app
+        self._profiler = profiler
+        self._admin_token = admin_token
+        self._interval_ms = interval_ms
+
+    def _requested(self, scope: Scope) -> bool:
+        """True si la request pide un perfil y trae un token de admin válido"""
+        if not self._admin_token:
+            return False
+        headers = dict(scope.get("headers") or ())
+        flag = headers.get(b"x-profile", b"").decode("latin-1")
+        if flag.lower() not in _TRUE:
+            query = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))
+            if query.get("profile", "").lower() not in _TRUE:
+                return False
+        # Bytes crudos: compare_digest falla con str no ASCII
+        token = headers.get(b"x-admin-token", b"")
+        return bool(token) and hmac.compare_digest(token, self._admin_token.encode("utf-8"))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trigger: Optional[str] = None
+        if self._requested(scope):
+            trigger = "on_demand"
+        elif self._profiler.should_sample():
+            trigger = "sampled"
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        store = self._profiler.store
+        sampler = self._profiler.sampler
+        name = store.new_name(scope["method"], scope["path"])
+        profile = RequestProfile(trigger)
+        profile.add_thread(threading.get_ident())
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", name.encode("latin-1"))]
+            await send(message)
+
+        token = set_current_profile(profile)
+        started = time.perf_counter()
+        sampler.start(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop(profile)
+            elapsed = time.perf_counter() - started
+            reset_current_profile(token)
+            route = scope.get("route")
+            meta = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(route, "path", None) or "unmatched",
+                "status": status,
+                "duration_ms": round(elapsed * 1000.0, 2),
+                "interval_ms": self._interval_ms,
+            }
+            await anyio.to_thread.run_sync(store.save, name, profile, meta)
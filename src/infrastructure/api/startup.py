@@ -0,0 +1,85 @@
+"""
+Seguimiento del arranque de la app
+
+Registra cuánto tarda cada fase (import, esquema, carga del catálogo,
+índices, proveedor de LLM) y si la app ya está lista para recibir tráfico,
+para exponerlo en /ready y en los logs
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTracker:
+    """
+    Fases del arranque y estado de preparación
+
+    Args:
+        started_at: `time.perf_counter()` del inicio del arranque (p. ej. al
+            comenzar a importar el módulo de la app)
+    """
+
+    def __init__(self, started_at: Optional[float] = None) -> None:
+        self._started_at = time.perf_counter() if started_at is None else started_at
+        self._phases: Dict[str, float] = {}
+        self._ready = threading.Event()
+        self._ready_ms: Optional[float] = None
+        self._error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """True cuando terminó el calentamiento"""
+        return self._ready.is_set()
+
+    def record(self, name: str, elapsed_ms: float) -> None:
+        """Registra la duración de una fase medida por fuera"""
+        with self._lock:
+            self._phases[name] = round(elapsed_ms, 1)
+
+    def mark(self, name: str) -> None:
+        """Registra una fase que va desde el inicio del arranque hasta ahora"""
+        self.record(name, (time.perf_counter() - self._started_at) * 1000.0)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Mide el bloque como una fase del arranque"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000.0)
+
+    def mark_ready(self) -> None:
+        """Marca la app como lista y deja el resumen en el log"""
+        with self._lock:
+            self._ready_ms = round((time.perf_counter() - self._started_at) * 1000.0, 1)
+        self._ready.set()
+        logger.info("[Startup] lista en %.1f ms; fases (ms): %s", self._ready_ms, self._phases)
+
+    def fail(self, error: BaseException) -> None:
+        """Registra un error del calentamiento (la app no pasa a lista)"""
+        with self._lock:
+            self._error = repr(error)
+        logger.error("[Startup] falló el calentamiento: %r", error)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que la app esté lista; False si venció el timeout"""
+        return self._ready.wait(timeout)
+
+    def report(self) -> Dict[str, Any]:
+        """Estado, fases medidas y tiempo total hasta estar lista"""
+        with self._lock:
+            report: Dict[str, Any] = {
+                "ready": self._ready.is_set(),
+                "phases_ms": dict(self._phases),
+                "time_to_ready_ms": self._ready_ms,
+            }
+            if self._error is not None:
+                report["error"] = self._error
+        return report
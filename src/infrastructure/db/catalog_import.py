@@ -0,0 +1,385 @@
+"""
+Importación masiva del catálogo desde archivos CSV o JSONL
+
+El archivo se lee como flujo, fila por fila, de modo que la memoria usada
+no depende de su tamaño. Cada fila se valida con las reglas de la entidad
+Product y las válidas se escriben en lotes con INSERT ... ON CONFLICT de
+SQLAlchemy Core (executemany), confirmando cada varios lotes en lugar de
+hacer una transacción por producto
+
+En una carga inicial (tabla vacía) los índices secundarios de products se
+eliminan antes de escribir y se recrean al final: construir un índice una
+vez es mucho más barato que mantenerlo fila por fila. Esa carga va en una
+sola transacción con el DDL, así que una caída a mitad no deja la tabla
+sin índices
+
+Uso:
+    python -m src.infrastructure.db.catalog_import catalogo.csv
+    python -m src.infrastructure.db.catalog_import - --format jsonl < catalogo.jsonl
+"""
+
+import argparse
+import csv
+import json
+import math
+import operator
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from sqlalchemy import Index, func, insert, select
+from sqlalchemy.engine import Connection, Engine
+
+from src.domain.entities import Product
+from .models import ProductModel
+
+FORMATS = ("csv", "jsonl")
+REQUIRED_FIELDS = ("name", "brand", "category", "size", "color", "price", "stock")
+_UPDATABLE = ("name", "brand", "category", "size", "color", "price", "stock", "description")
+
+
+@dataclass
+class ImportReport:
+    """
+    Resultado de una importación
+
+    Attributes:
+        format: Formato leído
+        rows_read: Filas leídas (sin contar el encabezado CSV)
+        imported: Filas válidas escritas (insertadas o actualizadas)
+        rejected: Filas descartadas por datos inválidos
+        errors: Primeras filas rechazadas con su motivo (`line`, `error`)
+        batches: Lotes enviados a la base de datos
+        deferred_indexes: Si los índices se recrearon al final de la carga
+        elapsed_s: Duración total en segundos
+        rows_per_s: Filas leídas por segundo
+    """
+
+    format: str
+    rows_read: int = 0
+    imported: int = 0
+    rejected: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    batches: int = 0
+    deferred_indexes: bool = False
+    elapsed_s: float = 0.0
+    rows_per_s: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def detect_format(filename: str, content_type: str = "") -> str:
+    """Deduce el formato por la extensión o el content-type (por defecto CSV)"""
+    lowered = filename.lower()
+    if lowered.endswith((".jsonl", ".ndjson")) or "ndjson" in content_type or "jsonl" in content_type:
+        return "jsonl"
+    return "csv"
+
+
+def iter_rows(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Recorre el archivo como flujo y produce `(línea, fila cruda)`
+
+    En JSONL una línea que no es JSON válido produce la excepción como
+    fila, para que se reporte como rechazada sin cortar la importación
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "jsonl":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, e
+    else:
+        raise ValueError(f"Formato de importación no soportado: {fmt!r}")
+
+
+def _parse_price(value: Any) -> float:
+    """Precio como float finito (rechaza nan e inf)"""
+    price = float(value)
+    if not math.isfinite(price):
+        raise ValueError(f"El precio debe ser un número finito: {value!r}")
+    return price
+
+
+def _parse_integer(value: Any, field_name: str) -> int:
+    """Entero estricto; un 3.5 o un true de JSON se rechazan en lugar de truncarse"""
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"El {field_name} debe ser un entero: {value!r}")
+    return int(value)
+
+
+def parse_product_row(raw: Any) -> Product:
+    """
+    Valida una fila y la convierte en un Product
+
+    Raises:
+        ValueError: Si faltan campos, los tipos no son válidos o la fila
+            no cumple las reglas de Product
+    """
+    if isinstance(raw, Exception):
+        raise ValueError(f"JSON inválido: {raw}")
+    if not isinstance(raw, dict):
+        raise ValueError("La fila debe ser un objeto")
+    values = tuple(map(raw.get, REQUIRED_FIELDS))
+    if None in values or "" in values:
+        missing = [name for name, value in zip(REQUIRED_FIELDS, values) if value in (None, "")]
+        raise ValueError(f"Faltan campos: {', '.join(missing)}")
+
+    name, brand, category, size, color, price, stock = values
+    raw_id = raw.get("id")
+    try:
+        product = Product(
+            id=_parse_integer(raw_id, "id") if raw_id not in (None, "") else None,
+            name=str(name).strip(),
+            brand=str(brand).strip(),
+            category=str(category).strip(),
+            size=str(size).strip(),
+            color=str(color).strip(),
+            price=_parse_price(price),
+            stock=_parse_integer(stock, "stock"),
+            description=str(raw.get("description") or "").strip(),
+        )
+    except (TypeError, ValueError) as e:
+        raise ValueError(str(e)) from None
+    return product
+
+
+def _upsert_statement(dialect: str):
+    """INSERT ... ON CONFLICT (id) DO UPDATE para SQLite y PostgreSQL"""
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        # Otros motores: INSERT simple (un id repetido hace fallar el lote)
+        return insert(ProductModel)
+    stmt = dialect_insert(ProductModel)
+    return stmt.on_conflict_do_update(
+        index_elements=[ProductModel.id],
+        set_={name: stmt.excluded[name] for name in _UPDATABLE},
+    )
+
+
+# Lleva la secuencia de products.id al id máximo: los upserts con id
+# explícito no la avanzan y el siguiente alta sin id chocaría
+_PG_SYNC_ID_SEQUENCE = (
+    "SELECT setval(pg_get_serial_sequence('products', 'id'), "
+    "(SELECT max(id) FROM products))"
+)
+
+
+def sync_id_sequence(conn: Connection) -> None:
+    """Sincroniza la secuencia de ids tras escribir ids explícitos (solo PostgreSQL)"""
+    if conn.dialect.name == "postgresql":
+        conn.exec_driver_sql(_PG_SYNC_ID_SEQUENCE)
+
+
+class _BulkStatement:
+    """
+    Sentencia compilada una sola vez y ejecutada con executemany del driver
+
+    Evita que SQLAlchemy procese los parámetros fila por fila: cada
+    producto se convierte directamente en la tupla (o dict) que espera el
+    driver
+    """
+
+    def __init__(self, stmt, columns: Tuple[str, ...], engine: Engine) -> None:
+        compiled = stmt.compile(dialect=engine.dialect, column_keys=list(columns))
+        self.sql = str(compiled)
+        order = compiled.positiontup
+        self._keys = tuple(order) if order else None
+        self._getter = operator.attrgetter(*(self._keys or columns))
+        self._columns = columns
+
+    def execute(self, conn, products: List[Product]) -> None:
+        getter = self._getter
+        if self._keys is not None:
+            params: List[Any] = [getter(p) for p in products]
+        else:
+            columns = self._columns
+            params = [dict(zip(columns, getter(p))) for p in products]
+        conn.exec_driver_sql(self.sql, params)
+
+
+class CatalogImporter:
+    """
+    Importador por lotes del catálogo
+
+    Args:
+        engine: Engine de SQLAlchemy de destino
+        batch_size: Filas por executemany
+        commit_rows: Filas escritas entre cada COMMIT
+        max_errors: Filas rechazadas que se detallan en el reporte (el
+            conteo siempre es completo)
+        defer_indexes: Eliminar y recrear los índices secundarios; None
+            lo hace solo si la tabla está vacía. En ese caso toda la carga
+            va en una sola transacción junto con el DDL de los índices (es
+            transaccional en SQLite y PostgreSQL): si el proceso muere a
+            mitad, el rollback deja la tabla y sus índices como estaban
+    """
+
+    # Caché de páginas de SQLite durante la importación (KiB, negativo en PRAGMA)
+    _SQLITE_CACHE_KIB = 256 * 1024
+
+    def __init__(
+        self,
+        engine: Engine,
+        batch_size: int = 5000,
+        commit_rows: int = 100_000,
+        max_errors: int = 100,
+        defer_indexes: Optional[bool] = None,
+    ) -> None:
+        self._engine = engine
+        self._batch_size = max(batch_size, 1)
+        self._commit_rows = max(commit_rows, self._batch_size)
+        self._max_errors = max_errors
+        self._defer_indexes = defer_indexes
+
+    def run(self, stream: TextIO, fmt: str = "csv") -> ImportReport:
+        """Importa el flujo completo y retorna el reporte"""
+        report = ImportReport(format=fmt)
+        started = time.perf_counter()
+        upsert = _BulkStatement(_upsert_statement(self._engine.dialect.name), ("id",) + _UPDATABLE, self._engine)
+        plain_insert = _BulkStatement(insert(ProductModel), _UPDATABLE, self._engine)
+        sqlite = self._engine.dialect.name == "sqlite"
+        indexes = list(ProductModel.__table__.indexes)
+        with self._engine.connect() as conn:
+            defer = self._defer_indexes
+            if defer is None:
+                defer = conn.scalar(select(func.count()).select_from(ProductModel)) == 0
+            report.deferred_indexes = bool(defer and indexes)
+            if sqlite:
+                previous_cache = conn.exec_driver_sql("PRAGMA cache_size").scalar()
+                conn.exec_driver_sql(f"PRAGMA cache_size = -{self._SQLITE_CACHE_KIB}")
+            try:
+                if report.deferred_indexes:
+                    self._load_deferred(conn, fmt, stream, report, upsert, plain_insert, indexes, sqlite)
+                else:
+                    self._load(conn, fmt, stream, report, upsert, plain_insert, self._commit_rows)
+                    conn.commit()
+            finally:
+                if sqlite:
+                    conn.exec_driver_sql(f"PRAGMA cache_size = {int(previous_cache)}")
+
+        report.elapsed_s = round(time.perf_counter() - started, 3)
+        if report.elapsed_s > 0:
+            report.rows_per_s = round(report.rows_read / report.elapsed_s, 1)
+        return report
+
+    def _load_deferred(
+        self,
+        conn: Connection,
+        fmt: str,
+        stream: TextIO,
+        report: ImportReport,
+        upsert: _BulkStatement,
+        plain_insert: _BulkStatement,
+        indexes: List[Index],
+        sqlite: bool,
+    ) -> None:
+        """Quita los índices, carga y los recrea en una única transacción"""
+        conn.commit()
+        if sqlite:
+            # pysqlite no abre transacción antes del DDL: sin este BEGIN el
+            # DROP INDEX se confirmaría al instante
+            conn.exec_driver_sql("BEGIN")
+        try:
+            for index in indexes:
+                index.drop(conn, checkfirst=True)
+            self._load(conn, fmt, stream, report, upsert, plain_insert, None)
+            for index in indexes:
+                index.create(conn, checkfirst=True)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def _load(
+        self,
+        conn: Connection,
+        fmt: str,
+        stream: TextIO,
+        report: ImportReport,
+        upsert: _BulkStatement,
+        plain_insert: _BulkStatement,
+        commit_rows: Optional[int],
+    ) -> None:
+        """Escribe los lotes; con `commit_rows` confirma cada esa cantidad de filas"""
+        pending = 0
+        for batch in self._batches(iter_rows(stream, fmt), report):
+            # Con id: upsert (el último gana dentro del lote). Sin id: alta
+            with_id: Dict[int, Product] = {}
+            without_id: List[Product] = []
+            for product in batch:
+                if product.id is not None:
+                    with_id[product.id] = product
+                else:
+                    without_id.append(product)
+            if with_id:
+                upsert.execute(conn, list(with_id.values()))
+                sync_id_sequence(conn)
+            if without_id:
+                plain_insert.execute(conn, without_id)
+            report.batches += 1
+            report.imported += len(batch)
+            pending += len(batch)
+            if commit_rows is not None and pending >= commit_rows:
+                conn.commit()
+                pending = 0
+
+    def _batches(
+        self, rows: Iterable[Tuple[int, Any]], report: ImportReport
+    ) -> Iterator[List[Product]]:
+        batch: List[Product] = []
+        for line, raw in rows:
+            report.rows_read += 1
+            try:
+                batch.append(parse_product_row(raw))
+            except ValueError as e:
+                report.rejected += 1
+                if len(report.errors) < self._max_errors:
+                    report.errors.append({"line": line, "error": str(e)})
+                continue
+            if len(batch) >= self._batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada de línea de comandos; imprime el reporte en JSON"""
+    from src.config import get_settings
+    from .database import engine
+    from .init_data import init_db
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Importa productos desde CSV o JSONL")
+    parser.add_argument("path", help="Archivo a importar ('-' para stdin)")
+    parser.add_argument("--format", choices=FORMATS, help="Formato (por defecto según la extensión)")
+    parser.add_argument("--batch-size", type=int, default=settings.import_batch_size)
+    parser.add_argument("--commit-rows", type=int, default=settings.import_commit_rows)
+    args = parser.parse_args(argv)
+
+    init_db(seed=False)
+    fmt = args.format or detect_format(args.path)
+    importer = CatalogImporter(engine, batch_size=args.batch_size, commit_rows=args.commit_rows)
+    if args.path == "-":
+        report = importer.run(sys.stdin, fmt)
+    else:
+        with open(args.path, encoding="utf-8-sig", newline="") as stream:
+            report = importer.run(stream, fmt)
+    print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+    return 0 if report.imported or not report.rows_read else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
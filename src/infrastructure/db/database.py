@@ -1,10 +1,17 @@
 """
 Configuración de SQLAlchemy y sesión de base de datos
+
+El engine se arma según el perfil de la base de datos (ver engine_profiles).
+Si se configura DATABASE_READ_URL, las lecturas de los repositorios usan un
+segundo engine (réplica) y las escrituras siguen yendo al primario
 """
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from src.config import get_settings
+from src.infrastructure.observability.metrics import install_query_metrics
+from .engine_profiles import engine_options, install_sqlite_pragmas, resolve_profile, sqlite_pragmas
 
 settings = get_settings()
 
@@ -14,11 +21,25 @@ class Base(DeclarativeBase):
     pass
 
 
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {},
-)
+def build_engine(database_url: str) -> Engine:
+    """Crea un engine sincrónico con el perfil configurado"""
+    profile = resolve_profile(database_url, settings.db_profile)
+    new_engine = create_engine(database_url, **engine_options(profile, settings))
+    if profile == "sqlite":
+        install_sqlite_pragmas(new_engine, sqlite_pragmas(settings, database_url))
+    if settings.metrics_enabled:
+        install_query_metrics(
+            new_engine,
+            slow_query_ms=settings.slow_query_ms,
+            explain_slow_queries=settings.slow_query_explain,
+        )
+    return new_engine
+
+
+engine = build_engine(settings.database_url)
+read_engine = build_engine(settings.database_read_url) if settings.database_read_url else engine
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 
 def get_db():
@@ -33,3 +54,90 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def _get_replica_db():
+    """Sesión sobre la réplica de lectura"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Sin réplica, la sesión de lectura es la misma dependencia que get_db y
+# FastAPI reutiliza la sesión de la request
+get_read_db = _get_replica_db if read_engine is not engine else get_db
+
+
+def to_async_url(database_url: str) -> str:
+    """
+    Traduce la URL sincrónica al driver asíncrono equivalente
+
+    sqlite -> sqlite+aiosqlite, postgresql -> postgresql+asyncpg
+    """
+    if database_url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + database_url[len("sqlite:"):]
+    for prefix in ("postgresql://", "postgres://", "postgresql+psycopg2://"):
+        if database_url.startswith(prefix):
+            return "postgresql+asyncpg://" + database_url[len(prefix):]
+    return database_url
+
+
+_async_session_factories = {}
+
+
+def _build_async_session_factory(database_url: str):
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    profile = resolve_profile(database_url, settings.db_profile)
+    async_engine = create_async_engine(
+        to_async_url(database_url), **engine_options(profile, settings, is_async=True)
+    )
+    if profile == "sqlite":
+        install_sqlite_pragmas(async_engine.sync_engine, sqlite_pragmas(settings, database_url))
+    if settings.metrics_enabled:
+        install_query_metrics(
+            async_engine.sync_engine,
+            slow_query_ms=settings.slow_query_ms,
+            explain_slow_queries=settings.slow_query_explain,
+        )
+    return async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def get_async_session_factory(read: bool = False):
+    """
+    Crea (una sola vez) el engine asíncrono y su fábrica de sesiones
+
+    Se construye de forma perezosa para no exigir el driver asíncrono
+    cuando la API corre en modo sincrónico
+
+    Args:
+        read: True para la fábrica de la réplica de lectura (si no hay
+            réplica es la misma que la del primario)
+    """
+    url = settings.database_read_url if read and settings.database_read_url else settings.database_url
+    factory = _async_session_factories.get(url)
+    if factory is None:
+        factory = _async_session_factories[url] = _build_async_session_factory(url)
+    return factory
+
+
+async def get_async_db():
+    """
+    Dependencia de FastAPI para obtener una sesión asíncrona
+
+    Yields:
+        AsyncSession: Sesión asíncrona de SQLAlchemy
+    """
+    async with get_async_session_factory()() as db:
+        yield db
+
+
+async def _get_async_replica_db():
+    """Sesión asíncrona sobre la réplica de lectura"""
+    async with get_async_session_factory(read=True)() as db:
+        yield db
+
+
+get_async_read_db = _get_async_replica_db if settings.database_read_url else get_async_db
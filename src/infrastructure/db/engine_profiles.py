@@ -0,0 +1,92 @@
+"""
+Perfiles de configuración del engine de SQLAlchemy
+
+- sqlite: WAL, synchronous=NORMAL, busy_timeout, mmap y caché de páginas
+  aplicados al abrir cada conexión
+- postgresql: pool dimensionado (pool_size, max_overflow, timeout),
+  reciclado de conexiones y pre-ping
+- default: opciones de SQLAlchemy más pre-ping
+
+El perfil se elige con DB_PROFILE; 'auto' lo deduce de la URL
+"""
+
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.config import Settings
+
+PROFILES = ("sqlite", "postgresql", "default")
+
+
+def resolve_profile(database_url: str, profile: str = "auto") -> str:
+    """Perfil a usar para la URL ('auto' lo deduce del esquema)"""
+    if profile != "auto":
+        if profile not in PROFILES:
+            raise ValueError(f"Perfil de base de datos desconocido: {profile!r}")
+        return profile
+    scheme = database_url.split(":", 1)[0].split("+", 1)[0]
+    if scheme == "sqlite":
+        return "sqlite"
+    if scheme in {"postgresql", "postgres"}:
+        return "postgresql"
+    return "default"
+
+
+def is_sqlite_memory(database_url: str) -> bool:
+    """True para bases SQLite en memoria (no admiten WAL)"""
+    return database_url in {"sqlite://", "sqlite:///:memory:"} or "mode=memory" in database_url
+
+
+def engine_options(profile: str, settings: Settings, is_async: bool = False) -> Dict[str, Any]:
+    """Argumentos de create_engine / create_async_engine para el perfil"""
+    if profile == "sqlite":
+        if is_async:
+            return {}
+        return {
+            "connect_args": {
+                "check_same_thread": False,
+                "timeout": settings.sqlite_busy_timeout_ms / 1000.0,
+            }
+        }
+    if profile == "postgresql":
+        return {
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout_s,
+            "pool_recycle": settings.db_pool_recycle_s,
+            "pool_pre_ping": settings.db_pool_pre_ping,
+        }
+    return {"pool_pre_ping": settings.db_pool_pre_ping}
+
+
+def sqlite_pragmas(settings: Settings, database_url: str) -> Dict[str, Any]:
+    """PRAGMAs que se aplican a cada conexión SQLite nueva"""
+    pragmas: Dict[str, Any] = {"busy_timeout": settings.sqlite_busy_timeout_ms}
+    if settings.sqlite_wal and not is_sqlite_memory(database_url):
+        # En WAL, synchronous=NORMAL no arriesga la integridad: solo puede
+        # perder las últimas transacciones ante un corte de energía
+        pragmas["journal_mode"] = "WAL"
+        pragmas["synchronous"] = "NORMAL"
+    pragmas["mmap_size"] = settings.sqlite_mmap_size_mb * 1024 * 1024
+    pragmas["cache_size"] = -settings.sqlite_cache_size_mb * 1024
+    pragmas["temp_store"] = "MEMORY"
+    return pragmas
+
+
+def install_sqlite_pragmas(engine: Engine, pragmas: Dict[str, Any]) -> None:
+    """
+    Registra los PRAGMAs en el evento `connect` del engine
+
+    Para engines asíncronos se pasa `async_engine.sync_engine`
+    """
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, _record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
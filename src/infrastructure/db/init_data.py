@@ -1,17 +1,99 @@
 """
 Script para poblar la base de datos con productos de ejemplo
+
+La app llama a `ensure_initialized` desde su lifespan: el esquema y los
+datos de ejemplo se preparan una sola vez por proceso y, entre procesos
+(varios workers arrancando a la vez), bajo un lock de la base de datos
 """
 
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from .database import engine
+from .engine_profiles import is_sqlite_memory
 from .models import Base, ProductModel
 
+try:
+    import fcntl
+except ImportError:  # Windows: solo queda el lock del proceso
+    fcntl = None
+
+# Clave del advisory lock de PostgreSQL usado durante la inicialización
+_ADVISORY_LOCK_KEY = 0x45434F4D
+
+_init_lock = threading.Lock()
+_initialized = False
+
+
+def ensure_initialized() -> float:
+    """
+    Crea el esquema y carga los datos de ejemplo una sola vez
+
+    Las llamadas siguientes (o concurrentes, una vez terminada la primera)
+    no hacen nada
+
+    Returns:
+        float: Milisegundos que tomó la inicialización (0 si ya estaba hecha)
+    """
+    global _initialized
+    if _initialized:
+        return 0.0
+    with _init_lock:
+        if _initialized:
+            return 0.0
+        started = time.perf_counter()
+        with _process_lock():
+            init_db()
+        _initialized = True
+    return (time.perf_counter() - started) * 1000.0
+
 
-def init_db() -> None:
+@contextmanager
+def _process_lock() -> Iterator[None]:
+    """
+    Lock entre procesos durante la inicialización
+
+    PostgreSQL usa un advisory lock de sesión; SQLite en archivo, un flock
+    sobre `<archivo>.init.lock`. En otros casos alcanza con el lock del
+    proceso
+    """
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+                conn.commit()
+        return
+
+    path = engine.url.database if engine.dialect.name == "sqlite" else None
+    if fcntl is None or not path or is_sqlite_memory(str(engine.url)):
+        yield
+        return
+    with open(f"{path}.init.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def init_db(seed: bool = True) -> None:
     """
     Crea las tablas y carga algunos productos de ejemplo si la tabla está vacía
+
+    Args:
+        seed: False para solo crear el esquema (p. ej. antes de una importación)
     """
     Base.metadata.create_all(bind=engine)
+    _ensure_indexes()
+    if not seed:
+        return
     db = Session(bind=engine)
 
     if db.query(ProductModel).count() == 0:
@@ -53,5 +135,17 @@ def init_db() -> None:
     db.close()
 
 
+def _ensure_indexes() -> None:
+    """
+    Crea los índices declarados que falten en tablas ya existentes
+
+    create_all no agrega índices nuevos a tablas creadas previamente, asi que
+    las bases de datos existentes los reciben aqui
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
 if __name__ == "__main__":
     init_db()
@@ -2,9 +2,10 @@
 Modelos ORM de SQLAlchemy que representan las tablas de la base de datos
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index, event
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime, timezone
+from typing import Optional
 from .database import Base
 
 
@@ -12,6 +13,13 @@ class ProductModel(Base):
     """Modelo ORM para la tabla de productos"""
 
     __tablename__ = "products"
+    __table_args__ = (
+        # Índices compuestos para la búsqueda del catálogo: filtrar por marca
+        # o categoría y ordenar/paginar por (precio, id) sin ordenar en memoria
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_brand_price_id", "brand", "price", "id"),
+        Index("ix_products_category_price_id", "category", "price", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String, index=True)
@@ -24,10 +32,59 @@ class ProductModel(Base):
     description: Mapped[str] = mapped_column(String)
 
 
+class CatalogVersionModel(Base):
+    """
+    Fila única con la versión del catálogo
+
+    La suben triggers de la base de datos en cada alta, cambio o baja de
+    productos, incluidas las escrituras de otros procesos o de SQL directo
+    """
+
+    __tablename__ = "catalog_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+
+
+# DDL idempotente: fila inicial y triggers que suben la versión. SQLite solo
+# tiene triggers por fila; PostgreSQL usa uno por sentencia
+_CATALOG_VERSION_DDL = {
+    "sqlite": [
+        "INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0)",
+        *(
+            f"CREATE TRIGGER IF NOT EXISTS trg_products_version_{op.lower()} AFTER {op} ON products "
+            "BEGIN UPDATE catalog_version SET version = version + 1 WHERE id = 1; END"
+            for op in ("INSERT", "UPDATE", "DELETE")
+        ),
+    ],
+    "postgresql": [
+        "INSERT INTO catalog_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING",
+        "CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS trigger AS $$ "
+        "BEGIN UPDATE catalog_version SET version = version + 1 WHERE id = 1; RETURN NULL; END "
+        "$$ LANGUAGE plpgsql",
+        "DROP TRIGGER IF EXISTS trg_products_version ON products",
+        "CREATE TRIGGER trg_products_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON products "
+        "FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()",
+    ],
+}
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _install_catalog_version(_metadata, connection, **_kw) -> None:
+    """Crea la fila de versión y los triggers tras cada `create_all`"""
+    for statement in _CATALOG_VERSION_DDL.get(connection.dialect.name, ()):
+        connection.exec_driver_sql(statement)
+
+
 class ChatMessageModel(Base):
     """Modelo ORM para la tabla de historial de chat"""
 
     __tablename__ = "chat_memory"
+    __table_args__ = (
+        # Índice compuesto para leer el historial por cursor (keyset) sin
+        # recorrer toda la sesión
+        Index("ix_chat_memory_session_ts_id", "session_id", "timestamp", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     session_id: Mapped[str] = mapped_column(String, index=True)
@@ -36,3 +93,17 @@ class ChatMessageModel(Base):
     timestamp: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
     )
+
+
+class ChatSummaryModel(Base):
+    """Modelo ORM para el resumen acumulado de cada sesión de chat"""
+
+    __tablename__ = "chat_summary"
+
+    session_id: Mapped[str] = mapped_column(String, primary_key=True)
+    summary: Mapped[str] = mapped_column(String, default="")
+    covered_until_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    message_count: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
@@ -0,0 +1,140 @@
+"""
+Generadores de embeddings (vectores) para textos de productos y consultas
+
+Todos implementan IEmbedder, de modo que el índice vectorial puede usar
+un embedder local sin conexión o uno remoto (Gemini) indistintamente
+"""
+
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from src.infrastructure.search.text import tokenize
+
+# Léxico del dominio: une sinónimos en español e inglés en un término canónico
+# para que "zapatillas para correr" se acerque a la categoría "Running"
+DOMAIN_SYNONYMS: Dict[str, str] = {
+    "correr": "running",
+    "corredor": "running",
+    "corredores": "running",
+    "trotar": "running",
+    "runner": "running",
+    "maraton": "running",
+    "zapatilla": "sneaker",
+    "zapatillas": "sneaker",
+    "tenis": "sneaker",
+    "sneakers": "sneaker",
+    "deportivo": "sport",
+    "deportivos": "sport",
+    "diario": "casual",
+    "urbano": "casual",
+    "urbanos": "casual",
+    "clasico": "classic",
+    "clasicos": "classic",
+    "bota": "boot",
+    "botas": "boot",
+    "negro": "black",
+    "negros": "black",
+    "negra": "black",
+    "blanco": "white",
+    "blancos": "white",
+    "blanca": "white",
+    "azul": "blue",
+    "azules": "blue",
+    "rojo": "red",
+    "rojos": "red",
+    "roja": "red",
+    "gris": "grey",
+    "verde": "green",
+    "amortiguacion": "cushion",
+    "comodo": "comfort",
+    "comodos": "comfort",
+    "comodidad": "comfort",
+}
+
+
+class IEmbedder(ABC):
+    """Interface de un generador de embeddings de dimensión fija"""
+
+    dim: int
+    name: str
+
+    @abstractmethod
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Genera los embeddings de un lote de textos
+
+        Returns:
+            np.ndarray: Matriz float32 (len(texts), dim) con filas de norma 1
+        """
+        raise NotImplementedError
+
+
+class HashedNgramEmbedder(IEmbedder):
+    """
+    Embedder local basado en n-gramas de caracteres con hashing
+
+    Cada palabra (normalizada y con sinónimos del dominio) aporta sus
+    n-gramas de caracteres y la palabra completa a una posición del vector
+    elegida por hash (crc32, estable entre procesos). No requiere red ni
+    modelos externos
+    """
+
+    def __init__(self, dim: int = 512, ngram_range: Tuple[int, int] = (3, 4)) -> None:
+        self.dim = dim
+        self.name = f"hashed-ngram-{dim}-{ngram_range[0]}-{ngram_range[1]}"
+        self._ngram_range = ngram_range
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Genera los embeddings de un lote de textos"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                # El bit alto define el signo para reducir colisiones sesgadas
+                matrix[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def _features(self, text: str) -> List[str]:
+        features: List[str] = []
+        low, high = self._ngram_range
+        for token in tokenize(text):
+            token = DOMAIN_SYNONYMS.get(token, token)
+            features.append(f"w:{token}")
+            padded = f" {token} "
+            for n in range(low, high + 1):
+                features.extend(padded[i : i + n] for i in range(len(padded) - n + 1))
+        return features
+
+
+class GeminiEmbedder(IEmbedder):
+    """
+    Embedder remoto que usa el modelo de embeddings de Gemini
+
+    Requiere GEMINI_API_KEY y conexión; se usa cuando se quiere mayor
+    calidad semántica que la del embedder local
+    """
+
+    def __init__(self, model: str = "models/text-embedding-004", dim: int = 768) -> None:
+        import google.generativeai as genai
+        from src.config import get_settings
+
+        genai.configure(api_key=get_settings().gemini_api_key)
+        self._genai = genai
+        self._model = model
+        self.dim = dim
+        self.name = f"gemini-{model}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Genera los embeddings de un lote de textos con la API de Gemini"""
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        result = self._genai.embed_content(model=self._model, content=list(texts))
+        matrix = np.asarray(result["embedding"], dtype=np.float32).reshape(len(texts), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
@@ -0,0 +1,260 @@
+"""
+Índice vectorial de productos respaldado por NumPy
+
+Guarda los embeddings del catálogo en una matriz float32 contigua y
+resuelve las consultas con similitud coseno (producto punto entre vectores
+normalizados) y selección top-k con `argpartition`. La matriz se puede
+persistir en un archivo `.npy` que se abre con memory-map, de modo que los
+workers arrancan con el índice ya calculado
+"""
+
+import os
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.domain.entities import Product
+from src.infrastructure.search.base import IProductIndex
+from .embedders import IEmbedder
+
+
+def product_text(product: Product) -> str:
+    """Texto que representa a un producto para generar su embedding"""
+    return (
+        f"{product.name} {product.brand} {product.category} {product.color} "
+        f"talla {product.size} {product.description}"
+    )
+
+
+class VectorProductIndex(IProductIndex):
+    """
+    Índice de similitud coseno sobre embeddings de productos
+
+    Las filas de la matriz se indexan por `Product.id`. Cada fila guarda una
+    huella (crc32 del texto y del embedder) para re-embeber solo los
+    productos que cambiaron al sincronizar
+    """
+
+    def __init__(
+        self,
+        embedder: IEmbedder,
+        top_k: int = 5,
+        min_score: float = 0.0,
+        path: Optional[str] = None,
+    ) -> None:
+        self.top_k = top_k
+        self.min_score = min_score
+        self._embedder = embedder
+        self._path = path
+        self._matrix = np.zeros((0, embedder.dim), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._fingerprints = np.zeros(0, dtype=np.int64)
+        self._count = 0
+        self._row_of: Dict[int, int] = {}
+        self._products: Dict[int, Product] = {}
+        self._lock = threading.RLock()
+        if path:
+            self.load()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Vista de solo las filas ocupadas de la matriz"""
+        return self._matrix[: self._count]
+
+    def sync(self, products: Iterable[Product]) -> bool:
+        """
+        Sincroniza el índice con el catálogo
+
+        Los productos nuevos o modificados se embeben en un único lote; los
+        que ya no existen se eliminan. Si hubo cambios y hay ruta configurada
+        se persiste la matriz
+
+        Returns:
+            bool: True si hubo algún cambio
+        """
+        with self._lock:
+            products = list(products)
+            pending: List[Tuple[Product, int]] = []
+            for product in products:
+                self._products[product.id] = product
+                fingerprint = self._fingerprint(product)
+                row = self._row_of.get(product.id)
+                if row is None or self._fingerprints[row] != fingerprint:
+                    pending.append((product, fingerprint))
+
+            if pending:
+                self._upsert_many(pending)
+
+            current = {p.id for p in products}
+            stale = [pid for pid in self._row_of if pid not in current]
+            for product_id in stale:
+                self._delete_row(product_id)
+
+            changed = bool(pending or stale)
+            if changed and self._path:
+                self.save()
+            return changed
+
+    def upsert(self, products: Sequence[Product]) -> None:
+        """Agrega o actualiza productos (embebidos en un solo lote)"""
+        with self._lock:
+            for product in products:
+                self._products[product.id] = product
+            self._upsert_many([(p, self._fingerprint(p)) for p in products])
+
+    def delete(self, product_id: int) -> None:
+        """Elimina un producto del índice si existe"""
+        with self._lock:
+            self._delete_row(product_id)
+
+    def search(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        min_score: Optional[float] = None,
+    ) -> List[Tuple[Product, float]]:
+        """Retorna los productos más similares a la consulta"""
+        return self.search_batch([query], k=k, min_score=min_score)[0]
+
+    def search_batch(
+        self,
+        queries: Sequence[str],
+        k: Optional[int] = None,
+        min_score: Optional[float] = None,
+    ) -> List[List[Tuple[Product, float]]]:
+        """
+        Resuelve varias consultas con una sola multiplicación de matrices
+
+        Returns:
+            list[list[tuple[Product, float]]]: Por consulta, productos y
+            similitud coseno de mayor a menor
+        """
+        k = self.top_k if k is None else k
+        min_score = self.min_score if min_score is None else min_score
+        with self._lock:
+            n = self._count
+            if n == 0 or k <= 0 or not queries:
+                return [[] for _ in queries]
+
+            query_vectors = self._embedder.embed(queries)
+            scores = query_vectors @ self._matrix[:n].T
+            k = min(k, n)
+            if k < n:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            else:
+                top = np.broadcast_to(np.arange(n), scores.shape)
+
+            results: List[List[Tuple[Product, float]]] = []
+            for q, candidates in enumerate(top):
+                ordered = candidates[np.argsort(-scores[q, candidates])]
+                hits: List[Tuple[Product, float]] = []
+                for row in ordered:
+                    score = float(scores[q, row])
+                    product = self._products.get(int(self._ids[row]))
+                    if score > min_score and product is not None:
+                        hits.append((product, score))
+                results.append(hits)
+            return results
+
+    def save(self) -> None:
+        """Persiste la matriz y los ids en disco de forma atómica"""
+        if not self._path:
+            return
+        with self._lock:
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            meta = np.stack([self._ids[: self._count], self._fingerprints[: self._count]], axis=1)
+            self._atomic_save(self._path, np.ascontiguousarray(self._matrix[: self._count]))
+            self._atomic_save(self._meta_path(), meta)
+
+    def load(self) -> bool:
+        """
+        Carga la matriz persistida con memory-map (solo lectura)
+
+        La copia a memoria se hace recién en la primera modificación
+
+        Returns:
+            bool: True si se cargó un índice compatible
+        """
+        if not self._path or not os.path.exists(self._path) or not os.path.exists(self._meta_path()):
+            return False
+        with self._lock:
+            try:
+                matrix = np.load(self._path, mmap_mode="r")
+                meta = np.load(self._meta_path())
+            except (OSError, ValueError):
+                return False
+            if matrix.ndim != 2 or matrix.shape[1] != self._embedder.dim or len(meta) != len(matrix):
+                return False
+            self._matrix = matrix
+            self._ids = np.array(meta[:, 0], dtype=np.int64) if len(meta) else np.zeros(0, dtype=np.int64)
+            self._fingerprints = np.array(meta[:, 1], dtype=np.int64) if len(meta) else np.zeros(0, dtype=np.int64)
+            self._count = len(matrix)
+            self._row_of = {int(pid): row for row, pid in enumerate(self._ids)}
+            return True
+
+    def _fingerprint(self, product: Product) -> int:
+        key = f"{self._embedder.name}|{product_text(product)}"
+        return zlib.crc32(key.encode("utf-8"))
+
+    def _upsert_many(self, items: Sequence[Tuple[Product, int]]) -> None:
+        if not items:
+            return
+        vectors = self._embedder.embed([product_text(p) for p, _ in items])
+        self._ensure_capacity(self._count + len(items))
+        for (product, fingerprint), vector in zip(items, vectors):
+            row = self._row_of.get(product.id)
+            if row is None:
+                row = self._count
+                self._count += 1
+                self._row_of[product.id] = row
+                self._ids[row] = product.id
+            self._matrix[row] = vector
+            self._fingerprints[row] = fingerprint
+
+    def _delete_row(self, product_id: int) -> None:
+        row = self._row_of.pop(product_id, None)
+        self._products.pop(product_id, None)
+        if row is None:
+            return
+        self._ensure_capacity(self._count)
+        last = self._count - 1
+        if row != last:
+            # Se mueve la última fila al hueco para mantener la matriz compacta
+            self._matrix[row] = self._matrix[last]
+            self._ids[row] = self._ids[last]
+            self._fingerprints[row] = self._fingerprints[last]
+            self._row_of[int(self._ids[row])] = row
+        self._count = last
+
+    def _ensure_capacity(self, rows: int) -> None:
+        """Garantiza una matriz escribible con espacio para `rows` filas"""
+        capacity = len(self._matrix)
+        writable = self._matrix.flags.writeable and not isinstance(self._matrix, np.memmap)
+        if writable and rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2 if rows > capacity else capacity, 16)
+        matrix = np.zeros((new_capacity, self._embedder.dim), dtype=np.float32)
+        matrix[: self._count] = self._matrix[: self._count]
+        ids = np.zeros(new_capacity, dtype=np.int64)
+        ids[: self._count] = self._ids[: self._count]
+        fingerprints = np.zeros(new_capacity, dtype=np.int64)
+        fingerprints[: self._count] = self._fingerprints[: self._count]
+        self._matrix, self._ids, self._fingerprints = matrix, ids, fingerprints
+
+    def _meta_path(self) -> str:
+        base = self._path[:-4] if self._path.endswith(".npy") else self._path
+        return f"{base}.ids.npy"
+
+    @staticmethod
+    def _atomic_save(path: str, array: np.ndarray) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as fh:
+            np.save(fh, array)
+        os.replace(tmp_path, path)
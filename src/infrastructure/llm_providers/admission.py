@@ -0,0 +1,236 @@
+"""
+Control de admisión para las llamadas al LLM
+
+Limita cuántas llamadas al proveedor corren a la vez. Las que no consiguen
+lugar esperan en una cola acotada, en orden de llegada, con un plazo por
+request. Si la cola está llena, si el plazo vence esperando o si la espera
+estimada ya supera el plazo, la request se descarta de inmediato y el
+servicio responde con el fallback local en lugar de saturar al proveedor
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Deque, Dict, Iterator, Optional
+
+from src.infrastructure.observability.metrics import LLM_ADMISSION_SHED
+
+
+class AdmissionRejected(Exception):
+    """La request no fue admitida (cola llena o plazo vencido)"""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(f"Request descartada por control de admisión: {reason}")
+        self.reason = reason
+
+
+class _Waiter:
+    """Request esperando un lugar; el lugar se le entrega al liberarse otro"""
+
+    __slots__ = ("event", "future", "loop", "granted")
+
+    def __init__(
+        self,
+        event: Optional[threading.Event] = None,
+        future: Optional[asyncio.Future] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> None:
+        self.event = event
+        self.future = future
+        self.loop = loop
+        self.granted = False
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(True)
+
+
+class AdmissionController:
+    """
+    Semáforo con cola FIFO acotada y descarte por plazo
+
+    Sirve a la vez al camino con hilos y al camino con asyncio: los lugares
+    y la cola son compartidos, y al liberarse un lugar se entrega
+    directamente al primero de la cola (sin que compitan los que llegan)
+
+    Args:
+        max_concurrency: Llamadas simultáneas al proveedor
+        max_queue: Requests que pueden esperar lugar
+        deadline_ms: Plazo máximo de espera en la cola por request
+    """
+
+    _EWMA_ALPHA = 0.2
+    _WAIT_SAMPLES = 1024
+
+    def __init__(self, max_concurrency: int = 16, max_queue: int = 128, deadline_ms: float = 10_000.0) -> None:
+        self._limit = max(max_concurrency, 1)
+        self._max_queue = max(max_queue, 0)
+        self._deadline = deadline_ms / 1000.0
+        self._active = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+        self._service_ewma = 0.0
+        self._waits: Deque[float] = deque(maxlen=self._WAIT_SAMPLES)
+        self._max_wait = 0.0
+        self._stats = {
+            "admitted": 0,
+            "queued_total": 0,
+            "shed_queue_full": 0,
+            "shed_deadline": 0,
+            "shed_timeout": 0,
+        }
+
+    @contextmanager
+    def slot(self, deadline_ms: Optional[float] = None) -> Iterator[None]:
+        """
+        Ocupa un lugar durante el bloque
+
+        Raises:
+            AdmissionRejected: Si la request se descarta
+        """
+        self.acquire(deadline_ms)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    @asynccontextmanager
+    async def slot_async(self, deadline_ms: Optional[float] = None) -> AsyncIterator[None]:
+        """Versión asíncrona de `slot`; la espera no bloquea el event loop"""
+        await self.acquire_async(deadline_ms)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def acquire(self, deadline_ms: Optional[float] = None) -> None:
+        """Espera un lugar (bloqueando el hilo) hasta el plazo"""
+        enqueued = time.monotonic()
+        timeout = self._timeout(deadline_ms)
+        with self._lock:
+            if self._try_admit_now():
+                return
+            waiter = _Waiter(event=threading.Event())
+            self._enqueue(waiter, timeout)
+
+        waiter.event.wait(timeout)
+        with self._lock:
+            if waiter.granted:
+                self._record_admit(time.monotonic() - enqueued)
+                return
+            self._waiters.remove(waiter)
+            self._stats["shed_timeout"] += 1
+        LLM_ADMISSION_SHED.labels("timeout").inc()
+        raise AdmissionRejected("timeout")
+
+    async def acquire_async(self, deadline_ms: Optional[float] = None) -> None:
+        """Espera un lugar sin bloquear el event loop"""
+        enqueued = time.monotonic()
+        timeout = self._timeout(deadline_ms)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._try_admit_now():
+                return
+            waiter = _Waiter(future=loop.create_future(), loop=loop)
+            self._enqueue(waiter, timeout)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted:
+                self.release(0.0)
+            raise
+
+        with self._lock:
+            if waiter.granted:
+                self._record_admit(time.monotonic() - enqueued)
+                return
+            self._waiters.remove(waiter)
+            self._stats["shed_timeout"] += 1
+        LLM_ADMISSION_SHED.labels("timeout").inc()
+        raise AdmissionRejected("timeout")
+
+    def release(self, service_seconds: float) -> None:
+        """Libera un lugar entregándolo al primero de la cola, si hay"""
+        with self._lock:
+            if service_seconds > 0:
+                self._service_ewma += self._EWMA_ALPHA * (service_seconds - self._service_ewma)
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                if waiter.event is not None:
+                    waiter.event.set()
+                else:
+                    waiter.loop.call_soon_threadsafe(_resolve, waiter.future)
+                return
+            self._active -= 1
+
+    @property
+    def in_flight(self) -> int:
+        """Llamadas al proveedor en curso"""
+        return self._active
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests esperando lugar"""
+        return len(self._waiters)
+
+    def stats(self) -> Dict[str, float]:
+        """Lugares en uso, profundidad de la cola, descartes y tiempos de espera"""
+        with self._lock:
+            stats: Dict[str, float] = dict(self._stats)
+            stats["limit"] = self._limit
+            stats["active"] = self._active
+            stats["queue_depth"] = len(self._waiters)
+            stats["max_queue"] = self._max_queue
+            waits = sorted(self._waits)
+            stats["wait_ms_max"] = round(self._max_wait * 1000, 2)
+            stats["service_ms_ewma"] = round(self._service_ewma * 1000, 2)
+        if waits:
+            stats["wait_ms_avg"] = round(sum(waits) / len(waits) * 1000, 2)
+            stats["wait_ms_p95"] = round(waits[min(int(len(waits) * 0.95), len(waits) - 1)] * 1000, 2)
+        else:
+            stats["wait_ms_avg"] = stats["wait_ms_p95"] = 0.0
+        return stats
+
+    def _timeout(self, deadline_ms: Optional[float]) -> float:
+        return self._deadline if deadline_ms is None else deadline_ms / 1000.0
+
+    def _try_admit_now(self) -> bool:
+        """Con el lock tomado: ocupa un lugar libre si no hay nadie esperando"""
+        if self._active < self._limit and not self._waiters:
+            self._active += 1
+            self._record_admit(0.0)
+            return True
+        return False
+
+    def _enqueue(self, waiter: _Waiter, timeout: float) -> None:
+        """Con el lock tomado: encola o descarta por cola llena o plazo imposible"""
+        if len(self._waiters) >= self._max_queue:
+            self._stats["shed_queue_full"] += 1
+            LLM_ADMISSION_SHED.labels("queue_full").inc()
+            raise AdmissionRejected("queue_full")
+        # Espera estimada: turnos por delante repartidos entre los lugares
+        expected = (len(self._waiters) + 1) / self._limit * self._service_ewma
+        if expected > timeout:
+            self._stats["shed_deadline"] += 1
+            LLM_ADMISSION_SHED.labels("deadline").inc()
+            raise AdmissionRejected("deadline")
+        self._waiters.append(waiter)
+        self._stats["queued_total"] += 1
+
+    def _record_admit(self, waited: float) -> None:
+        self._stats["admitted"] += 1
+        self._waits.append(waited)
+        self._max_wait = max(self._max_wait, waited)
@@ -0,0 +1,53 @@
+"""
+Contrato común de los proveedores de LLM
+
+Un proveedor solo sabe convertir un prompt en texto; la construcción del
+prompt y el fallback local viven en GeminiService, que es proveedor-agnóstico
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, Iterator
+
+
+class ILLMProvider(ABC):
+    """
+    Interface de un proveedor de LLM de larga vida
+
+    Las implementaciones se crean una sola vez al iniciar la app y se
+    reutilizan entre requests. Ante cualquier error deben lanzar una
+    excepción: el servicio decide cuándo usar el fallback
+    """
+
+    name: str
+
+    @abstractmethod
+    def generate(self, prompt: str) -> str:
+        """Genera la respuesta completa para el prompt"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def generate_async(self, prompt: str) -> str:
+        """Versión asíncrona de `generate`"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Genera la respuesta como fragmentos de texto"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream_async(self, prompt: str) -> AsyncIterator[str]:
+        """Versión asíncrona de `stream`"""
+        raise NotImplementedError
+
+    def warm_up(self) -> None:
+        """Prepara clientes y conexiones antes de recibir tráfico"""
+
+    def health(self, deep: bool = False) -> Dict[str, Any]:
+        """
+        Estado del proveedor
+
+        Args:
+            deep: Si es True hace una llamada liviana al servicio remoto
+        """
+        return {"provider": self.name, "status": "ok"}
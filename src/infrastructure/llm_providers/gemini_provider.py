@@ -0,0 +1,152 @@
+"""
+Proveedor de LLM basado en Google Gemini
+
+Configura el SDK y crea el GenerativeModel una sola vez, de modo que el
+cliente (y su canal de conexión) se reutiliza entre requests. El SDK se
+importa recién en el primer uso (o en el calentamiento): importarlo cuesta
+más de un segundo y no debe pesar en el arranque de la app
+"""
+
+import logging
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from src.infrastructure.observability.metrics import LLM_ERRORS
+from .base import ILLMProvider
+
+logger = logging.getLogger(__name__)
+
+
+class GeminiProvider(ILLMProvider):
+    """
+    Proveedor que llama a la API de Gemini
+
+    Si el modelo no se puede crear queda en None y toda llamada falla, lo
+    que hace que el servicio use el fallback local
+    """
+
+    _UNSET = object()
+
+    name = "gemini"
+
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str = "gemini-1.5-flash",
+        timeout_s: float = 0.0,
+        stream_timeout_s: float = 0.0,
+    ) -> None:
+        self._api_key = api_key
+        self._model_name = model_name
+        # Timeout de la llamada HTTP en el SDK (0 = el del SDK). En los flujos
+        # el SDK lo aplica a toda la respuesta, así que se usa el plazo total
+        # del flujo; el timeout entre fragmentos lo pone ResilientProvider
+        self._request_options: Dict[str, Any] = {"timeout": timeout_s} if timeout_s > 0 else {}
+        self._stream_request_options: Dict[str, Any] = (
+            {"timeout": stream_timeout_s} if stream_timeout_s > 0 else {}
+        )
+        self._model: Any = self._UNSET
+        self._model_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """Si el SDK ya se importó y el modelo se intentó crear"""
+        return self._model is not self._UNSET
+
+    def _load_model(self) -> Optional[Any]:
+        """Importa el SDK y crea el modelo la primera vez (None si falla)"""
+        if self._model is not self._UNSET:
+            return self._model
+        with self._model_lock:
+            if self._model is self._UNSET:
+                try:
+                    import google.generativeai as genai
+
+                    genai.configure(api_key=self._api_key)
+                    self._model = genai.GenerativeModel(self._model_name)
+                except Exception as e:
+                    LLM_ERRORS.labels(self.name, type(e).__name__).inc()
+                    logger.warning("[GeminiProvider] Error al inicializar el modelo: %r", e)
+                    self._model = None
+        return self._model
+
+    def generate(self, prompt: str) -> str:
+        """Genera la respuesta completa con `generate_content`"""
+        result = self._require_model().generate_content(
+            prompt, request_options=self._request_options
+        )
+        return self._extract_text(result)
+
+    async def generate_async(self, prompt: str) -> str:
+        """Genera la respuesta con `generate_content_async`"""
+        result = await self._require_model().generate_content_async(
+            prompt, request_options=self._request_options
+        )
+        return self._extract_text(result)
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Genera la respuesta en modo streaming"""
+        response = self._require_model().generate_content(
+            prompt, stream=True, request_options=self._stream_request_options
+        )
+        for chunk in response:
+            text = getattr(chunk, "text", "")
+            if text:
+                yield text
+
+    async def stream_async(self, prompt: str) -> AsyncIterator[str]:
+        """Genera la respuesta en modo streaming asíncrono"""
+        response = await self._require_model().generate_content_async(
+            prompt, stream=True, request_options=self._stream_request_options
+        )
+        async for chunk in response:
+            text = getattr(chunk, "text", "")
+            if text:
+                yield text
+
+    def warm_up(self) -> None:
+        """
+        Abre el canal con el servicio usando una llamada barata
+
+        Importa el SDK y crea el modelo; sin API key no hay conexión que abrir
+        """
+        model = self._load_model()
+        if model is None or not self._api_key:
+            return
+        try:
+            model.count_tokens("ping")
+        except Exception as e:
+            LLM_ERRORS.labels(self.name, type(e).__name__).inc()
+            logger.warning("[GeminiProvider] Falló el calentamiento: %r", e)
+
+    def health(self, deep: bool = False) -> Dict[str, Any]:
+        """Estado del proveedor; con `deep` verifica la conexión contando tokens"""
+        status: Dict[str, Any] = {
+            "provider": self.name,
+            "model": self._model_name,
+            "configured": bool(self._api_key) and self._load_model() is not None,
+        }
+        status["status"] = "ok" if status["configured"] else "degraded"
+        if deep and status["configured"]:
+            try:
+                self._model.count_tokens("ping")
+            except Exception as e:
+                status["status"] = "error"
+                status["error"] = repr(e)
+        return status
+
+    def _require_model(self):
+        model = self._load_model()
+        if model is None:
+            raise RuntimeError("Modelo de Gemini no inicializado.")
+        return model
+
+    @staticmethod
+    def _extract_text(result) -> str:
+        """Obtiene el texto de la respuesta de Gemini o falla si viene vacio"""
+        text = getattr(result, "text", "").strip()
+
+        if text:
+            return text
+
+        raise RuntimeError("Respuesta vacía desde Gemini.")
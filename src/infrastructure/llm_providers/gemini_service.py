@@ -1,103 +1,438 @@
 """
-Integración con Google Gemini AI.
+Integración con el proveedor de IA (Google Gemini por defecto).
 
-Este módulo se encarga de construir el prompt y llamar a la API de Gemini.
+Este módulo se encarga de construir el prompt y llamar al proveedor de LLM.
 Si la llamada falla (por ejemplo, modelo no disponible o error de clave),
 se devuelve una respuesta generada localmente como fallback
 """
 
-from typing import List
+import asyncio
+import hashlib
+import logging
+import re
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 from src.domain.entities import Product, ChatContext
 from src.config import get_settings
-import google.generativeai as genai
+from src.infrastructure.observability.metrics import LLM_ERRORS, LLM_FALLBACKS, LLM_PROMPT_CHARS
+from src.infrastructure.repositories.cached_product_repository import catalog_fingerprint
+from src.infrastructure.search.query_engine import CatalogQueryEngine
+from .admission import AdmissionController, AdmissionRejected
+from .base import ILLMProvider
+from .prompt_builder import PromptBuilder
+from .resilience import CircuitOpenError
+from .response_cache import ResponseCache, make_cache_key
+from .single_flight import SingleFlight
+
+
+# Errores por los que no se llamó al proveedor (descarte por carga o
+# circuito abierto): se responde con el fallback sin registrar un error
+_NOT_CALLED_ERRORS = (AdmissionRejected, CircuitOpenError)
+
+logger = logging.getLogger(__name__)
+
+
+def _fallback_reason(error: BaseException) -> str:
+    """Etiqueta del motivo del fallback para las métricas"""
+    if isinstance(error, AdmissionRejected):
+        return "rejected"
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    return "error"
+
+
+@dataclass(frozen=True)
+class StreamChunk:
+    """
+    Fragmento de una respuesta en streaming
+
+    Attributes:
+        text: Texto del fragmento
+        reset: True si el cliente debe descartar lo recibido antes (el
+            proveedor falló a mitad de camino y se pasa al fallback)
+    """
+
+    text: str
+    reset: bool = False
+
+
+def split_into_chunks(text: str, words_per_chunk: int = 8) -> List[str]:
+    """Divide un texto en fragmentos de pocas palabras conservando los espacios"""
+    words = re.findall(r"\S+\s*", text)
+    return [
+        "".join(words[i : i + words_per_chunk])
+        for i in range(0, len(words), words_per_chunk)
+    ]
 
 
 class GeminiService:
     """
-    Servicio que encapsula la comunicación con Google Gemini.
+    Servicio que encapsula la comunicación con el proveedor de IA.
 
-    Se puede reemplazar por otro proveedor de IA sin afectar el dominio
-    ni la capa de aplicación
+    Construye el prompt, delega la llamada en un ILLMProvider (Gemini o el
+    proveedor local) y aplica el fallback. Es de larga vida: se crea una vez
+    al iniciar la app y se comparte entre requests
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        provider: Optional[ILLMProvider] = None,
+        response_cache: Optional[ResponseCache] = None,
+        single_flight: Optional[SingleFlight] = None,
+        prompt_builder: Optional[PromptBuilder] = None,
+        admission: Optional[AdmissionController] = None,
+        query_engine: Optional[CatalogQueryEngine] = None,
+    ) -> None:
         """
-        Inicializa la configuración del cliente de Gemini
-
-        Lee la API key desde la configuración y prepara el modelo
-        Si hubiera algún problema al crear el modelo, se mantiene en None
-        y se usará siempre el modo de fallback
+        Args:
+            provider: Proveedor a usar; si no se indica se crea uno de
+                Gemini con la configuración actual
+            response_cache: Caché de respuestas; solo se guardan respuestas
+                exitosas del proveedor, nunca el fallback
+            single_flight: Coalescencia de llamadas idénticas concurrentes
+            prompt_builder: Armador de prompts con el catálogo precompilado
+            admission: Control de admisión; las requests descartadas
+                reciben el fallback sin llamar al proveedor
+            query_engine: Motor de consultas locales; si está, el fallback
+                responde la consulta en lugar de listar productos al azar
         """
-        settings = get_settings()
-        genai.configure(api_key=settings.gemini_api_key)
+        if provider is None:
+            from .gemini_provider import GeminiProvider
 
-        try:
-            self._model = genai.GenerativeModel("gemini-1.5-flash")
-        except Exception as e:
-            print(f"[GeminiService] Error al inicializar el modelo: {e!r}")
-            self._model = None
+            settings = get_settings()
+            provider = GeminiProvider(
+                api_key=settings.gemini_api_key, model_name=settings.gemini_model
+            )
+        self._provider = provider
+        self._response_cache = response_cache
+        self._single_flight = single_flight
+        self._prompt_builder = prompt_builder or PromptBuilder()
+        self._admission = admission
+        self._query_engine = query_engine
+
+    @property
+    def provider(self) -> ILLMProvider:
+        """Proveedor de LLM en uso"""
+        return self._provider
+
+    @property
+    def response_cache(self) -> Optional[ResponseCache]:
+        """Caché de respuestas en uso, si hay"""
+        return self._response_cache
+
+    @property
+    def single_flight(self) -> Optional[SingleFlight]:
+        """Coalescedor de llamadas en uso, si hay"""
+        return self._single_flight
+
+    @property
+    def admission(self) -> Optional[AdmissionController]:
+        """Control de admisión en uso, si hay"""
+        return self._admission
+
+    @property
+    def prompt_builder(self) -> PromptBuilder:
+        """Armador de prompts en uso"""
+        return self._prompt_builder
 
     def generate_response(
         self,
         user_message: str,
         products: List[Product],
         chat_context: ChatContext,
+        use_cache: bool = True,
     ) -> str:
         """
-        Genera una respuesta usando Gemini a partir del mensaje del usuario,
+        Genera una respuesta usando el proveedor a partir del mensaje del usuario,
         los productos disponibles y el contexto conversacional
 
-        Si ocurre cualquier error al llamar a la API de Gemini, se devuelve
+        Si ocurre cualquier error al llamar al proveedor, se devuelve
         una respuesta generada localmente como fallback
 
         Args:
             user_message (str): Mensaje enviado por el usuario
             products (list[Product]): Lista de productos disponibles
             chat_context (ChatContext): Contexto reciente del chat
+            use_cache (bool): False para ignorar la caché de respuestas
 
         Returns:
             str: Texto de respuesta del asistente
         """
-        products_text = "\n".join(
-            f"- {p.name} | Marca: {p.brand} | Categoría: {p.category} | "
-            f"Talla: {p.size} | Color: {p.color} | Precio: {p.price} | Stock: {p.stock}"
-            for p in products
-        )
+        cache_key = self._cache_key(user_message, products, chat_context, use_cache)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
 
-        history_text = chat_context.format_for_prompt()
+        prompt = self._build_prompt(user_message, products, chat_context)
 
-        prompt = f"""
-Eres un asistente de ventas para una tienda de zapatos
+        # Intentar usar el proveedor
+        try:
+            text = self._call_provider(prompt, cache_key)
 
-Catálogo de productos:
-{products_text}
+        except Exception as e:
+            self._record_failure(e)
+            return self._build_fallback_response(user_message, products, chat_context)
 
-Historial reciente de la conversación:
-{history_text}
+        self._cache_set(cache_key, text)
+        return text
 
-Mensaje actual del usuario:
-Usuario: {user_message}
+    async def generate_response_async(
+        self,
+        user_message: str,
+        products: List[Product],
+        chat_context: ChatContext,
+        use_cache: bool = True,
+    ) -> str:
+        """
+        Versión asíncrona de `generate_response`
 
-Responde en un tono amable, profesional y conciso
-Solo recomienda productos del catálogo disponible
-"""
+        Usa la llamada asíncrona del proveedor, de modo que la espera de la
+        respuesta no ocupa un hilo del servidor. La caché de respuestas (que
+        puede leer SQLite) y el armado del prompt corren en un hilo
+        """
+        cache_key, cached, prompt = await asyncio.to_thread(
+            self._prepare_call, user_message, products, chat_context, use_cache
+        )
+        if cached is not None:
+            return cached
 
-        # Intentar usar Gemini
         try:
-            if self._model is None:
-                raise RuntimeError("Modelo de Gemini no inicializado.")
+            text = await self._call_provider_async(prompt, cache_key)
 
-            result = self._model.generate_content(prompt)
-            text = getattr(result, "text", "").strip()
+        except Exception as e:
+            self._record_failure(e)
+            return self._build_fallback_response(user_message, products, chat_context)
 
-            if text:
-                return text
+        await self._cache_set_async(cache_key, text)
+        return text
 
-            raise RuntimeError("Respuesta vacía desde Gemini.")
+    def stream_response(
+        self,
+        user_message: str,
+        products: List[Product],
+        chat_context: ChatContext,
+        use_cache: bool = True,
+    ) -> Iterator[StreamChunk]:
+        """
+        Genera la respuesta como un flujo de fragmentos
+
+        Usa el modo streaming del proveedor (`generate_content(stream=True)`
+        en Gemini). Si el proveedor falla (antes o a mitad del flujo) se
+        emite la respuesta de fallback por fragmentos, precedida de un
+        `reset` si ya se había enviado texto. Un acierto de caché se emite
+        por fragmentos igual que el fallback
+        """
+        cache_key = self._cache_key(user_message, products, chat_context, use_cache)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            for piece in split_into_chunks(cached):
+                yield StreamChunk(text=piece)
+            return
+
+        prompt = self._build_prompt(user_message, products, chat_context)
+        parts: List[str] = []
+        try:
+            for text in self._stream_provider(prompt):
+                parts.append(text)
+                yield StreamChunk(text=text)
+
+            if not parts:
+                raise RuntimeError("Respuesta vacía del proveedor.")
 
         except Exception as e:
-            print(f"[GeminiService] Error al generar respuesta con Gemini: {e!r}")
-            return self._build_fallback_response(user_message, products, chat_context)
+            self._record_failure(e, streaming=True)
+            yield from self._stream_fallback(user_message, products, chat_context, bool(parts))
+            return
+
+        self._cache_set(cache_key, "".join(parts).strip())
+
+    async def stream_response_async(
+        self,
+        user_message: str,
+        products: List[Product],
+        chat_context: ChatContext,
+        use_cache: bool = True,
+    ) -> AsyncIterator[StreamChunk]:
+        """Versión asíncrona de `stream_response`"""
+        cache_key, cached, prompt = await asyncio.to_thread(
+            self._prepare_call, user_message, products, chat_context, use_cache
+        )
+        if cached is not None:
+            for piece in split_into_chunks(cached):
+                yield StreamChunk(text=piece)
+            return
+
+        parts: List[str] = []
+        try:
+            async for text in self._stream_provider_async(prompt):
+                parts.append(text)
+                yield StreamChunk(text=text)
+
+            if not parts:
+                raise RuntimeError("Respuesta vacía del proveedor.")
+
+        except Exception as e:
+            self._record_failure(e, streaming=True)
+            for piece in self._stream_fallback(user_message, products, chat_context, bool(parts)):
+                yield piece
+            return
+
+        await self._cache_set_async(cache_key, "".join(parts).strip())
+
+    def _call_provider(self, prompt: str, cache_key: Optional[str]) -> str:
+        """
+        Llama al proveedor, compartiendo la llamada con requests idénticas en curso
+
+        Solo el líder del single flight pasa por el control de admisión; los
+        seguidores no ocupan lugar y reciben el mismo resultado (o el mismo
+        descarte)
+        """
+        if self._single_flight is None:
+            return self._generate_admitted(prompt)
+        return self._single_flight.do(
+            self._flight_key(prompt, cache_key), lambda: self._generate_admitted(prompt)
+        )
+
+    async def _call_provider_async(self, prompt: str, cache_key: Optional[str]) -> str:
+        """Versión asíncrona de `_call_provider`"""
+        if self._single_flight is None:
+            return await self._generate_admitted_async(prompt)
+        return await self._single_flight.do_async(
+            self._flight_key(prompt, cache_key), lambda: self._generate_admitted_async(prompt)
+        )
+
+    def _generate_admitted(self, prompt: str) -> str:
+        if self._admission is None:
+            return self._provider.generate(prompt)
+        with self._admission.slot():
+            return self._provider.generate(prompt)
+
+    async def _generate_admitted_async(self, prompt: str) -> str:
+        if self._admission is None:
+            return await self._provider.generate_async(prompt)
+        async with self._admission.slot_async():
+            return await self._provider.generate_async(prompt)
+
+    def _stream_provider(self, prompt: str) -> Iterator[str]:
+        """Flujo del proveedor ocupando un lugar de admisión hasta que termina"""
+        if self._admission is None:
+            yield from self._provider.stream(prompt)
+            return
+        with self._admission.slot():
+            yield from self._provider.stream(prompt)
+
+    async def _stream_provider_async(self, prompt: str) -> AsyncIterator[str]:
+        """Versión asíncrona de `_stream_provider`"""
+        if self._admission is None:
+            async for text in self._provider.stream_async(prompt):
+                yield text
+            return
+        async with self._admission.slot_async():
+            async for text in self._provider.stream_async(prompt):
+                yield text
+
+    @staticmethod
+    def _flight_key(prompt: str, cache_key: Optional[str]) -> str:
+        """Usa la clave de caché (prompt normalizado) o, si no hay, el hash del prompt"""
+        return cache_key or hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    def _cache_key(
+        self,
+        user_message: str,
+        products: List[Product],
+        chat_context: ChatContext,
+        use_cache: bool,
+    ) -> Optional[str]:
+        """
+        Clave de caché de la request, o None si no hay caché o se pidió omitirla
+
+        La versión del catálogo es la huella de contenido de los productos
+        que van en el prompt, estable entre procesos
+        """
+        if self._response_cache is None:
+            return None
+        if not use_cache:
+            self._response_cache.record_bypass()
+            return None
+        return make_cache_key(
+            user_message, chat_context.format_for_prompt(), catalog_fingerprint(products)
+        )
+
+    def _prepare_call(
+        self,
+        user_message: str,
+        products: List[Product],
+        chat_context: ChatContext,
+        use_cache: bool,
+    ) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """
+        Clave de caché, respuesta cacheada y, si no la hay, el prompt
+
+        Agrupa el trabajo sincrónico previo a la llamada para que los
+        caminos asíncronos lo hagan en un solo salto a un hilo
+        """
+        cache_key = self._cache_key(user_message, products, chat_context, use_cache)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cache_key, cached, None
+        return cache_key, None, self._build_prompt(user_message, products, chat_context)
+
+    async def _cache_set_async(self, key: Optional[str], text: str) -> None:
+        if key is not None and text:
+            await asyncio.to_thread(self._response_cache.set, key, text)
+
+    def _cache_get(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        return self._response_cache.get(key)
+
+    def _cache_set(self, key: Optional[str], text: str) -> None:
+        if key is not None and text:
+            self._response_cache.set(key, text)
+
+    def _stream_fallback(
+        self,
+        user_message: str,
+        products: List[Product],
+        chat_context: ChatContext,
+        emitted: bool,
+    ) -> Iterator[StreamChunk]:
+        """Emite la respuesta de fallback por fragmentos"""
+        fallback = self._build_fallback_response(user_message, products, chat_context)
+        pieces = split_into_chunks(fallback)
+        for index, piece in enumerate(pieces):
+            yield StreamChunk(text=piece, reset=emitted and index == 0)
+
+    def _build_prompt(
+        self,
+        user_message: str,
+        products: List[Product],
+        chat_context: ChatContext,
+    ) -> str:
+        """Construye el prompt con el catalogo, el historial y el mensaje"""
+        prompt = self._prompt_builder.build(
+            user_message, products, chat_context.format_for_prompt()
+        )
+        LLM_PROMPT_CHARS.observe(len(prompt))
+        return prompt
+
+    def _record_failure(self, error: Exception, streaming: bool = False) -> None:
+        """
+        Cuenta el fallback y, si se llegó a llamar al proveedor, el error
+
+        Los descartes por carga o circuito abierto no son errores del
+        proveedor y no se loguean
+        """
+        LLM_FALLBACKS.labels(_fallback_reason(error)).inc()
+        if isinstance(error, _NOT_CALLED_ERRORS):
+            return
+        LLM_ERRORS.labels(self._provider.name, type(error).__name__).inc()
+        logger.warning(
+            "[GeminiService] Error %s con %s: %r",
+            "en streaming" if streaming else "al generar respuesta",
+            self._provider.name,
+            error,
+        )
 
     def _build_fallback_response(
         self,
@@ -109,8 +444,17 @@ Solo recomienda productos del catálogo disponible
         Genera una respuesta simple usando únicamente la información local
 
         Este metodo se utiliza cuando la API de Gemini no está disponible
-        o produce algun error
+        o produce algun error. Si el mensaje pide atributos concretos (marca,
+        talla, color, precio...) se responde con el motor de consultas local
         """
+        local_answer = self._answer_locally(user_message, products)
+        if local_answer is not None:
+            return (
+                "En este momento tuve un problema al conectarme con el servicio de IA, "
+                "pero esto es lo que encontré en nuestro catalogo:\n\n"
+                f"{local_answer}"
+            )
+
         if not products:
             return (
                 "En este momento no puedo acceder al servicio de IA, "
@@ -131,3 +475,15 @@ Solo recomienda productos del catálogo disponible
             "Si necesitas algo mas especifico (talla, color o tipo de zapato), "
             "indicame y tratare de ayudarte con la informacion disponible"
         )
+
+    def _answer_locally(self, user_message: str, products: List[Product]) -> Optional[str]:
+        """Respuesta del motor de consultas, o None si el mensaje no pide atributos"""
+        if self._query_engine is None:
+            return None
+        query = self._query_engine.parse(user_message)
+        if not query.has_filters:
+            return None
+        # Con el catálogo indexado se responde sobre todo el catálogo; si no,
+        # sobre los productos recibidos
+        catalog = None if self._query_engine.is_synced else products
+        return self._query_engine.answer(query, catalog)
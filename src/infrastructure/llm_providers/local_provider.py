@@ -0,0 +1,101 @@
+"""
+Proveedor de LLM local y determinista
+
+Pensado para pruebas de carga y entornos sin conexión: no llama a ningún
+servicio externo, simula una latencia configurable y produce siempre la
+misma respuesta para el mismo prompt
+"""
+
+import asyncio
+import hashlib
+import random
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List
+
+from .base import ILLMProvider
+
+_VOCABULARY = (
+    "te", "recomiendo", "este", "modelo", "por", "su", "comodidad", "y", "diseño",
+    "ideal", "para", "uso", "diario", "o", "entrenamiento", "con", "excelente",
+    "relación", "calidad", "precio", "disponible", "en", "nuestro", "catálogo",
+)
+
+
+class LocalProvider(ILLMProvider):
+    """
+    Proveedor determinista con latencia y tamaño de salida configurables
+
+    La respuesta menciona hasta tres líneas del catálogo incluidas en el
+    prompt y se completa con palabras elegidas por una semilla derivada del
+    prompt hasta llegar a `output_words`
+    """
+
+    name = "local"
+
+    def __init__(self, latency_ms: float = 0.0, output_words: int = 60, chunk_words: int = 8) -> None:
+        self._latency = max(latency_ms, 0.0) / 1000.0
+        self._output_words = max(output_words, 1)
+        self._chunk_words = max(chunk_words, 1)
+
+    def generate(self, prompt: str) -> str:
+        """Simula la latencia y retorna la respuesta determinista"""
+        if self._latency:
+            time.sleep(self._latency)
+        return self._render(prompt)
+
+    async def generate_async(self, prompt: str) -> str:
+        """Igual que `generate` sin bloquear el event loop"""
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        return self._render(prompt)
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Emite la respuesta por fragmentos repartiendo la latencia entre ellos"""
+        chunks = self._chunks(self._render(prompt))
+        delay = self._latency / len(chunks)
+        for chunk in chunks:
+            if delay:
+                time.sleep(delay)
+            yield chunk
+
+    async def stream_async(self, prompt: str) -> AsyncIterator[str]:
+        """Versión asíncrona de `stream`"""
+        chunks = self._chunks(self._render(prompt))
+        delay = self._latency / len(chunks)
+        for chunk in chunks:
+            if delay:
+                await asyncio.sleep(delay)
+            yield chunk
+
+    def health(self, deep: bool = False) -> Dict[str, Any]:
+        """El proveedor local siempre está disponible"""
+        return {
+            "provider": self.name,
+            "status": "ok",
+            "latency_ms": self._latency * 1000,
+            "output_words": self._output_words,
+        }
+
+    def _render(self, prompt: str) -> str:
+        seed = int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:8], "big")
+        rng = random.Random(seed)
+        products = [
+            line[2:].split(" | ")[0]
+            for line in prompt.splitlines()
+            if line.startswith("- ")
+        ][:3]
+
+        words: List[str] = []
+        if products:
+            words.extend(f"Te recomiendo: {', '.join(products)}.".split())
+        while len(words) < self._output_words:
+            words.append(rng.choice(_VOCABULARY))
+        return " ".join(words[: self._output_words])
+
+    def _chunks(self, text: str) -> List[str]:
+        words = text.split(" ")
+        step = self._chunk_words
+        return [
+            " ".join(words[i : i + step]) + (" " if i + step < len(words) else "")
+            for i in range(0, len(words), step)
+        ]
@@ -0,0 +1,148 @@
+"""
+Construcción del prompt con partes precompiladas
+
+El encabezado del sistema y el bloque del catálogo se renderizan una sola
+vez y se reutilizan entre requests; por request solo se agregan el
+historial y el mensaje del usuario. Cada línea de producto se renderiza
+una vez por versión del producto: las entidades de la instantánea del
+catálogo se comparten entre requests, asi que la comprobación habitual es
+por identidad y, si el objeto es otro, por igualdad de campos
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Tuple
+
+from src.domain.entities import Product
+
+_HEADER = """
+Eres un asistente de ventas para una tienda de zapatos
+
+Catálogo de productos:
+"""
+
+_HISTORY_TITLE = """
+
+Historial reciente de la conversación:
+"""
+
+_MESSAGE_TITLE = """
+
+Mensaje actual del usuario:
+Usuario: """
+
+_FOOTER = """
+
+Responde en un tono amable, profesional y conciso
+Solo recomienda productos del catálogo disponible
+"""
+
+
+def render_product_line(product: Product) -> str:
+    """Línea del catálogo para un producto"""
+    return (
+        f"- {product.name} | Marca: {product.brand} | Categoría: {product.category} | "
+        f"Talla: {product.size} | Color: {product.color} | Precio: {product.price} | "
+        f"Stock: {product.stock}"
+    )
+
+
+class PromptBuilder:
+    """
+    Arma prompts reutilizando el encabezado y el catálogo ya renderizados
+
+    Args:
+        max_blocks: Cantidad de bloques de catálogo distintos (combinaciones
+            de productos) que se conservan, con expulsión LRU
+        max_lines: Líneas de producto en caché antes de vaciarla (evita que
+            crezca con productos que ya no existen)
+    """
+
+    def __init__(self, max_blocks: int = 256, max_lines: int = 50_000) -> None:
+        self._max_blocks = max_blocks
+        self._max_lines = max_lines
+        self._lines: Dict[int, Tuple[Product, str]] = {}
+        self._blocks: "OrderedDict[Tuple[str, ...], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "builds": 0,
+            "line_hits": 0,
+            "line_misses": 0,
+            "block_hits": 0,
+            "block_misses": 0,
+        }
+        self._total_ns = 0
+        self._last_ns = 0
+        self._max_ns = 0
+
+    def build(self, user_message: str, products: Sequence[Product], history_text: str) -> str:
+        """
+        Arma el prompt completo
+
+        El prefijo cacheado (encabezado + catálogo + título del historial)
+        se une con las partes de la request en una sola concatenación
+        """
+        started = time.perf_counter_ns()
+        prefix = self._catalog_prefix(products)
+        prompt = "".join((prefix, history_text, _MESSAGE_TITLE, user_message, _FOOTER))
+        self._record(time.perf_counter_ns() - started)
+        return prompt
+
+    def invalidate(self) -> None:
+        """Descarta todas las partes renderizadas"""
+        with self._lock:
+            self._lines.clear()
+            self._blocks.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Aciertos de caché y tiempo de armado por request en microsegundos"""
+        with self._lock:
+            stats: Dict[str, float] = dict(self._stats)
+            builds = self._stats["builds"]
+            stats["avg_assembly_us"] = round(self._total_ns / builds / 1000, 2) if builds else 0.0
+            stats["last_assembly_us"] = round(self._last_ns / 1000, 2)
+            stats["max_assembly_us"] = round(self._max_ns / 1000, 2)
+            stats["cached_lines"] = len(self._lines)
+            stats["cached_blocks"] = len(self._blocks)
+        return stats
+
+    def _catalog_prefix(self, products: Sequence[Product]) -> str:
+        misses = 0
+        lines: List[str] = []
+        for product in products:
+            entry = self._lines.get(product.id)
+            if entry is not None and (entry[0] is product or entry[0] == product):
+                lines.append(entry[1])
+                continue
+            line = render_product_line(product)
+            if len(self._lines) >= self._max_lines:
+                self._lines.clear()
+            self._lines[product.id] = (product, line)
+            lines.append(line)
+            misses += 1
+
+        key = tuple(lines)
+        with self._lock:
+            self._stats["line_hits"] += len(key) - misses
+            self._stats["line_misses"] += misses
+            prefix = self._blocks.get(key)
+            if prefix is not None:
+                self._blocks.move_to_end(key)
+                self._stats["block_hits"] += 1
+                return prefix
+
+        prefix = "".join((_HEADER, "\n".join(key), _HISTORY_TITLE))
+        with self._lock:
+            self._stats["block_misses"] += 1
+            self._blocks[key] = prefix
+            while len(self._blocks) > self._max_blocks:
+                self._blocks.popitem(last=False)
+        return prefix
+
+    def _record(self, elapsed_ns: int) -> None:
+        with self._lock:
+            self._stats["builds"] += 1
+            self._total_ns += elapsed_ns
+            self._last_ns = elapsed_ns
+            self._max_ns = max(self._max_ns, elapsed_ns)
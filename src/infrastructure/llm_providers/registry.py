@@ -0,0 +1,96 @@
+"""
+Registro de proveedores de LLM
+
+Se crea una sola vez al iniciar la app: instancia el proveedor activo,
+lo calienta y expone su estado para el health check
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from src.config import Settings
+from .base import ILLMProvider
+
+ProviderFactory = Callable[[Settings], ILLMProvider]
+
+
+def _gemini_factory(settings: Settings) -> ILLMProvider:
+    from .gemini_provider import GeminiProvider
+
+    return GeminiProvider(
+        api_key=settings.gemini_api_key,
+        model_name=settings.gemini_model,
+        timeout_s=settings.llm_timeout_s,
+        stream_timeout_s=settings.llm_stream_deadline_s,
+    )
+
+
+def _local_factory(settings: Settings) -> ILLMProvider:
+    from .local_provider import LocalProvider
+
+    return LocalProvider(
+        latency_ms=settings.local_llm_latency_ms,
+        output_words=settings.local_llm_output_words,
+    )
+
+
+class LLMProviderRegistry:
+    """
+    Mantiene las fábricas registradas y las instancias ya creadas
+
+    Cada proveedor se instancia como mucho una vez (de forma perezosa y
+    protegida por lock) y se reutiliza durante toda la vida del proceso
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self._settings = settings
+        self._factories: Dict[str, ProviderFactory] = {
+            "gemini": _gemini_factory,
+            "local": _local_factory,
+        }
+        self._instances: Dict[str, ILLMProvider] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def active_name(self) -> str:
+        """Nombre del proveedor seleccionado en la configuración"""
+        return self._settings.llm_provider
+
+    def available(self) -> List[str]:
+        """Nombres de los proveedores registrados"""
+        return sorted(self._factories)
+
+    def register(self, name: str, factory: ProviderFactory) -> None:
+        """Registra (o reemplaza) la fábrica de un proveedor"""
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def get(self, name: Optional[str] = None) -> ILLMProvider:
+        """
+        Retorna la instancia del proveedor indicado (por defecto el activo)
+
+        Raises:
+            ValueError: Si no hay un proveedor registrado con ese nombre
+        """
+        name = name or self.active_name
+        provider = self._instances.get(name)
+        if provider is not None:
+            return provider
+        with self._lock:
+            provider = self._instances.get(name)
+            if provider is None:
+                factory = self._factories.get(name)
+                if factory is None:
+                    raise ValueError(f"Proveedor de LLM desconocido: {name}")
+                provider = factory(self._settings)
+                self._instances[name] = provider
+            return provider
+
+    def warm_up(self) -> None:
+        """Crea y calienta el proveedor activo"""
+        self.get().warm_up()
+
+    def health(self, deep: bool = False) -> Dict[str, Any]:
+        """Estado del proveedor activo"""
+        return self.get().health(deep=deep)
@@ -0,0 +1,456 @@
+"""
+Capa de resiliencia para los proveedores de LLM
+
+ResilientProvider es un decorador de ILLMProvider que agrega:
+
+- Timeout por llamada; en los flujos, timeout entre fragmentos y un
+  plazo total
+- Reintentos con backoff exponencial y jitter, limitados por un
+  presupuesto de reintentos (una fracción de las llamadas recientes)
+- Circuit breaker: tras varios fallos seguidos se abre y las llamadas
+  fallan al instante (el servicio responde con el fallback local); pasado
+  el enfriamiento deja pasar una llamada de prueba (half-open) y, según el
+  resultado, se cierra o vuelve a abrirse
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+from src.infrastructure.observability.metrics import LLM_TIMEOUTS
+
+from .base import ILLMProvider
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Códigos HTTP y excepciones del SDK que indican un fallo transitorio
+_RETRYABLE_CODES = frozenset({408, 429, 500, 502, 503, 504})
+_RETRYABLE_NAMES = frozenset(
+    {
+        "DeadlineExceeded",
+        "InternalServerError",
+        "ResourceExhausted",
+        "ServiceUnavailable",
+        "TooManyRequests",
+    }
+)
+
+
+class CircuitOpenError(Exception):
+    """El circuito está abierto: no se llama al proveedor"""
+
+
+class ProviderSaturatedError(Exception):
+    """Todos los hilos del pool siguen ocupados con llamadas vencidas"""
+
+
+# Marca el fin de un flujo leído desde el pool
+_END = object()
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Indica si el error es transitorio y vale la pena reintentar"""
+    if isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and code in _RETRYABLE_CODES:
+        return True
+    return type(error).__name__ in _RETRYABLE_NAMES
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Espera antes del reintento `attempt` (desde 1) con full jitter"""
+    return random.uniform(0.0, min(cap, base * (2 ** (attempt - 1))))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por fallos consecutivos
+
+    Args:
+        failure_threshold: Fallos seguidos que abren el circuito
+        cool_down_s: Segundos que permanece abierto antes de probar
+        name: Nombre usado en los logs
+    """
+
+    def __init__(self, failure_threshold: int = 5, cool_down_s: float = 30.0, name: str = "llm") -> None:
+        self._threshold = max(failure_threshold, 1)
+        self._cool_down = cool_down_s
+        self._name = name
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self._stats = {"opened": 0, "half_opened": 0, "closed": 0, "rejected": 0}
+
+    @property
+    def state(self) -> str:
+        """Estado actual: closed, open o half_open"""
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow(self) -> None:
+        """
+        Autoriza una llamada
+
+        Raises:
+            CircuitOpenError: Si el circuito está abierto o ya hay una
+                llamada de prueba en curso
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            self._stats["rejected"] += 1
+        raise CircuitOpenError(f"Circuito '{self._name}' abierto")
+
+    def record_success(self) -> None:
+        """Registra una llamada exitosa"""
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self._state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        """Registra una llamada fallida"""
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or (
+                self._state == CLOSED and self._failures >= self._threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def release_probe(self) -> None:
+        """Libera la prueba half-open sin resultado (p. ej. llamada cancelada)"""
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado, fallos consecutivos y cantidad de transiciones"""
+        with self._lock:
+            self._maybe_half_open()
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["state"] = self._state
+            stats["consecutive_failures"] = self._failures
+        return stats
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self._cool_down:
+            self._transition(HALF_OPEN)
+
+    def _transition(self, state: str) -> None:
+        previous, self._state = self._state, state
+        self._stats[{OPEN: "opened", HALF_OPEN: "half_opened", CLOSED: "closed"}[state]] += 1
+        log = logger.info if state == CLOSED else logger.warning
+        log(
+            "[CircuitBreaker] %s: %s -> %s (fallos consecutivos: %d)",
+            self._name, previous, state, self._failures,
+        )
+
+
+class RetryBudget:
+    """
+    Presupuesto de reintentos tipo token bucket
+
+    Cada llamada deposita `ratio` fichas y cada reintento gasta una, de modo
+    que los reintentos nunca superan esa fracción del tráfico y no
+    multiplican la carga cuando el proveedor está caído
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0) -> None:
+        self._ratio = ratio
+        self._max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self._max_tokens, self._tokens + self._ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+
+class ResilientProvider(ILLMProvider):
+    """
+    Decorador de ILLMProvider con timeout, reintentos y circuit breaker
+
+    En el camino sincrónico el timeout se aplica ejecutando la llamada en
+    un pool propio: si vence, la request sigue con el fallback aunque el
+    hilo del pool termine la llamada después. El pool está acotado a
+    `max_workers` llamadas en curso (incluidas las vencidas que siguen
+    colgadas): sin hilos libres se falla al instante en vez de encolar, sin
+    contar como fallo del proveedor para el breaker (igual que los descartes
+    del control de admisión). En
+    los flujos el timeout se aplica a la espera de cada fragmento, con un
+    plazo total de `stream_deadline_s`, y los flujos no se reintentan
+    """
+
+    def __init__(
+        self,
+        inner: ILLMProvider,
+        timeout_s: float = 20.0,
+        max_retries: int = 2,
+        backoff_base_ms: float = 200.0,
+        backoff_max_ms: float = 2000.0,
+        retry_budget: Optional[RetryBudget] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        max_workers: int = 32,
+        stream_deadline_s: float = 120.0,
+    ) -> None:
+        self._inner = inner
+        self.name = inner.name
+        self._timeout = timeout_s
+        self._stream_deadline = stream_deadline_s
+        self._max_retries = max(max_retries, 0)
+        self._backoff_base = backoff_base_ms / 1000.0
+        self._backoff_cap = backoff_max_ms / 1000.0
+        self._budget = retry_budget or RetryBudget()
+        self._breaker = breaker or CircuitBreaker(name=inner.name)
+        self._max_workers = max(max_workers, 1)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix=f"llm-{inner.name}"
+        )
+        self._busy = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "calls": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "retries": 0,
+            "retries_denied": 0,
+            "saturated": 0,
+        }
+
+    @property
+    def inner(self) -> ILLMProvider:
+        """Proveedor decorado"""
+        return self._inner
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """Circuit breaker en uso"""
+        return self._breaker
+
+    @property
+    def busy_workers(self) -> int:
+        """Hilos del pool ocupados, incluidas las llamadas ya vencidas"""
+        return self._busy
+
+    def generate(self, prompt: str) -> str:
+        """Genera con timeout, reintentos y breaker"""
+        return self._run(
+            lambda: self._with_timeout(lambda: self._inner.generate(prompt), self._timeout, "generate")
+        )
+
+    async def generate_async(self, prompt: str) -> str:
+        """Versión asíncrona de `generate`"""
+        return await self._run_async(
+            lambda: self._wait_for(self._inner.generate_async(prompt), self._timeout, "generate")
+        )
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        Flujo del proveedor controlado por el breaker (sin reintentos)
+
+        Cada fragmento se lee en el pool con timeout; si vence, el flujo
+        interno queda abandonado en su hilo y la request sigue con el error
+        """
+        self._breaker.allow()
+        self._count("calls")
+        self._budget.deposit()
+        deadline = time.monotonic() + self._stream_deadline
+        iterator = iter(self._inner.stream(prompt))
+        try:
+            while True:
+                text = self._with_timeout(lambda: next(iterator, _END), self._chunk_timeout(deadline), "stream")
+                if text is _END:
+                    break
+                yield text
+        except GeneratorExit:
+            self._breaker.release_probe()
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            raise
+        except ProviderSaturatedError:
+            self._breaker.release_probe()
+            raise
+        except Exception:
+            self._count("failures")
+            self._breaker.record_failure()
+            raise
+        self._breaker.record_success()
+
+    async def stream_async(self, prompt: str) -> AsyncIterator[str]:
+        """Versión asíncrona de `stream` con timeout entre fragmentos y plazo total"""
+        self._breaker.allow()
+        self._count("calls")
+        self._budget.deposit()
+        deadline = time.monotonic() + self._stream_deadline
+        iterator = self._inner.stream_async(prompt).__aiter__()
+        try:
+            while True:
+                try:
+                    text = await self._wait_for(iterator.__anext__(), self._chunk_timeout(deadline), "stream")
+                except StopAsyncIteration:
+                    break
+                yield text
+        except (GeneratorExit, asyncio.CancelledError):
+            self._breaker.release_probe()
+            raise
+        except Exception:
+            self._count("failures")
+            self._breaker.record_failure()
+            raise
+        self._breaker.record_success()
+
+    def warm_up(self) -> None:
+        """Delega en el proveedor interno"""
+        self._inner.warm_up()
+
+    def health(self, deep: bool = False) -> Dict[str, Any]:
+        """Estado del proveedor interno más el estado del circuito"""
+        status = self._inner.health(deep=deep)
+        status["circuit"] = self._breaker.state
+        if status["circuit"] == OPEN and status.get("status") == "ok":
+            status["status"] = "degraded"
+        return status
+
+    def stats(self) -> Dict[str, Any]:
+        """Llamadas, fallos, timeouts, reintentos, hilos ocupados y estado del breaker"""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["busy_workers"] = self._busy
+        stats["retry_tokens"] = round(self._budget.tokens, 2)
+        stats["breaker"] = self._breaker.stats()
+        return stats
+
+    def _run(self, call: Callable[[], T]) -> T:
+        self._breaker.allow()
+        self._count("calls")
+        self._budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                result = call()
+            except ProviderSaturatedError:
+                # Saturación local: el proveedor no falló
+                self._breaker.release_probe()
+                raise
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    self._count("failures")
+                    self._breaker.record_failure()
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            self._breaker.record_success()
+            return result
+
+    async def _run_async(self, call: Callable[[], Awaitable[T]]) -> T:
+        self._breaker.allow()
+        self._count("calls")
+        self._budget.deposit()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    result = await call()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None:
+                        self._count("failures")
+                        self._breaker.record_failure()
+                        raise
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                    continue
+                self._breaker.record_success()
+                return result
+        except asyncio.CancelledError:
+            self._breaker.release_probe()
+            raise
+
+    def _chunk_timeout(self, deadline: float) -> float:
+        """Timeout del próximo fragmento: el menor entre el por fragmento y lo que queda del plazo"""
+        return max(min(self._timeout, deadline - time.monotonic()), 0.0)
+
+    def _with_timeout(self, fn: Callable[[], T], timeout: float, call: str) -> T:
+        with self._lock:
+            if self._busy >= self._max_workers:
+                self._stats["saturated"] += 1
+                raise ProviderSaturatedError(f"Los {self._max_workers} hilos del proveedor siguen ocupados")
+            self._busy += 1
+        try:
+            future = self._executor.submit(fn)
+        except BaseException:
+            self._release_worker()
+            raise
+        # El lugar se libera cuando la llamada termina, aunque ya haya vencido
+        future.add_done_callback(lambda _: self._release_worker())
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            self._timed_out(call)
+            raise TimeoutError(f"El proveedor no respondió en {timeout:.3g}s") from None
+
+    def _release_worker(self) -> None:
+        with self._lock:
+            self._busy -= 1
+
+    async def _wait_for(self, awaitable: Awaitable[T], timeout: float, call: str) -> T:
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            self._timed_out(call)
+            raise
+
+    def _timed_out(self, call: str) -> None:
+        self._count("timeouts")
+        LLM_TIMEOUTS.labels(self.name, call).inc()
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Espera antes de reintentar, o None si no corresponde reintentar"""
+        if attempt >= self._max_retries or not is_retryable(error):
+            return None
+        if not self._budget.try_spend():
+            self._count("retries_denied")
+            return None
+        self._count("retries")
+        return backoff_delay(attempt + 1, self._backoff_base, self._backoff_cap)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
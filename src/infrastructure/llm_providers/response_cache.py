@@ -0,0 +1,231 @@
+"""
+Caché de respuestas del LLM
+
+Evita llamar al proveedor cuando llega una pregunta equivalente con el
+mismo contexto y el mismo catálogo. Tiene dos niveles:
+
+- Memoria: LRU por proceso, con TTL y tamaño máximo
+- SQLite (opcional): compartido entre workers y reinicios
+
+La clave es un hash del mensaje normalizado, el historial formateado y la
+versión de contenido de los productos enviados en el prompt, por lo que
+un cambio en esos productos invalida las entradas automáticamente
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from src.infrastructure.search.text import normalize_text
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Normaliza un mensaje: minúsculas, sin tildes, sin signos ni espacios extra"""
+    text = _PUNCTUATION_RE.sub(" ", normalize_text(message))
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+def make_cache_key(user_message: str, context_text: str, catalog_version: str) -> str:
+    """Calcula la clave de caché de una respuesta"""
+    digest = hashlib.sha256()
+    for part in (normalize_message(user_message), context_text, catalog_version):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class MemoryLRUTier:
+    """Nivel en memoria: LRU con TTL, seguro entre hilos"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 600.0) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, value = entry
+            if time.time() - created >= self._ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, created: Optional[float] = None) -> None:
+        with self._lock:
+            self._entries[key] = (created if created is not None else time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SqliteTier:
+    """
+    Nivel persistente en SQLite
+
+    Una única conexión protegida por lock, abierta en el primer uso; la
+    expulsión por tamaño borra las entradas con acceso más antiguo y se
+    ejecuta cada cierto número de escrituras
+    """
+
+    _EVICT_EVERY = 100
+
+    def __init__(self, path: str, max_entries: int = 100_000, ttl_seconds: float = 600.0) -> None:
+        self._path = path
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def open(self) -> None:
+        """Abre la conexión y crea la tabla (se hace solo en el primer uso)"""
+        with self._lock:
+            self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Con el lock tomado: conexión abierta, creándola si hace falta"""
+        if self._conn is not None:
+            return self._conn
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_response_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_llm_response_cache_accessed "
+            "ON llm_response_cache (accessed)"
+        )
+        self._conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[float, str]]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT created, value FROM llm_response_cache WHERE key = ? AND created > ?",
+                (key, now - self._ttl),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE llm_response_cache SET accessed = ? WHERE key = ?", (now, key)
+                )
+        return row
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO llm_response_cache (key, value, created, accessed) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._writes += 1
+            if self._writes % self._EVICT_EVERY == 0:
+                self._evict(now)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM llm_response_cache")
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM llm_response_cache WHERE created <= ?", (now - self._ttl,))
+        self._conn.execute(
+            "DELETE FROM llm_response_cache WHERE key IN ("
+            "SELECT key FROM llm_response_cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self._max_entries,),
+        )
+
+
+class ResponseCache:
+    """
+    Caché de respuestas en dos niveles con contadores de aciertos y fallos
+
+    Un acierto en SQLite se promueve a memoria conservando su antigüedad
+    """
+
+    def __init__(self, memory: MemoryLRUTier, sqlite_tier: Optional[SqliteTier] = None) -> None:
+        self._memory = memory
+        self._sqlite = sqlite_tier
+        self._stats: Dict[str, int] = {
+            "memory_hits": 0,
+            "sqlite_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "stores": 0,
+        }
+        self._stats_lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """Busca una respuesta en memoria y luego en SQLite"""
+        value = self._memory.get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return value
+        if self._sqlite is not None:
+            row = self._sqlite.get(key)
+            if row is not None:
+                created, value = row
+                self._memory.set(key, value, created=created)
+                self._count("sqlite_hits")
+                return value
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        """Guarda una respuesta en todos los niveles"""
+        self._memory.set(key, value)
+        if self._sqlite is not None:
+            self._sqlite.set(key, value)
+        self._count("stores")
+
+    def record_bypass(self) -> None:
+        """Registra una request que pidió no usar la caché"""
+        self._count("bypassed")
+
+    def warm_up(self) -> None:
+        """Abre el nivel en SQLite antes de la primera request"""
+        if self._sqlite is not None:
+            self._sqlite.open()
+
+    def clear(self) -> None:
+        """Vacía todos los niveles"""
+        self._memory.clear()
+        if self._sqlite is not None:
+            self._sqlite.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de uso y tamaño del nivel en memoria"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["memory_entries"] = len(self._memory)
+        return stats
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
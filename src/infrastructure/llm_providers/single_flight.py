@@ -0,0 +1,120 @@
+"""
+Coalescencia de llamadas idénticas concurrentes ("single flight")
+
+Cuando varias requests piden la misma respuesta al mismo tiempo, solo la
+primera (líder) llama al proveedor; las demás esperan y reciben el mismo
+resultado, o la misma excepción si la llamada falla
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _InFlightCall:
+    """Llamada en curso del camino sincrónico"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes con la misma clave
+
+    `do` sirve para el camino con hilos y `do_async` para el camino con
+    asyncio; cada uno tiene su propio registro de llamadas en curso pero
+    comparten los contadores
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, _InFlightCall] = {}
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "deduplicated": 0}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """
+        Ejecuta `fn` una sola vez por clave entre los hilos concurrentes
+
+        Raises:
+            Exception: La misma excepción que lanzó la llamada del líder
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self._stats["leaders"] += 1
+            else:
+                self._stats["deduplicated"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Ejecuta la corrutina de `fn` una sola vez por clave entre las tareas
+
+        Si el líder es cancelado, los seguidores reintentan y uno de ellos
+        pasa a ser el nuevo líder
+        """
+        while True:
+            future = self._futures.get(key)
+            if future is None:
+                break
+            with self._lock:
+                self._stats["deduplicated"] += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                with self._lock:
+                    self._stats["deduplicated"] -= 1
+
+        future = asyncio.get_running_loop().create_future()
+        self._futures[key] = future
+        with self._lock:
+            self._stats["leaders"] += 1
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Marca la excepción como leída aunque no haya seguidores
+            future.exception()
+            raise
+        finally:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Cantidad de llamadas reales (líderes) y de llamadas deduplicadas"""
+        with self._lock:
+            return dict(self._stats)
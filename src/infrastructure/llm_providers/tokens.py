@@ -0,0 +1,100 @@
+"""
+Estimadores de tokens para presupuestar el tamaño del prompt
+
+Son aproximaciones locales (sin llamar al proveedor) pensadas para correr
+en cada request:
+
+- chars: largo del texto dividido por un promedio de caracteres por token
+- words: palabras y signos por separado, con las palabras largas contadas
+  como varios tokens (se acerca más a los tokenizadores BPE)
+"""
+
+import math
+import re
+from abc import ABC, abstractmethod
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+
+class ITokenEstimator(ABC):
+    """Estima cuántos tokens ocupa un texto en el prompt"""
+
+    name: str = "base"
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """Cantidad estimada de tokens"""
+        raise NotImplementedError
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Recorta el texto para que no supere `max_tokens`
+
+        Por defecto busca el corte por bisección sobre la cantidad de
+        caracteres; las implementaciones pueden hacerlo de forma directa
+        """
+        if max_tokens <= 0:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count(text[:middle]) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        return text[:low]
+
+
+class CharRatioTokenEstimator(ITokenEstimator):
+    """Un token cada `chars_per_token` caracteres (4 es lo habitual)"""
+
+    name = "chars"
+
+    def __init__(self, chars_per_token: float = 4.0) -> None:
+        self._ratio = chars_per_token
+
+    def count(self, text: str) -> int:
+        return math.ceil(len(text) / self._ratio)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        return text[: max(int(max_tokens * self._ratio), 0)]
+
+
+class WordTokenEstimator(ITokenEstimator):
+    """
+    Cuenta palabras y signos de puntuación
+
+    Una palabra de más de `chars_per_piece` caracteres cuenta como varios
+    tokens, como ocurre con los sub-tokens de BPE
+    """
+
+    name = "words"
+
+    def __init__(self, chars_per_piece: int = 6) -> None:
+        self._piece = chars_per_piece
+
+    def count(self, text: str) -> int:
+        piece = self._piece
+        return sum(-(-len(word) // piece) for word in _WORD_RE.findall(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        used = 0
+        end = 0
+        piece = self._piece
+        for match in _WORD_RE.finditer(text):
+            used += -(-len(match.group()) // piece)
+            if used > max_tokens:
+                break
+            end = match.end()
+        return text[:end]
+
+
+def build_token_estimator(name: str) -> ITokenEstimator:
+    """Crea el estimador configurado ('chars' o 'words')"""
+    if name == "words":
+        return WordTokenEstimator()
+    if name == "chars":
+        return CharRatioTokenEstimator()
+    raise ValueError(f"Estimador de tokens desconocido: {name!r}")
@@ -0,0 +1,450 @@
+"""
+Métricas de la aplicación en formato de texto de Prometheus
+
+Contadores e histogramas propios (sin dependencias), pensados para quedar
+activos en producción: registrar una observación es una búsqueda en un
+dict, un `bisect` y un incremento bajo lock
+
+Además de los totales del proceso, cada request HTTP lleva un
+RequestMetrics en un ContextVar donde se acumulan las etapas del chat y
+las consultas a la base de datos, para el log estructurado de tiempos.
+Las consultas lentas se registran en el log junto con su plan de ejecución
+"""
+
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Latencias en segundos, de 1 ms a 30 s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Tamaño del prompt en caracteres
+SIZE_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+# Consultas SQL por request
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class _Metric:
+    """Base de las métricas con etiquetas: un hijo por combinación de valores"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """Serie para los valores de etiqueta dados (en el orden declarado)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def clear(self) -> None:
+        with self._lock:
+            self._children.clear()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _items(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Contador monotónico"""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Incrementa la serie sin etiquetas"""
+        self.labels().inc(amount)
+
+    def value(self, *values: str) -> float:
+        child = self._children.get(values)
+        return child.value if child is not None else 0.0
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+            for values, child in self._items()
+        ]
+
+
+class Histogram(_Metric):
+    """Histograma acumulativo con buckets fijos"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Registra un valor en la serie sin etiquetas"""
+        self.labels().observe(value)
+
+    def count(self, *values: str) -> int:
+        child = self._children.get(values)
+        return child.count if child is not None else 0
+
+    def _samples(self) -> List[str]:
+        lines: List[str] = []
+        bounds = self.buckets + (float("inf"),)
+        for values, child in self._items():
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Conjunto de métricas que se exponen juntas en /metrics
+
+    Los gauges se leen en el momento de exportar con la función registrada
+    (estado que ya mantiene otro componente: generación del catálogo, etc.)
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_function(self, name: str, documentation: str, fn: Callable[[], float]) -> None:
+        """Gauge sin etiquetas cuyo valor se obtiene al exportar"""
+        with self._lock:
+            self._gauges[name] = (documentation, fn)
+
+    def clear(self) -> None:
+        """Descarta todas las observaciones (las métricas siguen registradas)"""
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+    def render(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus (versión 0.0.4)"""
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        for name, (documentation, fn) in list(self._gauges.items()):
+            try:
+                value = float(fn())
+            except Exception:
+                continue
+            lines.extend([f"# HELP {name} {documentation}", f"# TYPE {name} gauge", f"{name} {_format_value(value)}"])
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrica ya registrada: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Duración de las requests HTTP por endpoint",
+    ("method", "route", "status"),
+)
+CHAT_STAGE_SECONDS = REGISTRY.histogram(
+    "chat_stage_duration_seconds",
+    "Duración de cada etapa del chat",
+    ("stage",),
+)
+LLM_FALLBACKS = REGISTRY.counter(
+    "llm_fallback_responses_total",
+    "Respuestas generadas con el fallback local",
+    ("reason",),
+)
+LLM_ERRORS = REGISTRY.counter(
+    "llm_errors_total",
+    "Errores al llamar al proveedor de LLM",
+    ("provider", "error"),
+)
+LLM_TIMEOUTS = REGISTRY.counter(
+    "llm_timeouts_total",
+    "Llamadas o fragmentos del LLM que vencieron su timeout",
+    ("provider", "call"),
+)
+LLM_ADMISSION_SHED = REGISTRY.counter(
+    "llm_admission_shed_total",
+    "Llamadas al LLM descartadas por el control de admisión",
+    ("reason",),
+)
+LLM_PROMPT_CHARS = REGISTRY.histogram(
+    "llm_prompt_chars",
+    "Tamaño de los prompts enviados al LLM en caracteres",
+    buckets=SIZE_BUCKETS,
+)
+DB_QUERIES_PER_REQUEST = REGISTRY.histogram(
+    "db_queries_per_request",
+    "Consultas SQL ejecutadas por request HTTP",
+    ("route",),
+    buckets=COUNT_BUCKETS,
+)
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    "db_query_duration_seconds",
+    "Duración de las consultas SQL",
+    ("operation",),
+)
+CHAT_WRITE_DROPPED_ROWS = REGISTRY.counter(
+    "chat_write_behind_dropped_rows_total",
+    "Mensajes de chat descartados por el escritor diferido tras agotar los reintentos",
+)
+DB_SLOW_QUERIES = REGISTRY.counter(
+    "db_slow_queries_total",
+    "Consultas SQL que superaron el umbral de consulta lenta",
+    ("operation",),
+)
+DB_REPEATED_STATEMENTS = REGISTRY.counter(
+    "db_repeated_statements_total",
+    "Sentencias repetidas dentro de una misma request (posible N+1)",
+    ("route",),
+)
+
+
+@dataclass
+class RequestMetrics:
+    """
+    Mediciones de una request en curso
+
+    Attributes:
+        stages: Segundos acumulados por etapa del chat
+        db_queries: Consultas SQL ejecutadas
+        db_seconds: Tiempo total en consultas SQL
+        statements: Ejecuciones de cada sentencia (mismo texto parametrizado)
+    """
+
+    stages: Dict[str, float] = field(default_factory=dict)
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    statements: Dict[str, int] = field(default_factory=dict)
+
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        """Sentencias ejecutadas al menos `threshold` veces, de la más repetida a la menos"""
+        if threshold <= 1:
+            return []
+        repeated = [(sql, count) for sql, count in self.statements.items() if count >= threshold]
+        return sorted(repeated, key=lambda item: item[1], reverse=True)
+
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+def start_request() -> Tuple[RequestMetrics, object]:
+    """Crea las mediciones de una request y las deja en el contexto actual"""
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def end_request(token) -> None:
+    _current.reset(token)
+
+
+def current_request() -> Optional[RequestMetrics]:
+    """Mediciones de la request en curso (None fuera de una request)"""
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Mide una etapa del chat (también dentro de código async)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        CHAT_STAGE_SECONDS.labels(name).observe(elapsed)
+        request = _current.get()
+        if request is not None:
+            request.stages[name] = request.stages.get(name, 0.0) + elapsed
+
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip()[:8].split(None, 1)
+    word = keyword[0].lower() if keyword else ""
+    return word if word in {"select", "insert", "update", "delete"} else "other"
+
+
+# Prefijo para pedir el plan de una consulta según el motor
+_EXPLAIN_PREFIXES = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+_MAX_LOGGED_STATEMENT = 2000
+
+
+def compact_sql(statement: str) -> str:
+    """Sentencia en una sola línea y acotada, para el log"""
+    return " ".join(statement.split())[:_MAX_LOGGED_STATEMENT]
+
+
+def explain_plan(conn, statement: str, parameters) -> Optional[List[str]]:
+    """
+    Plan de ejecución de un SELECT con los mismos parámetros
+
+    Usa un cursor propio de la conexión DBAPI, así que no dispara los
+    eventos del engine ni pisa el cursor de la consulta original. Retorna
+    None si el motor no está soportado o el EXPLAIN falla
+    """
+    prefix = _EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None:
+        return None
+    try:
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return [str(row[-1]) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    except Exception:
+        return None
+
+
+def _log_slow_query(conn, statement: str, parameters, executemany: bool, elapsed: float, explain: bool) -> None:
+    operation = _operation(statement)
+    DB_SLOW_QUERIES.labels(operation).inc()
+    record: Dict[str, object] = {
+        "event": "slow_query",
+        "operation": operation,
+        "duration_ms": round(elapsed * 1000.0, 2),
+        "statement": compact_sql(statement),
+    }
+    if explain and operation == "select" and not executemany:
+        record["plan"] = explain_plan(conn, statement, parameters)
+    logger.warning(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+
+
+def install_query_metrics(engine: Engine, slow_query_ms: float = 0.0, explain_slow_queries: bool = True) -> None:
+    """
+    Cuenta y mide las consultas del engine
+
+    Para engines asíncronos se pasa `async_engine.sync_engine`
+
+    Args:
+        engine: Engine a instrumentar
+        slow_query_ms: Umbral para loguear una consulta como lenta (0 = no loguear)
+        explain_slow_queries: Incluir el plan de ejecución de los SELECT lentos
+    """
+    slow_seconds = slow_query_ms / 1000.0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - context._metrics_started
+        DB_QUERY_SECONDS.labels(_operation(statement)).observe(elapsed)
+        request = _current.get()
+        if request is not None:
+            request.db_queries += 1
+            request.db_seconds += elapsed
+            request.statements[statement] = request.statements.get(statement, 0) + 1
+        if slow_seconds > 0 and elapsed >= slow_seconds:
+            _log_slow_query(conn, statement, parameters, executemany, elapsed, explain_slow_queries)
@@ -0,0 +1,260 @@
+"""
+Perfilado por muestreo de requests individuales
+
+Un hilo de muestreo toma cada pocos milisegundos la pila de los hilos que
+están atendiendo una request perfilada (`sys._current_frames`) y cuenta
+cuántas veces aparece cada pila. No instrumenta llamadas, asi que el costo
+no depende de cuánto código corra la request, y el hilo solo trabaja
+mientras haya perfiles en curso
+
+Cada perfil se guarda en formato "collapsed stacks" (`marco;marco;marco
+cantidad` por línea), que leen directamente flamegraph.pl, speedscope e
+inferno, junto a un archivo JSON con los datos de la request
+"""
+
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from types import CodeType, FrameType
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Marcos de más que no aportan al perfil (fondo de la pila de cada hilo)
+_MAX_DEPTH = 200
+_NAME_PATTERN = re.compile(r"^[0-9A-Za-z_.-]+$")
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def _short_path(filename: str) -> str:
+    """Ruta legible: relativa al proyecto o desde site-packages"""
+    if filename.startswith(_ROOT):
+        return os.path.relpath(filename, _ROOT)
+    marker = "site-packages" + os.sep
+    index = filename.rfind(marker)
+    if index >= 0:
+        return filename[index + len(marker):]
+    return os.path.basename(filename)
+
+
+class RequestProfile:
+    """
+    Muestras de las pilas de los hilos que atienden una request
+
+    Attributes:
+        trigger: 'on_demand' (pedido por header) o 'sampled' (1 de cada N)
+        threads: Ids de los hilos que hoy trabajan para la request
+        samples: Cantidad de veces que se vio cada pila (tupla de code objects)
+    """
+
+    def __init__(self, trigger: str) -> None:
+        self.trigger = trigger
+        self.threads: Set[int] = set()
+        self.samples: "Counter[Tuple[CodeType, ...]]" = Counter()
+        self.started_at = time.perf_counter()
+        self.total_samples = 0
+        self._lock = threading.Lock()
+
+    def add_thread(self, thread_id: int) -> None:
+        with self._lock:
+            self.threads.add(thread_id)
+
+    def remove_thread(self, thread_id: int) -> None:
+        with self._lock:
+            self.threads.discard(thread_id)
+
+    def thread_ids(self) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self.threads)
+
+    def record(self, stack: Tuple[CodeType, ...]) -> None:
+        with self._lock:
+            self.samples[stack] += 1
+            self.total_samples += 1
+
+    def collapsed(self) -> List[str]:
+        """Líneas en formato collapsed stacks, de la raíz a la hoja"""
+        with self._lock:
+            samples = self.samples.most_common()
+        labels: Dict[CodeType, str] = {}
+        lines = []
+        for stack, count in samples:
+            frames = []
+            for code in stack:
+                text = labels.get(code)
+                if text is None:
+                    text = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+                    text = labels[code] = text.replace(";", ",")
+                frames.append(text)
+            lines.append(";".join(frames) + f" {count}")
+        return lines
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    """Perfil de la request en curso (None si no se está perfilando)"""
+    return _current.get()
+
+
+def set_current_profile(profile: Optional[RequestProfile]):
+    return _current.set(profile)
+
+
+def reset_current_profile(token) -> None:
+    _current.reset(token)
+
+
+class StackSampler:
+    """
+    Hilo de muestreo compartido por todos los perfiles activos
+
+    Se crea en el primer perfil y queda dormido (sin consumir CPU) cuando
+    no hay ninguno en curso
+    """
+
+    def __init__(self, interval_ms: float = 5.0) -> None:
+        self._interval = max(interval_ms, 0.5) / 1000.0
+        self._active: Set[RequestProfile] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active.discard(profile)
+            if not self._active:
+                self._wake.clear()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            self._wake.wait()
+            with self._lock:
+                active = list(self._active)
+            if active:
+                frames = sys._current_frames()
+                for profile in active:
+                    for thread_id in profile.thread_ids():
+                        frame = frames.get(thread_id)
+                        if frame is not None and thread_id != own_id:
+                            profile.record(_stack(frame))
+                del frames
+            time.sleep(self._interval)
+
+
+def _stack(frame: Optional[FrameType]) -> Tuple[CodeType, ...]:
+    """Code objects de la pila, de la raíz a la hoja"""
+    codes: List[CodeType] = []
+    while frame is not None and len(codes) < _MAX_DEPTH:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    codes.reverse()
+    return tuple(codes)
+
+
+class ProfileStore:
+    """
+    Directorio de perfiles guardados (`.collapsed` + `.json` por request)
+
+    Conserva como mucho `max_files` perfiles, borrando los más viejos
+    """
+
+    def __init__(self, directory: str, max_files: int = 200) -> None:
+        self.directory = directory
+        self._max_files = max(max_files, 1)
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def new_name(self, method: str, path: str) -> str:
+        """Nombre único y seguro para el perfil de una request"""
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        slug = re.sub(r"[^0-9A-Za-z]+", "_", path).strip("_")[:40] or "root"
+        return f"{stamp}-{os.getpid()}-{next(self._counter)}-{method.lower()}-{slug}"
+
+    def save(self, name: str, profile: RequestProfile, meta: Dict[str, Any]) -> None:
+        """Escribe el perfil y su descripción, y aplica la retención"""
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, name)
+        with open(base + ".collapsed", "w", encoding="utf-8") as out:
+            out.write("\n".join(profile.collapsed()))
+            out.write("\n")
+        info = {
+            "name": name,
+            "trigger": profile.trigger,
+            "samples": profile.total_samples,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            **meta,
+        }
+        with open(base + ".json", "w", encoding="utf-8") as out:
+            json.dump(info, out, ensure_ascii=False)
+        self._prune()
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Descripción de los perfiles guardados, del más nuevo al más viejo"""
+        profiles: List[Dict[str, Any]] = []
+        for name in self._names():
+            try:
+                with open(os.path.join(self.directory, name + ".json"), encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def path_for(self, name: str) -> Optional[str]:
+        """Ruta del archivo collapsed, o None si el nombre no es válido o no existe"""
+        if not _NAME_PATTERN.match(name):
+            return None
+        path = os.path.join(self.directory, name + ".collapsed")
+        return path if os.path.isfile(path) else None
+
+    def _names(self) -> List[str]:
+        try:
+            entries = os.listdir(self.directory)
+        except OSError:
+            return []
+        return sorted((e[: -len(".collapsed")] for e in entries if e.endswith(".collapsed")), reverse=True)
+
+    def _prune(self) -> None:
+        with self._lock:
+            for name in self._names()[self._max_files:]:
+                for suffix in (".collapsed", ".json"):
+                    try:
+                        os.remove(os.path.join(self.directory, name + suffix))
+                    except OSError:
+                        pass
+
+
+class RequestProfiler:
+    """
+    Decide qué requests se perfilan y guarda el resultado
+
+    Args:
+        store: Dónde se guardan los perfiles
+        sampler: Hilo de muestreo
+        sample_every: Perfilar 1 de cada N requests (0 = solo a pedido)
+    """
+
+    def __init__(self, store: ProfileStore, sampler: StackSampler, sample_every: int = 0) -> None:
+        self.store = store
+        self.sampler = sampler
+        self._sample_every = max(sample_every, 0)
+        self._requests = itertools.count(1)
+
+    def should_sample(self) -> bool:
+        """True para 1 de cada `sample_every` requests"""
+        return self._sample_every > 0 and next(self._requests) % self._sample_every == 0
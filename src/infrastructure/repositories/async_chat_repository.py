@@ -0,0 +1,72 @@
+"""
+Implementación asíncrona de IAsyncChatRepository usando AsyncSession
+"""
+
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.domain.repositories import IAsyncChatRepository
+from src.domain.entities import ChatMessage, ConversationSummary
+from src.infrastructure.db.models import ChatSummaryModel
+from .chat_repository import (
+    apply_summary,
+    build_page_statement,
+    to_chat_messages,
+    to_chat_row,
+    to_summary,
+)
+
+
+class AsyncSqlAlchemyChatRepository(IAsyncChatRepository):
+    """
+    Repositorio de mensajes de chat basado en SQLAlchemy asíncrono
+
+    Usa las mismas consultas keyset que SqlAlchemyChatRepository
+    """
+
+    def __init__(self, db: AsyncSession, read_db: Optional[AsyncSession] = None) -> None:
+        self._db = db
+        self._read_db = read_db if read_db is not None else db
+
+    async def get_recent_messages(self, session_id: str, limit: int = 6) -> List[ChatMessage]:
+        """Obtiene los ultimos N mensajes de una sesión"""
+        return await self.get_messages_page(session_id=session_id, limit=limit)
+
+    async def get_messages_page(
+        self,
+        session_id: str,
+        limit: int,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+    ) -> List[ChatMessage]:
+        """Obtiene una página del historial usando el cursor indicado"""
+        stmt, descending = build_page_statement(session_id, limit, before, after)
+        result = await self._read_db.execute(stmt)
+        return to_chat_messages(result.all(), descending)
+
+    async def save_message(self, message: ChatMessage) -> ChatMessage:
+        """Persiste un mensaje de chat en la base de datos"""
+        return (await self.save_messages([message]))[0]
+
+    async def save_messages(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        """Persiste varios mensajes con un único commit y sin refresh por fila"""
+        rows = [to_chat_row(message) for message in messages]
+        self._db.add_all(rows)
+        await self._db.flush()
+        for message, row in zip(messages, rows):
+            message.id = row.id
+        await self._db.commit()
+        return messages
+
+    async def get_summary(self, session_id: str) -> Optional[ConversationSummary]:
+        """Obtiene el resumen acumulado de la sesión"""
+        row = await self._read_db.get(ChatSummaryModel, session_id)
+        return to_summary(row) if row is not None else None
+
+    async def save_summary(self, summary: ConversationSummary) -> None:
+        """Crea o reemplaza el resumen de la sesión"""
+        row = await self._db.get(ChatSummaryModel, summary.session_id)
+        if row is None:
+            row = ChatSummaryModel(session_id=summary.session_id)
+            self._db.add(row)
+        apply_summary(row, summary)
+        await self._db.commit()
@@ -0,0 +1,34 @@
+"""
+Implementación asíncrona de IAsyncProductRepository usando AsyncSession
+"""
+
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.domain.repositories import IAsyncProductRepository
+from src.domain.entities import Product
+from src.infrastructure.db.models import ProductModel
+from .product_repository import PRODUCT_COLUMNS, to_products
+
+
+class AsyncSqlAlchemyProductRepository(IAsyncProductRepository):
+    """
+    Repositorio de productos basado en SQLAlchemy asíncrono
+    """
+
+    def __init__(self, db: AsyncSession) -> None:
+        self._db = db
+
+    async def get_all(self) -> List[Product]:
+        """Obtiene todos los productos de la base de datos"""
+        return to_products(await self._db.execute(select(*PRODUCT_COLUMNS)))
+
+    async def get_by_id(self, product_id: int) -> Optional[Product]:
+        """Obtiene un producto por su ID"""
+        result = await self._db.execute(
+            select(*PRODUCT_COLUMNS).where(ProductModel.id == product_id)
+        )
+        row = result.first()
+        if row is None:
+            return None
+        return Product.from_trusted(*row)
@@ -0,0 +1,271 @@
+"""
+Caché en proceso del catálogo de productos
+
+CatalogCache guarda una instantánea inmutable del catálogo compartida entre
+requests; CachedProductRepository es un decorador de IProductRepository que
+lee de esa instantánea y delega las escrituras al repositorio real
+"""
+
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Awaitable, Callable, Mapping, Optional, Sequence, Tuple
+
+from src.domain.entities import Product, ProductPage, ProductQuery
+from src.domain.repositories import IAsyncProductRepository, IProductRepository
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    Instantánea inmutable del catálogo
+
+    Attributes:
+        generation: Número que aumenta cada vez que el catálogo cambia
+        fingerprint: Hash del contenido, estable entre procesos
+        products: Productos en el orden del repositorio
+        by_id: Vista de solo lectura `id -> Product`
+        loaded_at: Momento (monotónico) en que se cargó
+    """
+
+    generation: int
+    fingerprint: str
+    products: Tuple[Product, ...]
+    by_id: Mapping[int, Product] = field(repr=False)
+    loaded_at: float
+
+
+def catalog_fingerprint(products: Tuple[Product, ...]) -> str:
+    """Calcula un hash del contenido del catálogo"""
+    digest = hashlib.blake2b(digest_size=16)
+    for p in products:
+        digest.update(
+            f"{p.id}|{p.name}|{p.brand}|{p.category}|{p.size}|{p.color}|"
+            f"{p.price}|{p.stock}|{p.description}\n".encode("utf-8")
+        )
+    return digest.hexdigest()
+
+
+class CatalogCache:
+    """
+    Caché compartida del catálogo con TTL e invalidación explícita
+
+    La recarga usa el cargador que se le pase (normalmente el `get_all` del
+    repositorio de la request actual). La generación solo aumenta si el
+    contenido cambió o si hubo una escritura, de modo que otras cachés
+    pueden usarla como clave
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0) -> None:
+        self._ttl = ttl_seconds
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._stale = True
+        self._dirty = False
+        self._lock = threading.Lock()
+        # Versión barata para ETags: sello del origen releído por TTL
+        self._invalidations = 0
+        self._stamp: Optional[Tuple] = None
+        self._stamp_at = 0.0
+        self._stamp_seen = -1
+        self._stamp_lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Generación de la última instantánea cargada (0 si no hay)"""
+        snapshot = self._snapshot
+        return snapshot.generation if snapshot else 0
+
+    def version(
+        self,
+        stamp_loader: Callable[[], Optional[Tuple]],
+        loader: Callable[[], Sequence[Product]],
+    ) -> str:
+        """
+        Versión del catálogo para ETags y cuerpos cacheados, sin cargarlo
+
+        Usa un sello barato del origen (la versión que suben los triggers de
+        la base de datos), releído como mucho una vez por TTL o tras una
+        invalidación; es la misma en todos los workers. Si el origen no
+        tiene sello, usa el fingerprint de la instantánea
+
+        Args:
+            stamp_loader: Función que lee el sello del origen (o None)
+            loader: Función que lee el catálogo completo, para el fallback
+        """
+        if self._stamp_seen != self._invalidations or time.monotonic() - self._stamp_at >= self._ttl:
+            with self._stamp_lock:
+                if self._stamp_seen != self._invalidations or time.monotonic() - self._stamp_at >= self._ttl:
+                    seen = self._invalidations
+                    self._stamp = stamp_loader()
+                    self._stamp_at = time.monotonic()
+                    self._stamp_seen = seen
+        if self._stamp is None:
+            return self.get(loader).fingerprint
+        return ".".join(str(part) for part in self._stamp)
+
+    def get(self, loader: Callable[[], Sequence[Product]]) -> CatalogSnapshot:
+        """
+        Retorna la instantánea vigente, recargándola si expiró o se invalidó
+
+        Args:
+            loader: Función que lee el catálogo completo del origen
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and not self._needs_refresh(snapshot):
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and not self._needs_refresh(snapshot):
+                return snapshot
+            return self._reload(loader)
+
+    async def get_async(self, loader: Callable[[], Awaitable[Sequence[Product]]]) -> CatalogSnapshot:
+        """
+        Igual que `get` pero con un cargador asíncrono
+
+        La lectura se hace fuera del lock para no bloquear el event loop;
+        si dos corrutinas recargan a la vez, la última instantánea gana. Si
+        llega un `invalidate` mientras se lee, la instantánea se instala
+        pero queda vencida, para que la próxima lectura vuelva a cargar
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and not self._needs_refresh(snapshot):
+            return snapshot
+
+        seen = self._invalidations
+        products = await loader()
+        with self._lock:
+            return self._install(products, invalidated=self._invalidations != seen)
+
+    def invalidate(self, dirty: bool = False) -> None:
+        """
+        Marca la instantánea como vencida
+
+        Args:
+            dirty: True cuando se sabe que hubo una escritura; fuerza un
+                aumento de generación en la siguiente recarga
+        """
+        with self._lock:
+            self._stale = True
+            self._dirty = self._dirty or dirty
+            self._invalidations += 1
+
+    def _needs_refresh(self, snapshot: CatalogSnapshot) -> bool:
+        return self._stale or time.monotonic() - snapshot.loaded_at >= self._ttl
+
+    def _reload(self, loader: Callable[[], Sequence[Product]]) -> CatalogSnapshot:
+        return self._install(loader())
+
+    def _install(self, loaded: Sequence[Product], invalidated: bool = False) -> CatalogSnapshot:
+        """
+        Con el lock tomado: publica la instantánea cargada
+
+        Args:
+            invalidated: True si hubo un `invalidate` durante la carga; la
+                instantánea puede no reflejarlo y se deja vencida
+        """
+        products = tuple(loaded)
+        fingerprint = catalog_fingerprint(products)
+        previous = self._snapshot
+        generation = previous.generation if previous else 0
+        if previous is None or self._dirty or previous.fingerprint != fingerprint:
+            generation += 1
+
+        snapshot = CatalogSnapshot(
+            generation=generation,
+            fingerprint=fingerprint,
+            products=products,
+            by_id=MappingProxyType({p.id: p for p in products}),
+            loaded_at=time.monotonic(),
+        )
+        self._snapshot = snapshot
+        if not invalidated:
+            self._stale = False
+            self._dirty = False
+        return snapshot
+
+
+class CachedProductRepository(IProductRepository):
+    """
+    Decorador de IProductRepository que sirve las lecturas desde CatalogCache
+
+    Las entidades de la instantánea se comparten entre requests y no deben
+    modificarse; las escrituras pasan al repositorio interno e invalidan la
+    caché
+    """
+
+    def __init__(self, inner: IProductRepository, cache: CatalogCache) -> None:
+        self._inner = inner
+        self._cache = cache
+
+    def snapshot(self) -> CatalogSnapshot:
+        """Instantánea vigente del catálogo"""
+        return self._cache.get(self._inner.get_all)
+
+    def get_all(self) -> Tuple[Product, ...]:
+        """Obtiene todos los productos desde la caché (la tupla compartida, sin copiarla)"""
+        return self.snapshot().products
+
+    def get_by_id(self, product_id: int) -> Optional[Product]:
+        """Obtiene un producto por su ID desde la caché"""
+        return self.snapshot().by_id.get(product_id)
+
+    def version(self) -> str:
+        """Versión barata del catálogo (no carga la instantánea)"""
+        return self._cache.version(self._inner.catalog_stamp, self._inner.get_all)
+
+    def search(self, query: ProductQuery) -> ProductPage:
+        """
+        Delega la búsqueda en el repositorio interno
+
+        Filtros, orden y facetas se resuelven con los índices de la base de
+        datos en lugar de recorrer la instantánea
+        """
+        return self._inner.search(query)
+
+    def save(self, product: Product) -> Product:
+        """Guarda en el repositorio interno e invalida la caché"""
+        saved = self._inner.save(product)
+        self._cache.invalidate(dirty=True)
+        return saved
+
+    def delete(self, product_id: int) -> bool:
+        """Elimina en el repositorio interno e invalida la caché"""
+        deleted = self._inner.delete(product_id)
+        if deleted:
+            self._cache.invalidate(dirty=True)
+        return deleted
+
+    def catalog_version(self) -> Optional[int]:
+        """Generación de la instantánea vigente"""
+        return self.snapshot().generation
+
+
+class CachedAsyncProductRepository(IAsyncProductRepository):
+    """
+    Decorador de IAsyncProductRepository que comparte la misma CatalogCache
+    que el repositorio sincrónico
+    """
+
+    def __init__(self, inner: IAsyncProductRepository, cache: CatalogCache) -> None:
+        self._inner = inner
+        self._cache = cache
+
+    async def snapshot(self) -> CatalogSnapshot:
+        """Instantánea vigente del catálogo"""
+        return await self._cache.get_async(self._inner.get_all)
+
+    async def get_all(self) -> Tuple[Product, ...]:
+        """Obtiene todos los productos desde la caché (la tupla compartida, sin copiarla)"""
+        return (await self.snapshot()).products
+
+    async def get_by_id(self, product_id: int) -> Optional[Product]:
+        """Obtiene un producto por su ID desde la caché"""
+        return (await self.snapshot()).by_id.get(product_id)
+
+    def catalog_version(self) -> Optional[int]:
+        """Generación de la última instantánea cargada"""
+        return self._cache.generation
@@ -2,52 +2,177 @@
 Implementación concreta de IChatRepository usando SQLAlchemy
 """
 
-from typing import List
+from typing import List, Optional, Sequence, Tuple
+from sqlalchemy import Select, and_, or_, select
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 from src.domain.repositories import IChatRepository
-from src.domain.entities import ChatMessage
-from src.infrastructure.db.models import ChatMessageModel
+from src.domain.entities import ChatMessage, ConversationSummary
+from src.infrastructure.db.models import ChatMessageModel, ChatSummaryModel
+
+
+# Columnas en el orden de los campos de ChatMessage (lecturas como tuplas de Core)
+CHAT_COLUMNS = (
+    ChatMessageModel.id,
+    ChatMessageModel.session_id,
+    ChatMessageModel.role,
+    ChatMessageModel.message,
+    ChatMessageModel.timestamp,
+)
+
+
+def _keyset_condition(session_id: str, cursor_id: int, older: bool):
+    """
+    Construye la condición (timestamp, id) < / > cursor
+
+    El timestamp del cursor se resuelve con una subconsulta por clave
+    primaria. Si el cursor no pertenece a la sesión la condición no
+    coincide con ninguna fila
+    """
+    cursor_ts = (
+        select(ChatMessageModel.timestamp)
+        .where(
+            ChatMessageModel.id == cursor_id,
+            ChatMessageModel.session_id == session_id,
+        )
+        .scalar_subquery()
+    )
+    if older:
+        return or_(
+            ChatMessageModel.timestamp < cursor_ts,
+            and_(ChatMessageModel.timestamp == cursor_ts, ChatMessageModel.id < cursor_id),
+        )
+    return or_(
+        ChatMessageModel.timestamp > cursor_ts,
+        and_(ChatMessageModel.timestamp == cursor_ts, ChatMessageModel.id > cursor_id),
+    )
+
+
+def build_page_statement(
+    session_id: str,
+    limit: int,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+) -> Tuple[Select, bool]:
+    """
+    Construye la consulta keyset de una página del historial
+
+    Compartida por los repositorios sincrónico y asíncrono
+
+    Returns:
+        tuple[Select, bool]: La consulta y si viene en orden descendente
+        (en cuyo caso hay que invertir las filas)
+    """
+    stmt = select(*CHAT_COLUMNS).where(ChatMessageModel.session_id == session_id)
+    if before is not None:
+        stmt = stmt.where(_keyset_condition(session_id, before, older=True))
+    if after is not None:
+        # Avanzando hacia mensajes nuevos: orden ascendente desde el cursor
+        stmt = stmt.where(_keyset_condition(session_id, after, older=False))
+        stmt = stmt.order_by(ChatMessageModel.timestamp.asc(), ChatMessageModel.id.asc())
+        return stmt.limit(limit), False
+
+    # Últimos mensajes (o anteriores al cursor): orden descendente
+    stmt = stmt.order_by(ChatMessageModel.timestamp.desc(), ChatMessageModel.id.desc())
+    return stmt.limit(limit), True
+
+
+def to_chat_row(message: ChatMessage) -> ChatMessageModel:
+    """Convierte la entidad de dominio en una fila ORM nueva"""
+    return ChatMessageModel(
+        session_id=message.session_id,
+        role=message.role,
+        message=message.message,
+        timestamp=message.timestamp or datetime.now(timezone.utc),
+    )
+
+
+def to_chat_messages(rows: Sequence[Tuple], descending: bool) -> List[ChatMessage]:
+    """
+    Convierte tuplas de CHAT_COLUMNS en entidades sin revalidarlas,
+    en orden cronológico
+    """
+    trusted = ChatMessage.from_trusted
+    ordered = reversed(rows) if descending else rows
+    return [trusted(*row) for row in ordered]
+
+
+def to_summary(row: ChatSummaryModel) -> ConversationSummary:
+    """Convierte una fila ORM de resumen en la entidad de dominio"""
+    return ConversationSummary(
+        session_id=row.session_id,
+        summary=row.summary,
+        covered_until_id=row.covered_until_id,
+        message_count=row.message_count,
+        updated_at=row.updated_at,
+    )
+
+
+def apply_summary(row: ChatSummaryModel, summary: ConversationSummary) -> None:
+    """Copia los campos del resumen a la fila ORM"""
+    row.summary = summary.summary
+    row.covered_until_id = summary.covered_until_id
+    row.message_count = summary.message_count
+    row.updated_at = summary.updated_at
 
 
 class SqlAlchemyChatRepository(IChatRepository):
     """
     Repositorio de mensajes de chat basado en SQLAlchemy
+
+    Las lecturas usan el índice compuesto (session_id, timestamp, id) con
+    ORDER BY ... LIMIT, de modo que el costo no crece con el largo de la sesión.
+    Con `read_db` las lecturas van a esa sesión (réplica) y las escrituras a `db`
     """
 
-    def __init__(self, db: Session) -> None:
+    def __init__(self, db: Session, read_db: Optional[Session] = None) -> None:
         self._db = db
+        self._read_db = read_db if read_db is not None else db
 
     def get_recent_messages(self, session_id: str, limit: int = 6) -> List[ChatMessage]:
         """Obtiene los ultimos N mensajes de una sesión"""
-        rows = (
-            self._db.query(ChatMessageModel)
-            .filter(ChatMessageModel.session_id == session_id)
-            .order_by(ChatMessageModel.timestamp.asc())
-            .all()
-        )
-        rows = rows[-limit:]
-        return [
-            ChatMessage(
-                id=row.id,
-                session_id=row.session_id,
-                role=row.role,
-                message=row.message,
-                timestamp=row.timestamp,
-            )
-            for row in rows
-        ]
+        return self.get_messages_page(session_id=session_id, limit=limit)
+
+    def get_messages_page(
+        self,
+        session_id: str,
+        limit: int,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+    ) -> List[ChatMessage]:
+        """Obtiene una página del historial usando el cursor indicado"""
+        stmt, descending = build_page_statement(session_id, limit, before, after)
+        return to_chat_messages(self._read_db.execute(stmt).all(), descending)
 
     def save_message(self, message: ChatMessage) -> ChatMessage:
         """Persiste un mensaje de chat en la base de datos"""
-        row = ChatMessageModel(
-            session_id=message.session_id,
-            role=message.role,
-            message=message.message,
-            timestamp=message.timestamp or datetime.now(timezone.utc),
-        )
-        self._db.add(row)
+        return self.save_messages([message])[0]
+
+    def save_messages(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        """
+        Persiste varios mensajes con un único commit
+
+        Los ids se leen tras el flush (dentro de la transacción), asi que no
+        hace falta un refresh por fila despues del commit
+        """
+        rows = [to_chat_row(message) for message in messages]
+        self._db.add_all(rows)
+        self._db.flush()
+        for message, row in zip(messages, rows):
+            message.id = row.id
+        self._db.commit()
+        return messages
+
+    def get_summary(self, session_id: str) -> Optional[ConversationSummary]:
+        """Obtiene el resumen acumulado de la sesión"""
+        row = self._read_db.get(ChatSummaryModel, session_id)
+        return to_summary(row) if row is not None else None
+
+    def save_summary(self, summary: ConversationSummary) -> None:
+        """Crea o reemplaza el resumen de la sesión"""
+        row = self._db.get(ChatSummaryModel, summary.session_id)
+        if row is None:
+            row = ChatSummaryModel(session_id=summary.session_id)
+            self._db.add(row)
+        apply_summary(row, summary)
         self._db.commit()
-        self._db.refresh(row)
-        message.id = row.id
-        return message
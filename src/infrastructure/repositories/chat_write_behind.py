@@ -0,0 +1,317 @@
+"""
+Escritura diferida (write-behind) de mensajes de chat con group commit
+
+Un hilo de fondo junta los mensajes de muchas requests y los guarda con un
+único commit cada N milisegundos o M filas, lo que reduce los fsync y la
+contención por el lock de escritura de SQLite. Los decoradores de
+repositorio encolan las escrituras; los mensajes recientes que arman el
+contexto del LLM combinan lo guardado con lo que sigue pendiente, pero el
+historial paginado solo muestra mensajes confirmados: los pendientes aún no
+tienen id y no servirían como cursor `before`/`after`
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from src.domain.entities import ChatMessage, ConversationSummary
+from src.domain.repositories import IAsyncChatRepository, IChatRepository
+from src.infrastructure.observability.metrics import CHAT_WRITE_DROPPED_ROWS
+from .chat_repository import to_chat_row
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class ChatWriteBehind:
+    """
+    Cola acotada con un escritor de fondo que hace group commit
+
+    Args:
+        session_factory: Crea las sesiones del escritor (SessionLocal)
+        batch_interval_ms: Espera máxima para juntar un lote
+        batch_max_rows: Filas a partir de las cuales se escribe sin esperar
+        queue_size: Cantidad máxima de turnos encolados
+    """
+
+    _MAX_RETRIES = 3
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        batch_interval_ms: float = 50.0,
+        batch_max_rows: int = 200,
+        queue_size: int = 10_000,
+    ) -> None:
+        self._session_factory = session_factory
+        self._interval = batch_interval_ms / 1000.0
+        self._max_rows = batch_max_rows
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._pending: Dict[str, List[ChatMessage]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"batches": 0, "rows": 0, "rejected": 0, "failed_rows": 0}
+
+    def start(self) -> None:
+        """Arranca el hilo escritor si no está corriendo"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="chat-write-behind", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Escribe todo lo pendiente y detiene el hilo (para el apagado)"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        self._thread = None
+
+    def submit(self, messages: List[ChatMessage], timeout: float = 0.0) -> bool:
+        """
+        Encola los mensajes de un turno
+
+        Args:
+            timeout: Segundos a esperar si la cola está llena (0 = no esperar)
+
+        Returns:
+            bool: False si la cola estaba llena; el llamador debe escribir
+            de forma sincrónica
+        """
+        if self._thread is None:
+            self.start()
+        with self._lock:
+            for message in messages:
+                self._pending.setdefault(message.session_id, []).append(message)
+        try:
+            if timeout > 0:
+                self._queue.put(messages, timeout=timeout)
+            else:
+                self._queue.put_nowait(messages)
+            return True
+        except queue.Full:
+            self._forget(messages)
+            with self._lock:
+                self._stats["rejected"] += 1
+            return False
+
+    def pending_for(self, session_id: str) -> List[ChatMessage]:
+        """Mensajes de la sesión que aún no se confirmaron en la base"""
+        with self._lock:
+            return list(self._pending.get(session_id, ()))
+
+    def stats(self) -> Dict[str, int]:
+        """Lotes escritos, filas, turnos rechazados por cola llena y tamaño actual"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize()
+        return stats
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch: List[ChatMessage] = list(first)
+            deadline = time.monotonic() + self._interval
+            while len(batch) < self._max_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.extend(item)
+            self._write(batch)
+
+        # Vaciar lo que quede en la cola antes de salir
+        leftover: List[ChatMessage] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.extend(item)
+        if leftover:
+            self._write(leftover)
+
+    def _write(self, batch: List[ChatMessage]) -> None:
+        for attempt in range(1, self._MAX_RETRIES + 1):
+            db = self._session_factory()
+            try:
+                rows = [to_chat_row(message) for message in batch]
+                db.add_all(rows)
+                db.flush()
+                for message, row in zip(batch, rows):
+                    message.id = row.id
+                db.commit()
+                with self._lock:
+                    self._stats["batches"] += 1
+                    self._stats["rows"] += len(batch)
+                break
+            except Exception:
+                db.rollback()
+                # Los ids asignados en el flush no llegaron a confirmarse
+                for message in batch:
+                    message.id = None
+                if attempt == self._MAX_RETRIES:
+                    logger.exception(
+                        "[ChatWriteBehind] Se descartan %d mensajes de %d sesiones tras %d intentos",
+                        len(batch),
+                        len({message.session_id for message in batch}),
+                        attempt,
+                    )
+                    CHAT_WRITE_DROPPED_ROWS.inc(len(batch))
+                    with self._lock:
+                        self._stats["failed_rows"] += len(batch)
+                else:
+                    logger.warning(
+                        "[ChatWriteBehind] Error al guardar lote (%d/%d), se reintenta",
+                        attempt,
+                        self._MAX_RETRIES,
+                        exc_info=True,
+                    )
+                    time.sleep(0.05 * attempt)
+            finally:
+                db.close()
+        self._forget(batch)
+
+    def _forget(self, messages: List[ChatMessage]) -> None:
+        with self._lock:
+            for message in messages:
+                pending = self._pending.get(message.session_id)
+                if not pending:
+                    continue
+                try:
+                    pending.remove(message)
+                except ValueError:
+                    pass
+                if not pending:
+                    del self._pending[message.session_id]
+
+
+def merge_pending(rows: List[ChatMessage], pending: List[ChatMessage], limit: int) -> List[ChatMessage]:
+    """
+    Combina los últimos mensajes leídos de la base con los pendientes
+
+    Los pendientes son siempre los más nuevos de la sesión. Se descartan
+    los que ya aparecen en la base (confirmados entre la lectura de
+    pendientes y la consulta): el escritor asigna el id antes del commit,
+    asi que un pendiente con id presente en `rows` ya está guardado
+    """
+    if not pending:
+        return rows
+    stored = {m.id for m in rows}
+    fresh = [m for m in pending if m.id is None or m.id not in stored]
+    if not fresh:
+        return rows
+    return (rows + fresh)[-limit:]
+
+
+class WriteBehindChatRepository(IChatRepository):
+    """
+    Decorador de IChatRepository que escribe a través de ChatWriteBehind
+
+    Si la cola está llena tras una breve espera, escribe de forma
+    sincrónica con el repositorio interno
+    """
+
+    def __init__(self, inner: IChatRepository, writer: ChatWriteBehind, put_timeout: float = 0.05) -> None:
+        self._inner = inner
+        self._writer = writer
+        self._put_timeout = put_timeout
+
+    def get_recent_messages(self, session_id: str, limit: int = 6) -> List[ChatMessage]:
+        """Obtiene los ultimos N mensajes incluyendo los pendientes"""
+        pending = self._writer.pending_for(session_id)
+        rows = self._inner.get_recent_messages(session_id, limit)
+        return merge_pending(rows, pending, limit)
+
+    def get_messages_page(
+        self,
+        session_id: str,
+        limit: int,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+    ) -> List[ChatMessage]:
+        """Página del historial con solo los mensajes confirmados (todos con id)"""
+        return self._inner.get_messages_page(session_id, limit, before=before, after=after)
+
+    def save_message(self, message: ChatMessage) -> ChatMessage:
+        """Encola un mensaje"""
+        return self.save_messages([message])[0]
+
+    def save_messages(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        """Encola los mensajes; el id se asigna cuando el lote se confirma"""
+        if self._writer.submit(messages, timeout=self._put_timeout):
+            return messages
+        return self._inner.save_messages(messages)
+
+    def get_summary(self, session_id: str) -> Optional[ConversationSummary]:
+        """Delega en el repositorio interno"""
+        return self._inner.get_summary(session_id)
+
+    def save_summary(self, summary: ConversationSummary) -> None:
+        """Delega en el repositorio interno (los resúmenes no pasan por la cola)"""
+        self._inner.save_summary(summary)
+
+
+class AsyncWriteBehindChatRepository(IAsyncChatRepository):
+    """
+    Decorador de IAsyncChatRepository que escribe a través de ChatWriteBehind
+
+    Nunca bloquea el event loop: si la cola está llena escribe con el
+    repositorio asíncrono interno
+    """
+
+    def __init__(self, inner: IAsyncChatRepository, writer: ChatWriteBehind) -> None:
+        self._inner = inner
+        self._writer = writer
+
+    async def get_recent_messages(self, session_id: str, limit: int = 6) -> List[ChatMessage]:
+        """Obtiene los ultimos N mensajes incluyendo los pendientes"""
+        pending = self._writer.pending_for(session_id)
+        rows = await self._inner.get_recent_messages(session_id, limit)
+        return merge_pending(rows, pending, limit)
+
+    async def get_messages_page(
+        self,
+        session_id: str,
+        limit: int,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+    ) -> List[ChatMessage]:
+        """Página del historial con solo los mensajes confirmados (todos con id)"""
+        return await self._inner.get_messages_page(session_id, limit, before=before, after=after)
+
+    async def save_message(self, message: ChatMessage) -> ChatMessage:
+        """Encola un mensaje"""
+        return (await self.save_messages([message]))[0]
+
+    async def save_messages(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        """Encola los mensajes o, si la cola está llena, los escribe directamente"""
+        if self._writer.submit(messages):
+            return messages
+        return await self._inner.save_messages(messages)
+
+    async def get_summary(self, session_id: str) -> Optional[ConversationSummary]:
+        """Delega en el repositorio interno"""
+        return await self._inner.get_summary(session_id)
+
+    async def save_summary(self, summary: ConversationSummary) -> None:
+        """Delega en el repositorio interno (los resúmenes no pasan por la cola)"""
+        await self._inner.save_summary(summary)
@@ -2,52 +2,189 @@
 Implementación concreta de IProductRepository usando SQLAlchemy
 """
 
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import Select, and_, func, or_, select
 from sqlalchemy.orm import Session
 from src.domain.repositories import IProductRepository
-from src.domain.entities import Product
-from src.infrastructure.db.models import ProductModel
+from src.domain.entities import PRODUCT_FACETS, PRODUCT_SORTS, Product, ProductPage, ProductQuery
+from src.infrastructure.db.models import CatalogVersionModel, ProductModel
+
+
+# Columnas en el orden de los campos de Product: las lecturas seleccionan
+# tuplas de Core (sin objetos ORM ni identity map) y las pasan tal cual a
+# Product.from_trusted
+PRODUCT_COLUMNS = (
+    ProductModel.id,
+    ProductModel.name,
+    ProductModel.brand,
+    ProductModel.category,
+    ProductModel.size,
+    ProductModel.color,
+    ProductModel.price,
+    ProductModel.stock,
+    ProductModel.description,
+)
+
+
+def to_products(rows: Iterable[Tuple]) -> List[Product]:
+    """Convierte tuplas de PRODUCT_COLUMNS en entidades sin revalidarlas"""
+    trusted = Product.from_trusted
+    return [trusted(*row) for row in rows]
+
+
+def apply_product(row: ProductModel, product: Product) -> None:
+    """Copia los campos de la entidad a la fila ORM"""
+    row.name = product.name
+    row.brand = product.brand
+    row.category = product.category
+    row.size = product.size
+    row.color = product.color
+    row.price = product.price
+    row.stock = product.stock
+    row.description = product.description
+
+
+def _filter_conditions(query: ProductQuery, exclude: Optional[str] = None) -> list:
+    """
+    Condiciones WHERE de los filtros de la búsqueda
+
+    Args:
+        exclude: Campo de faceta cuyo filtro se omite, para que su conteo
+            muestre también los valores alternativos
+    """
+    conditions = []
+    for name, values in (
+        ("brand", query.brands),
+        ("category", query.categories),
+        ("size", query.sizes),
+        ("color", query.colors),
+    ):
+        if values and name != exclude:
+            column = getattr(ProductModel, name)
+            conditions.append(column == values[0] if len(values) == 1 else column.in_(values))
+    if query.min_price is not None:
+        conditions.append(ProductModel.price >= query.min_price)
+    if query.max_price is not None:
+        conditions.append(ProductModel.price <= query.max_price)
+    if query.in_stock:
+        conditions.append(ProductModel.stock > 0)
+    return conditions
+
+
+def build_search_statement(query: ProductQuery) -> Select:
+    """
+    Construye la consulta keyset de una página del catálogo
+
+    Ordena por (campo, id) y pide una fila más que el límite para saber si
+    hay otra página
+    """
+    field_name, descending = PRODUCT_SORTS[query.sort]
+    column = getattr(ProductModel, field_name)
+    stmt = select(*PRODUCT_COLUMNS).where(*_filter_conditions(query))
+    if query.after is not None:
+        value, last_id = query.after
+        if field_name == "id":
+            stmt = stmt.where(ProductModel.id < last_id if descending else ProductModel.id > last_id)
+        elif descending:
+            stmt = stmt.where(
+                or_(column < value, and_(column == value, ProductModel.id < last_id))
+            )
+        else:
+            stmt = stmt.where(
+                or_(column > value, and_(column == value, ProductModel.id > last_id))
+            )
+    if field_name == "id":
+        order = [ProductModel.id.desc() if descending else ProductModel.id.asc()]
+    elif descending:
+        order = [column.desc(), ProductModel.id.desc()]
+    else:
+        order = [column.asc(), ProductModel.id.asc()]
+    return stmt.order_by(*order).limit(query.limit + 1)
+
+
+def build_facet_statements(query: ProductQuery) -> Dict[str, Select]:
+    """Una consulta GROUP BY por faceta, cada una sin el filtro de su propio campo"""
+    statements = {}
+    for name in PRODUCT_FACETS:
+        column = getattr(ProductModel, name)
+        statements[name] = (
+            select(column, func.count())
+            .where(*_filter_conditions(query, exclude=name))
+            .group_by(column)
+            .order_by(column)
+        )
+    return statements
+
+
+def build_count_statement(query: ProductQuery) -> Select:
+    """Cantidad de productos que cumplen todos los filtros"""
+    return select(func.count()).select_from(ProductModel).where(*_filter_conditions(query))
 
 
 class SqlAlchemyProductRepository(IProductRepository):
     """
     Repositorio de productos basado en SQLAlchemy
+
+    Args:
+        db: Sesión del primario (escrituras)
+        read_db: Sesión para las lecturas (réplica); por defecto `db`
     """
 
-    def __init__(self, db: Session) -> None:
+    def __init__(self, db: Session, read_db: Optional[Session] = None) -> None:
         self._db = db
+        self._read_db = read_db if read_db is not None else db
 
     def get_all(self) -> List[Product]:
         """Obtiene todos los productos de la base de datos"""
-        rows = self._db.query(ProductModel).all()
-        return [
-            Product(
-                id=row.id,
-                name=row.name,
-                brand=row.brand,
-                category=row.category,
-                size=row.size,
-                color=row.color,
-                price=row.price,
-                stock=row.stock,
-                description=row.description,
-            )
-            for row in rows
-        ]
+        return to_products(self._read_db.execute(select(*PRODUCT_COLUMNS)))
+
+    def catalog_stamp(self) -> Optional[Tuple[int]]:
+        """Versión que los triggers de `products` suben en cada escritura (None si no existe)"""
+        version = self._read_db.scalar(
+            select(CatalogVersionModel.version).where(CatalogVersionModel.id == 1)
+        )
+        return None if version is None else (version,)
+
+    def save(self, product: Product) -> Product:
+        """Inserta el producto si no tiene id o actualiza la fila existente"""
+        row = self._db.get(ProductModel, product.id) if product.id is not None else None
+        if row is None:
+            row = ProductModel(id=product.id)
+            self._db.add(row)
+        apply_product(row, product)
+        self._db.commit()
+        product.id = row.id
+        return product
+
+    def delete(self, product_id: int) -> bool:
+        """Elimina un producto por su ID"""
+        row = self._db.get(ProductModel, product_id)
+        if row is None:
+            return False
+        self._db.delete(row)
+        self._db.commit()
+        return True
 
     def get_by_id(self, product_id: int) -> Optional[Product]:
         """Obtiene un producto por su ID"""
-        row = self._db.query(ProductModel).filter(ProductModel.id == product_id).first()
-        if not row:
+        row = self._read_db.execute(
+            select(*PRODUCT_COLUMNS).where(ProductModel.id == product_id)
+        ).first()
+        if row is None:
             return None
-        return Product(
-            id=row.id,
-            name=row.name,
-            brand=row.brand,
-            category=row.category,
-            size=row.size,
-            color=row.color,
-            price=row.price,
-            stock=row.stock,
-            description=row.description,
+        return Product.from_trusted(*row)
+
+    def search(self, query: ProductQuery) -> ProductPage:
+        """Busca productos resolviendo filtros, orden, cursor y facetas en SQL"""
+        rows = self._read_db.execute(build_search_statement(query)).all()
+        page = ProductPage(
+            products=to_products(rows[: query.limit]),
+            has_more=len(rows) > query.limit,
         )
+        if query.with_facets:
+            page.total = self._read_db.scalar(build_count_statement(query))
+            page.facets = {
+                name: {value: count for value, count in self._read_db.execute(stmt)}
+                for name, stmt in build_facet_statements(query).items()
+            }
+        return page
@@ -0,0 +1,50 @@
+"""
+Contrato común de los índices de productos usados para armar el prompt
+"""
+
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional, Tuple
+
+from src.domain.entities import Product
+
+
+class IProductIndex(ABC):
+    """
+    Interface de un índice de búsqueda sobre el catálogo
+
+    Las implementaciones (BM25, vectorial) se sincronizan con el repositorio
+    de productos y devuelven los productos más relevantes para un texto
+    """
+
+    top_k: int
+    _synced_version: Optional[int] = None
+
+    def ensure_synced(self, products: Iterable[Product], version: Optional[int]) -> bool:
+        """
+        Sincroniza solo si la versión del catálogo cambió desde la última vez
+
+        Sin versión (None) siempre se sincroniza de forma incremental
+
+        Returns:
+            bool: True si hubo cambios en el índice
+        """
+        if version is not None and version == self._synced_version:
+            return False
+        changed = self.sync(products)
+        self._synced_version = version
+        return changed
+
+    @abstractmethod
+    def sync(self, products: Iterable[Product]) -> bool:
+        """Sincroniza el índice con el catálogo; retorna True si hubo cambios"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def search(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        min_score: Optional[float] = None,
+    ) -> List[Tuple[Product, float]]:
+        """Retorna los productos más relevantes con su puntaje"""
+        raise NotImplementedError
@@ -0,0 +1,191 @@
+"""
+Índice invertido en memoria con puntuación BM25 sobre el catálogo
+
+Se usa para elegir qué productos entran en el prompt del LLM: en lugar de
+enviar el catálogo completo, solo se envían los top-k más relevantes para el
+mensaje del usuario y el historial reciente
+"""
+
+import math
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.domain.entities import Product
+from .base import IProductIndex
+from .text import tokenize
+
+# Peso de cada campo: los tokens de un campo se cuentan `peso` veces
+FIELD_WEIGHTS: Dict[str, int] = {
+    "name": 3,
+    "brand": 2,
+    "category": 2,
+    "color": 1,
+    "size": 1,
+    "description": 1,
+}
+
+
+def _product_signature(product: Product) -> Tuple:
+    """Tupla con los campos indexados, para detectar productos modificados"""
+    return tuple(getattr(product, field) for field in FIELD_WEIGHTS)
+
+
+class BM25ProductIndex(IProductIndex):
+    """
+    Índice invertido BM25 de productos
+
+    Mantiene postings `termino -> {product_id: tf}` y la longitud de cada
+    documento. Admite altas, modificaciones y bajas incrementales y es
+    seguro para usarse desde varios hilos
+    """
+
+    def __init__(
+        self,
+        top_k: int = 5,
+        min_score: float = 0.0,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ) -> None:
+        self.top_k = top_k
+        self.min_score = min_score
+        self._k1 = k1
+        self._b = b
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_terms: Dict[int, Counter] = {}
+        self._doc_len: Dict[int, int] = {}
+        self._total_len = 0
+        self._products: Dict[int, Product] = {}
+        self._signatures: Dict[int, Tuple] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def rebuild(self, products: Iterable[Product]) -> None:
+        """Descarta el índice actual y lo reconstruye con los productos dados"""
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_len.clear()
+            self._products.clear()
+            self._signatures.clear()
+            self._total_len = 0
+            for product in products:
+                self._add(product)
+
+    def sync(self, products: Iterable[Product]) -> bool:
+        """
+        Sincroniza el índice con el catálogo de forma incremental
+
+        Solo reindexa los productos nuevos o modificados y elimina los que ya
+        no existen
+
+        Returns:
+            bool: True si hubo algún cambio
+        """
+        with self._lock:
+            seen = set()
+            changed = False
+            for product in products:
+                seen.add(product.id)
+                if self._signatures.get(product.id) != _product_signature(product):
+                    self._upsert(product)
+                    changed = True
+                else:
+                    # Stock o precio pueden cambiar sin afectar los términos
+                    self._products[product.id] = product
+            for product_id in [pid for pid in self._products if pid not in seen]:
+                self._remove(product_id)
+                changed = True
+            return changed
+
+    def upsert(self, product: Product) -> None:
+        """Agrega o actualiza un producto en el índice"""
+        with self._lock:
+            self._upsert(product)
+
+    def remove(self, product_id: int) -> None:
+        """Elimina un producto del índice si existe"""
+        with self._lock:
+            self._remove(product_id)
+
+    def search(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        min_score: Optional[float] = None,
+    ) -> List[Tuple[Product, float]]:
+        """
+        Busca los productos más relevantes para la consulta
+
+        Args:
+            query (str): Texto libre (mensaje del usuario e historial)
+            k (int | None): Máximo de resultados; por defecto `top_k`
+            min_score (float | None): Puntaje mínimo; por defecto `min_score`
+
+        Returns:
+            list[tuple[Product, float]]: Productos y puntaje, de mayor a menor
+        """
+        k = self.top_k if k is None else k
+        min_score = self.min_score if min_score is None else min_score
+        terms = set(tokenize(query))
+        if not terms or k <= 0:
+            return []
+
+        with self._lock:
+            n_docs = len(self._products)
+            if n_docs == 0:
+                return []
+            avg_len = self._total_len / n_docs
+            scores: Dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for product_id, tf in postings.items():
+                    norm = self._k1 * (1 - self._b + self._b * self._doc_len[product_id] / avg_len)
+                    scores[product_id] = scores.get(product_id, 0.0) + idf * tf * (self._k1 + 1) / (tf + norm)
+
+            ranked = sorted(
+                ((pid, score) for pid, score in scores.items() if score > min_score),
+                key=lambda item: item[1],
+                reverse=True,
+            )[:k]
+            return [(self._products[pid], score) for pid, score in ranked]
+
+    def _upsert(self, product: Product) -> None:
+        if product.id in self._products:
+            self._remove(product.id)
+        self._add(product)
+
+    def _add(self, product: Product) -> None:
+        terms: Counter = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(str(getattr(product, field) or "")):
+                terms[token] += weight
+
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[product.id] = tf
+        length = sum(terms.values())
+        self._doc_terms[product.id] = terms
+        self._doc_len[product.id] = length
+        self._total_len += length
+        self._products[product.id] = product
+        self._signatures[product.id] = _product_signature(product)
+
+    def _remove(self, product_id: int) -> None:
+        terms = self._doc_terms.pop(product_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(product_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_len -= self._doc_len.pop(product_id)
+        self._products.pop(product_id, None)
+        self._signatures.pop(product_id, None)
@@ -0,0 +1,495 @@
+"""
+Motor local de consultas estructuradas sobre el catálogo
+
+Interpreta mensajes en español como "¿tienen talla 42 en negro?", "Nike por
+menos de 130" o "¿hay stock del Ultraboost?": extrae marca, talla, color,
+categoría, rango de precio y nombre de producto, y responde desde índices
+por atributo precalculados sobre el catálogo, sin llamar al LLM.
+
+Cada consulta recibe una confianza según qué parte del mensaje se pudo
+interpretar; el servicio de chat solo responde localmente las consultas
+con confianza alta y el resto sigue yendo al LLM
+"""
+
+import bisect
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from src.domain.entities import Product
+from .text import STOPWORDS, normalize_text
+
+_TOKEN_RE = re.compile(r"\d{1,3}(?:\.\d{3})+|\d+(?:[.,]\d+)?|[a-z]+")
+
+# Variantes de colores frecuentes -> color canónico (normalizado)
+COLOR_SYNONYMS: Dict[str, str] = {
+    "negro": "negro", "negra": "negro", "negros": "negro", "negras": "negro",
+    "blanco": "blanco", "blanca": "blanco", "blancos": "blanco", "blancas": "blanco",
+    "azul": "azul", "azules": "azul",
+    "rojo": "rojo", "roja": "rojo", "rojos": "rojo", "rojas": "rojo",
+    "verde": "verde", "verdes": "verde",
+    "gris": "gris", "grises": "gris",
+    "amarillo": "amarillo", "amarilla": "amarillo", "amarillos": "amarillo",
+    "rosado": "rosado", "rosada": "rosado", "rosa": "rosado",
+    "cafe": "cafe", "marron": "cafe",
+    "beige": "beige", "morado": "morado", "morada": "morado",
+    "naranja": "naranja",
+}
+
+# Palabras que describen una categoría -> categoría canónica (normalizada)
+CATEGORY_SYNONYMS: Dict[str, str] = {
+    "running": "running", "correr": "running", "trotar": "running", "corredores": "running",
+    "runner": "running",
+    "casual": "casual", "casuales": "casual", "diario": "casual",
+    "formal": "formal", "formales": "formal", "vestir": "formal",
+    "futbol": "futbol", "guayos": "futbol",
+    "basketball": "basketball", "baloncesto": "basketball", "basket": "basketball",
+    "training": "training", "gimnasio": "training", "gym": "training", "entrenamiento": "training",
+}
+
+# Palabras que indican una pregunta por disponibilidad o por precio
+_STOCK_WORDS = frozenset({"stock", "disponible", "disponibles", "quedan", "queda", "existencias", "inventario", "unidades"})
+_PRICE_WORDS = frozenset({"precio", "precios", "cuesta", "cuestan", "vale", "valen", "valor", "cuanto"})
+
+# Palabras de la estructura de la pregunta que no restan confianza
+_STRUCTURE_WORDS = frozenset(
+    {
+        "talla", "tallas", "numero", "num", "color", "colores", "marca", "marcas",
+        "categoria", "tipo", "modelo", "modelos", "zapato", "zapatos", "zapatilla",
+        "zapatillas", "tenis", "calzado", "producto", "productos", "opciones",
+        "menos", "mas", "debajo", "encima", "hasta", "desde", "entre", "maximo",
+        "minimo", "menor", "mayor", "barato", "baratos", "baratas", "pesos",
+        "dolares", "usd", "cop", "mil", "tienen", "tiene", "hay", "tengan", "venden",
+        "ver", "muestrame", "mostrar", "dame", "necesito", "alguno", "algunos",
+        "tambien", "del", "las", "los", "unos", "unas", "sus", "cual", "cuales",
+        "son", "esta", "estan", "ustedes",
+    }
+) | _STOCK_WORDS | _PRICE_WORDS
+
+# Un mensaje que empieza así depende de la conversación anterior
+_FOLLOW_UP_STARTS = frozenset({"y", "e", "pero", "entonces", "ese", "esa", "esos", "esas", "eso", "otra", "otro"})
+
+_SIZE_CUES = frozenset({"talla", "tallas", "numero", "num", "n", "size"})
+_MAX_PRICE_CUES = (("por", "debajo", "de"), ("menos", "de"), ("menor", "a"), ("menor", "de"), ("hasta",), ("maximo",), ("max",))
+_MIN_PRICE_CUES = (("por", "encima", "de"), ("mas", "de"), ("mayor", "a"), ("mayor", "de"), ("desde",), ("minimo",))
+_PRICE_UNITS = frozenset({"pesos", "dolares", "usd", "cop", "mil"})
+_SIZE_RANGE = (15.0, 50.0)
+
+
+@dataclass
+class ParsedQuery:
+    """
+    Consulta interpretada
+
+    Attributes:
+        brands, sizes, colors, categories: Valores normalizados pedidos
+        product_ids: Productos nombrados explícitamente
+        min_price, max_price: Rango de precio (inclusive)
+        intent: 'stock', 'price' o 'search'
+        confidence: Fracción (0-1) del mensaje que se pudo interpretar
+        follow_up: True si el mensaje depende del contexto anterior
+    """
+
+    brands: Set[str] = field(default_factory=set)
+    sizes: Set[str] = field(default_factory=set)
+    colors: Set[str] = field(default_factory=set)
+    categories: Set[str] = field(default_factory=set)
+    product_ids: Set[int] = field(default_factory=set)
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    intent: str = "search"
+    confidence: float = 0.0
+    follow_up: bool = False
+
+    @property
+    def has_filters(self) -> bool:
+        """True si se reconoció al menos un atributo"""
+        return bool(
+            self.brands or self.sizes or self.colors or self.categories or self.product_ids
+            or self.min_price is not None or self.max_price is not None
+        )
+
+
+def _size_key(value: str) -> str:
+    """Normaliza una talla: '42,0' y '42' son la misma"""
+    value = value.replace(",", ".")
+    try:
+        number = float(value)
+    except ValueError:
+        return normalize_text(value).strip()
+    return str(int(number)) if number.is_integer() else str(number)
+
+
+def _freeze(index: Dict[str, Set[int]]) -> Dict[str, FrozenSet[int]]:
+    return {key: frozenset(ids) for key, ids in index.items()}
+
+
+def _parse_number(token: str) -> Optional[float]:
+    if re.fullmatch(r"\d{1,3}(?:\.\d{3})+", token):
+        return float(token.replace(".", ""))
+    try:
+        return float(token.replace(",", "."))
+    except ValueError:
+        return None
+
+
+class CatalogQueryEngine:
+    """
+    Índices por atributo sobre el catálogo y respuestas locales
+
+    Se sincroniza con el catálogo igual que los índices de búsqueda (solo
+    cuando cambia su versión) y es seguro entre hilos: cada sincronización
+    arma índices nuevos y los publica de una vez
+
+    Args:
+        min_confidence: Confianza mínima para responder sin el LLM
+        max_results: Productos a listar en una respuesta
+    """
+
+    def __init__(self, min_confidence: float = 0.8, max_results: int = 5) -> None:
+        self.min_confidence = min_confidence
+        self.max_results = max_results
+        self._synced_version: Optional[int] = None
+        self._lock = threading.Lock()
+        self._products: Dict[int, Product] = {}
+        self._order: Dict[int, int] = {}
+        self._by_brand: Dict[str, FrozenSet[int]] = {}
+        self._by_size: Dict[str, FrozenSet[int]] = {}
+        self._by_color: Dict[str, FrozenSet[int]] = {}
+        self._by_category: Dict[str, FrozenSet[int]] = {}
+        self._by_name_token: Dict[str, FrozenSet[int]] = {}
+        self._name_vocab: Dict[int, FrozenSet[str]] = {}
+        self._brand_by_token: Dict[str, str] = {}
+        self._prices: List[Tuple[float, int]] = []
+        self._labels: Dict[str, Dict[str, str]] = {}
+        self._stats = {"parsed": 0, "answered": 0}
+
+    @property
+    def is_synced(self) -> bool:
+        """True si ya se indexó algún catálogo"""
+        return bool(self._products)
+
+    # Sincronización
+
+    def ensure_synced(self, products: Iterable[Product], version: Optional[int]) -> bool:
+        """Reconstruye los índices solo si la versión del catálogo cambió"""
+        if version is not None and version == self._synced_version:
+            return False
+        self.rebuild(products)
+        self._synced_version = version
+        return True
+
+    def rebuild(self, products: Iterable[Product]) -> None:
+        """Construye los índices por atributo desde cero"""
+        catalog = list(products)
+        by_brand: Dict[str, Set[int]] = {}
+        by_size: Dict[str, Set[int]] = {}
+        by_color: Dict[str, Set[int]] = {}
+        by_category: Dict[str, Set[int]] = {}
+        name_tokens: Dict[str, Set[int]] = {}
+        name_vocab: Dict[int, FrozenSet[str]] = {}
+        brand_by_token: Dict[str, str] = {}
+        labels: Dict[str, Dict[str, str]] = {"brand": {}, "color": {}, "category": {}}
+
+        for p in catalog:
+            brand = normalize_text(p.brand).strip()
+            color = normalize_text(p.color).strip()
+            category = normalize_text(p.category).strip()
+            by_brand.setdefault(brand, set()).add(p.id)
+            by_size.setdefault(_size_key(p.size), set()).add(p.id)
+            by_color.setdefault(COLOR_SYNONYMS.get(color, color), set()).add(p.id)
+            by_category.setdefault(CATEGORY_SYNONYMS.get(category, category), set()).add(p.id)
+            labels["brand"][brand] = p.brand
+            labels["color"][COLOR_SYNONYMS.get(color, color)] = p.color
+            labels["category"][CATEGORY_SYNONYMS.get(category, category)] = p.category
+            brand_tokens = set(_TOKEN_RE.findall(brand))
+            for token in brand_tokens:
+                if token not in STOPWORDS:
+                    brand_by_token.setdefault(token, brand)
+            vocab = frozenset(_TOKEN_RE.findall(normalize_text(p.name)))
+            name_vocab[p.id] = vocab
+            for token in vocab:
+                if token not in brand_tokens and token not in STOPWORDS:
+                    name_tokens.setdefault(token, set()).add(p.id)
+
+        # Solo los tokens de nombre poco frecuentes identifican un producto
+        limit = max(2, len(catalog) // 20)
+        distinctive = {
+            token: frozenset(ids)
+            for token, ids in name_tokens.items()
+            if len(ids) <= limit
+            and len(token) >= 3
+            and token not in COLOR_SYNONYMS
+            and token not in CATEGORY_SYNONYMS
+            and token not in _STRUCTURE_WORDS
+        }
+
+        with self._lock:
+            self._products = {p.id: p for p in catalog}
+            self._order = {p.id: i for i, p in enumerate(catalog)}
+            self._by_brand = _freeze(by_brand)
+            self._by_size = _freeze(by_size)
+            self._by_color = _freeze(by_color)
+            self._by_category = _freeze(by_category)
+            self._by_name_token = distinctive
+            self._name_vocab = name_vocab
+            self._brand_by_token = brand_by_token
+            self._prices = sorted((p.price, p.id) for p in catalog)
+            self._labels = labels
+
+    # Interpretación
+
+    def parse(self, message: str) -> ParsedQuery:
+        """Extrae los atributos pedidos y calcula la confianza"""
+        tokens = _TOKEN_RE.findall(normalize_text(message))
+        query = ParsedQuery()
+        if not tokens:
+            return query
+        query.follow_up = tokens[0] in _FOLLOW_UP_STARTS
+        consumed = [False] * len(tokens)
+
+        def take(start: int, length: int = 1) -> None:
+            for position in range(start, min(start + length, len(tokens))):
+                consumed[position] = True
+
+        # Rangos de precio: "entre X y Y", "de X a Y", "menos de X", "desde X"
+        for i, token in enumerate(tokens):
+            if token == "entre" and i + 3 < len(tokens) and tokens[i + 2] in {"y", "a"}:
+                low, high = _parse_number(tokens[i + 1]), _parse_number(tokens[i + 3])
+                if low is not None and high is not None:
+                    query.min_price, query.max_price = min(low, high), max(low, high)
+                    take(i, 4)
+            for cues, is_max in ((_MAX_PRICE_CUES, True), (_MIN_PRICE_CUES, False)):
+                for cue in cues:
+                    end = i + len(cue)
+                    if tuple(tokens[i:end]) == cue and end < len(tokens):
+                        value = _parse_number(tokens[end])
+                        if value is None:
+                            continue
+                        if end + 1 < len(tokens) and tokens[end + 1] == "mil":
+                            value *= 1000
+                        if is_max:
+                            query.max_price = value
+                        else:
+                            query.min_price = value
+                        take(i, len(cue) + 1)
+
+        for i, token in enumerate(tokens):
+            if token in _PRICE_UNITS:
+                consumed[i] = True
+            if consumed[i]:
+                continue
+            if token in _SIZE_CUES and i + 1 < len(tokens) and _parse_number(tokens[i + 1]) is not None:
+                query.sizes.add(_size_key(tokens[i + 1]))
+                take(i, 2)
+            elif token in self._brand_by_token:
+                query.brands.add(self._brand_by_token[token])
+                consumed[i] = True
+            elif token in COLOR_SYNONYMS:
+                query.colors.add(COLOR_SYNONYMS[token])
+                consumed[i] = True
+            elif token in CATEGORY_SYNONYMS or token in self._by_category:
+                query.categories.add(CATEGORY_SYNONYMS.get(token, token))
+                consumed[i] = True
+            elif token in self._by_name_token:
+                query.product_ids.update(self._by_name_token[token])
+                consumed[i] = True
+                # El resto del nombre ("Ultraboost 21", "Air Zoom") no es otro atributo
+                vocab = frozenset().union(*(self._name_vocab.get(p, frozenset()) for p in self._by_name_token[token]))
+                for j in range(i + 1, len(tokens)):
+                    if tokens[j] not in vocab:
+                        break
+                    consumed[j] = True
+
+        # Un número suelto en el rango de tallas es una talla
+        for i, token in enumerate(tokens):
+            if consumed[i]:
+                continue
+            number = _parse_number(token)
+            if number is not None and _SIZE_RANGE[0] <= number <= _SIZE_RANGE[1]:
+                query.sizes.add(_size_key(token))
+                consumed[i] = True
+
+        words = set(tokens)
+        if words & _STOCK_WORDS or (query.product_ids and words & {"hay", "tienen"}):
+            query.intent = "stock"
+        elif words & _PRICE_WORDS:
+            query.intent = "price"
+
+        content = [
+            i for i, token in enumerate(tokens)
+            if token not in STOPWORDS and token not in _STRUCTURE_WORDS
+        ]
+        understood = sum(1 for i in content if consumed[i])
+        query.confidence = understood / len(content) if content else 0.0
+        if query.follow_up:
+            query.confidence *= 0.5
+        with self._lock:
+            self._stats["parsed"] += 1
+        return query
+
+    # Respuestas
+
+    def match(self, query: ParsedQuery, products: Optional[Iterable[Product]] = None) -> List[Product]:
+        """
+        Productos que cumplen todos los atributos de la consulta
+
+        Usa los índices; si se pasan `products` filtra esa lista (útil
+        cuando el motor no está sincronizado)
+        """
+        if products is not None:
+            return [p for p in products if self._matches(p, query)]
+
+        with self._lock:
+            candidates: Optional[Set[int]] = None
+            for wanted, index in (
+                (query.brands, self._by_brand),
+                (query.sizes, self._by_size),
+                (query.colors, self._by_color),
+                (query.categories, self._by_category),
+            ):
+                if not wanted:
+                    continue
+                ids: Set[int] = set()
+                for value in wanted:
+                    ids |= index.get(value, frozenset())
+                candidates = ids if candidates is None else candidates & ids
+            if query.product_ids:
+                candidates = set(query.product_ids) if candidates is None else candidates & query.product_ids
+            if query.min_price is not None or query.max_price is not None:
+                low = query.min_price if query.min_price is not None else float("-inf")
+                high = query.max_price if query.max_price is not None else float("inf")
+                start = bisect.bisect_left(self._prices, (low, -1))
+                end = bisect.bisect_right(self._prices, (high, float("inf")))
+                ids = {product_id for _, product_id in self._prices[start:end]}
+                candidates = ids if candidates is None else candidates & ids
+            if candidates is None:
+                return []
+            order = self._order
+            return [self._products[i] for i in sorted(candidates, key=lambda i: order.get(i, 0))]
+
+    def answer_if_confident(self, message: str) -> Optional[str]:
+        """Responde localmente si la consulta es estructurada y clara"""
+        query = self.parse(message)
+        if not query.has_filters or query.follow_up or query.confidence < self.min_confidence:
+            return None
+        answer = self.answer(query)
+        with self._lock:
+            self._stats["answered"] += 1
+        return answer
+
+    def answer(self, query: ParsedQuery, products: Optional[Iterable[Product]] = None) -> str:
+        """Redacta la respuesta a una consulta ya interpretada"""
+        matches = self.match(query, products)
+        description = self.describe(query)
+
+        if query.intent == "stock" and query.product_ids and matches:
+            lines = []
+            for p in matches[: self.max_results]:
+                if p.stock > 0:
+                    lines.append(
+                        f"Sí, el {p.name} está disponible: quedan {p.stock} unidades "
+                        f"(talla {p.size}, color {p.color}, ${p.price})"
+                    )
+                else:
+                    lines.append(f"Por ahora el {p.name} no tiene stock disponible")
+            return "\n".join(lines)
+
+        if query.intent == "price" and query.product_ids and matches:
+            return "\n".join(
+                f"El {p.name} cuesta ${p.price} (talla {p.size}, color {p.color})"
+                for p in matches[: self.max_results]
+            )
+
+        if not matches:
+            similar = self._similar(query, products)
+            if not similar:
+                return f"No encontré productos {description} en nuestro catálogo. ¿Quieres que te muestre otras opciones?"
+            lines = "\n".join(format_product_line(p) for p in similar)
+            return (
+                f"No encontré productos {description}, pero estas opciones cumplen "
+                f"parte de lo que buscas:\n{lines}"
+            )
+
+        shown = matches[: self.max_results]
+        lines = "\n".join(format_product_line(p) for p in shown)
+        count = len(matches)
+        header = f"Encontré {count} {'opción' if count == 1 else 'opciones'} {description}:"
+        if count > len(shown):
+            header = f"Encontré {count} opciones {description}; estas son las primeras {len(shown)}:"
+        return f"{header}\n{lines}"
+
+    def describe(self, query: ParsedQuery) -> str:
+        """Descripción en texto de los filtros ('de Nike, talla 42 ...')"""
+        labels = self._labels or {"brand": {}, "color": {}, "category": {}}
+        parts: List[str] = []
+        if query.product_ids:
+            names = [self._products[i].name for i in sorted(query.product_ids) if i in self._products]
+            if names:
+                parts.append("del modelo " + " / ".join(names))
+        if query.categories:
+            parts.append("de " + " o ".join(sorted(labels["category"].get(c, c) for c in query.categories)))
+        if query.brands:
+            parts.append("de " + " o ".join(sorted(labels["brand"].get(b, b) for b in query.brands)))
+        if query.sizes:
+            parts.append("en talla " + " o ".join(sorted(query.sizes)))
+        if query.colors:
+            parts.append("en color " + " o ".join(sorted(labels["color"].get(c, c) for c in query.colors)))
+        if query.min_price is not None and query.max_price is not None:
+            parts.append(f"entre ${query.min_price:g} y ${query.max_price:g}")
+        elif query.max_price is not None:
+            parts.append(f"por hasta ${query.max_price:g}")
+        elif query.min_price is not None:
+            parts.append(f"desde ${query.min_price:g}")
+        return " ".join(parts)
+
+    def stats(self) -> Dict[str, int]:
+        """Consultas interpretadas y respondidas localmente"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["indexed_products"] = len(self._products)
+        return stats
+
+    def _similar(self, query: ParsedQuery, products: Optional[Iterable[Product]], limit: int = 3) -> List[Product]:
+        """Productos que cumplen al menos uno de los atributos pedidos"""
+        catalog = list(products) if products is not None else None
+        relaxed = (
+            ParsedQuery(brands=query.brands),
+            ParsedQuery(product_ids=query.product_ids),
+            ParsedQuery(categories=query.categories),
+            ParsedQuery(sizes=query.sizes),
+            ParsedQuery(colors=query.colors),
+            ParsedQuery(min_price=query.min_price, max_price=query.max_price),
+        )
+        found: List[Product] = []
+        seen: Set[int] = set()
+        for partial in relaxed:
+            if not partial.has_filters:
+                continue
+            for p in self.match(partial, catalog):
+                if p.id not in seen:
+                    seen.add(p.id)
+                    found.append(p)
+                if len(found) >= limit:
+                    return found
+        return found
+
+    def _matches(self, p: Product, query: ParsedQuery) -> bool:
+        color = normalize_text(p.color).strip()
+        category = normalize_text(p.category).strip()
+        return (
+            (not query.brands or normalize_text(p.brand).strip() in query.brands)
+            and (not query.sizes or _size_key(p.size) in query.sizes)
+            and (not query.colors or COLOR_SYNONYMS.get(color, color) in query.colors)
+            and (not query.categories or CATEGORY_SYNONYMS.get(category, category) in query.categories)
+            and (not query.product_ids or p.id in query.product_ids)
+            and (query.min_price is None or p.price >= query.min_price)
+            and (query.max_price is None or p.price <= query.max_price)
+        )
+
+
+def format_product_line(p: Product) -> str:
+    """Línea de un producto en una respuesta local"""
+    stock = f"{p.stock} en stock" if p.stock > 0 else "sin stock"
+    return f"- {p.name} ({p.brand}) - {p.category}, talla {p.size}, color {p.color}, ${p.price} ({stock})"
@@ -0,0 +1,42 @@
+"""
+Utilidades de normalización de texto para los índices de búsqueda
+
+Se normaliza a minúsculas y sin tildes para que "Categoría" y "categoria"
+o "Pegasus" y "pegasus" coincidan
+"""
+
+import re
+import unicodedata
+from typing import List
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Palabras muy frecuentes en español que no aportan a la búsqueda
+STOPWORDS = frozenset(
+    {
+        "a", "al", "algo", "algun", "alguna", "alguno", "con", "de", "del", "el",
+        "en", "es", "esta", "este", "hay", "la", "las", "lo", "los", "me", "mi",
+        "para", "por", "que", "quiero", "se", "si", "sin", "su", "tienen", "un",
+        "una", "unas", "unos", "y", "o", "tu", "te", "busco", "hola", "the", "and",
+    }
+)
+
+
+def normalize_text(text: str) -> str:
+    """Pasa el texto a minúsculas y elimina tildes y diacríticos"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str, drop_stopwords: bool = True) -> List[str]:
+    """
+    Divide el texto en tokens alfanuméricos normalizados
+
+    Args:
+        text (str): Texto libre
+        drop_stopwords (bool): Si se descartan las palabras vacías
+    """
+    tokens = _TOKEN_RE.findall(normalize_text(text))
+    if drop_stopwords:
+        return [t for t in tokens if t not in STOPWORDS]
+    return tokens
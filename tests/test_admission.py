@@ -0,0 +1,92 @@
+"""
+Tests del control de admisión de llamadas al LLM
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.infrastructure.llm_providers.admission import AdmissionController, AdmissionRejected
+from src.infrastructure.observability.metrics import LLM_ADMISSION_SHED
+
+
+def test_concurrency_is_bounded_and_waiters_are_served():
+    controller = AdmissionController(max_concurrency=2, max_queue=10, deadline_ms=2000)
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with controller.slot():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = controller.stats()
+    assert max(peak) == 2
+    assert stats["admitted"] == 6 and stats["active"] == 0
+    assert stats["queued_total"] >= 1 and stats["wait_ms_max"] > 0
+
+
+def test_sheds_when_queue_is_full_or_deadline_expires():
+    queue_full = LLM_ADMISSION_SHED.value("queue_full")
+    timeouts = LLM_ADMISSION_SHED.value("timeout")
+    controller = AdmissionController(max_concurrency=1, max_queue=0, deadline_ms=50)
+    controller.acquire()
+    assert controller.in_flight == 1
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.acquire()
+    assert excinfo.value.reason == "queue_full"
+
+    waiting = AdmissionController(max_concurrency=1, max_queue=5, deadline_ms=30)
+    waiting.acquire()
+    with pytest.raises(AdmissionRejected) as excinfo:
+        waiting.acquire()
+    assert excinfo.value.reason == "timeout"
+    assert waiting.stats()["queue_depth"] == 0 == waiting.queue_depth
+    assert LLM_ADMISSION_SHED.value("queue_full") == queue_full + 1
+    assert LLM_ADMISSION_SHED.value("timeout") == timeouts + 1
+
+
+def test_async_waiter_gets_slot_released_by_another_task():
+    controller = AdmissionController(max_concurrency=1, max_queue=5, deadline_ms=1000)
+
+    async def scenario():
+        order = []
+
+        async def task(name):
+            async with controller.slot_async():
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(task("a"), task("b"), task("c"))
+        return order
+
+    assert asyncio.run(scenario()) == ["a", "b", "c"]
+    assert controller.stats()["active"] == 0
+
+
+def test_service_serves_fallback_when_request_is_shed():
+    from src.domain.entities import ChatContext
+    from src.infrastructure.llm_providers.gemini_service import GeminiService
+    from src.infrastructure.llm_providers.local_provider import LocalProvider
+
+    controller = AdmissionController(max_concurrency=1, max_queue=0)
+    service = GeminiService(provider=LocalProvider(), admission=controller)
+    controller.acquire()
+
+    text = service.generate_response("hola", [], ChatContext(messages=[]))
+
+    assert text == service._build_fallback_response("hola", [], ChatContext(messages=[]))
+    assert controller.stats()["shed_queue_full"] == 1
@@ -0,0 +1,57 @@
+"""
+Tests de la suite de benchmarks: estadísticas, datos sintéticos y una
+corrida mínima de los micro-benchmarks
+"""
+
+import json
+
+from benchmarks.common import latency_stats, percentile
+from benchmarks.compare import compare
+from benchmarks.data import catalog_lines, generate_session
+from benchmarks.load import parse_mix
+from benchmarks.micro import main as run_micro
+from src.infrastructure.db.catalog_import import iter_rows, parse_product_row
+
+
+def test_percentiles_interpolate_between_samples():
+    samples = [float(v) for v in range(1, 101)]
+
+    assert percentile(samples, 50) == 50.5
+    assert percentile(samples, 99) == 99.01
+    stats = latency_stats(samples)
+    assert stats["count"] == 100 and stats["min_ms"] == 1.0 and stats["max_ms"] == 100.0
+
+
+def test_synthetic_catalog_is_reproducible_and_valid():
+    first = list(catalog_lines(50, seed=7))
+
+    assert first == list(catalog_lines(50, seed=7))
+    products = [parse_product_row(raw) for _, raw in iter_rows(first, "csv")]
+    assert len(products) == 50
+    session = generate_session("s", 10)
+    assert [m.role for m in session[:2]] == ["user", "assistant"]
+
+
+def test_parse_mix_rejects_unknown_endpoints():
+    assert parse_mix("products=3,chat=1") == {"products": 3.0, "chat": 1.0}
+    try:
+        parse_mix("orders=1")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("se esperaba ValueError")
+
+
+def test_micro_run_writes_comparable_results(tmp_path, capsys):
+    out = tmp_path / "micro.json"
+    run_micro(["--sizes", "200", "--session-turns", "120", "--repeat", "3", "--scan-repeat", "1", "--out", str(out)])
+    capsys.readouterr()
+
+    document = json.loads(out.read_text(encoding="utf-8"))
+    names = {bench["name"] for bench in document["results"]["benchmarks"]}
+    assert {"product_repo.get_all", "dto.product_page_json", "prompt.retrieve_and_build", "chat_repo.page_before"} <= names
+    assert all("p99_ms" in bench for bench in document["results"]["benchmarks"])
+    assert document["results"]["peak_rss_mb"] > 0
+
+    rows, regressions = compare(document, document, threshold_pct=10.0)
+    assert rows and not regressions
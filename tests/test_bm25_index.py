@@ -0,0 +1,53 @@
+"""
+Tests del indice BM25 usado para elegir productos del prompt
+"""
+
+from src.domain.entities import Product
+from src.infrastructure.search.bm25_index import BM25ProductIndex
+
+
+def _product(pid: int, name: str, brand: str, category: str, color: str = "Negro") -> Product:
+    return Product(
+        id=pid,
+        name=name,
+        brand=brand,
+        category=category,
+        size="42",
+        color=color,
+        price=100.0,
+        stock=5,
+        description="Zapato de prueba",
+    )
+
+
+CATALOG = [
+    _product(1, "Nike Air Zoom Pegasus", "Nike", "Running"),
+    _product(2, "Adidas Ultraboost 21", "Adidas", "Running", color="Blanco"),
+    _product(3, "Puma Suede Classic", "Puma", "Casual", color="Azul"),
+]
+
+
+def test_search_ranks_matching_products_first():
+    index = BM25ProductIndex(top_k=2)
+    index.rebuild(CATALOG)
+    results = index.search("¿Tienen algo de Puma en azul?")
+    assert results[0][0].id == 3
+    assert all(score > 0 for _, score in results)
+
+
+def test_search_ignores_accents_and_case():
+    index = BM25ProductIndex()
+    index.rebuild([_product(1, "Botín Clásico", "Marca", "Casual")])
+    assert index.search("botin clasico")[0][0].id == 1
+
+
+def test_sync_applies_incremental_changes():
+    index = BM25ProductIndex()
+    index.rebuild(CATALOG)
+    renamed = _product(3, "Puma Future Rider", "Puma", "Casual", color="Azul")
+    changed = index.sync([CATALOG[0], renamed])
+    assert changed
+    assert len(index) == 2
+    assert index.search("ultraboost") == []
+    assert index.search("rider")[0][0].name == "Puma Future Rider"
+    assert not index.sync([CATALOG[0], renamed])
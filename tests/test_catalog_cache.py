@@ -0,0 +1,185 @@
+"""
+Tests de la caché del catálogo y su decorador de repositorio
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from src.domain.entities import Product
+from src.domain.repositories import IProductRepository
+from src.infrastructure.api.http_cache import CatalogResponseCache
+from src.infrastructure.db.models import Base
+from src.infrastructure.repositories.cached_product_repository import (
+    CachedProductRepository,
+    CatalogCache,
+)
+from src.infrastructure.repositories.product_repository import SqlAlchemyProductRepository
+
+
+class InMemoryProductRepository(IProductRepository):
+    """Repositorio en memoria que cuenta las lecturas completas"""
+
+    def __init__(self, products: List[Product]) -> None:
+        self.rows: Dict[int, Product] = {p.id: p for p in products}
+        self.loads = 0
+
+    def get_all(self) -> List[Product]:
+        self.loads += 1
+        return list(self.rows.values())
+
+    def get_by_id(self, product_id: int) -> Optional[Product]:
+        return self.rows.get(product_id)
+
+    def save(self, product: Product) -> Product:
+        self.rows[product.id] = product
+        return product
+
+    def delete(self, product_id: int) -> bool:
+        return self.rows.pop(product_id, None) is not None
+
+
+def _product(pid: int, stock: int = 5) -> Product:
+    return Product(
+        id=pid,
+        name=f"Zapato {pid}",
+        brand="Marca",
+        category="Casual",
+        size="40",
+        color="Negro",
+        price=50.0,
+        stock=stock,
+        description="Producto de prueba",
+    )
+
+
+def test_reads_are_served_from_snapshot():
+    inner = InMemoryProductRepository([_product(1), _product(2)])
+    repo = CachedProductRepository(inner, CatalogCache(ttl_seconds=60))
+    assert len(repo.get_all()) == 2
+    assert repo.get_by_id(2).id == 2
+    assert repo.get_by_id(99) is None
+    assert inner.loads == 1
+    assert repo.catalog_version() == 1
+
+
+def test_writes_bump_generation():
+    inner = InMemoryProductRepository([_product(1)])
+    repo = CachedProductRepository(inner, CatalogCache(ttl_seconds=60))
+    first = repo.catalog_version()
+    repo.save(_product(1, stock=3))
+    assert repo.catalog_version() == first + 1
+    assert repo.get_by_id(1).stock == 3
+    assert not repo.delete(42)
+    assert repo.catalog_version() == first + 1
+
+
+def test_ttl_refresh_keeps_generation_when_content_is_equal():
+    inner = InMemoryProductRepository([_product(1)])
+    cache = CatalogCache(ttl_seconds=0)
+    repo = CachedProductRepository(inner, cache)
+    assert repo.catalog_version() == 1
+    assert repo.catalog_version() == 1
+    assert inner.loads == 2
+
+    # Cambio hecho por otro proceso directamente en el origen
+    inner.rows[2] = _product(2)
+    assert repo.catalog_version() == 2
+
+
+class StampedProductRepository(InMemoryProductRepository):
+    """Agrega una versión que sube en cada escritura y cuenta sus lecturas"""
+
+    def __init__(self, products: List[Product]) -> None:
+        super().__init__(products)
+        self.stamps = 0
+        self.row_version = 0
+
+    def save(self, product: Product) -> Product:
+        self.row_version += 1
+        return super().save(product)
+
+    def catalog_stamp(self):
+        self.stamps += 1
+        return (self.row_version,)
+
+
+def test_version_does_not_load_the_snapshot():
+    inner = StampedProductRepository([_product(1), _product(2)])
+    repo = CachedProductRepository(inner, CatalogCache(ttl_seconds=60))
+
+    first = repo.version()
+    assert repo.version() == first == "0"
+    assert inner.loads == 0 and inner.stamps == 1
+
+    repo.save(_product(3))
+    assert repo.version() == "1"
+    assert inner.stamps == 2 and inner.loads == 0
+
+
+def test_version_rereads_stamp_after_ttl():
+    inner = StampedProductRepository([_product(1)])
+    repo = CachedProductRepository(inner, CatalogCache(ttl_seconds=0))
+    assert repo.version() == "0"
+
+    # Cambio de stock hecho por otro proceso: misma cantidad y mismo id máximo
+    inner.save(_product(1, stock=0))
+    assert repo.version() == "1"
+
+
+def test_version_falls_back_to_the_snapshot_fingerprint():
+    inner = InMemoryProductRepository([_product(1)])
+    repo = CachedProductRepository(inner, CatalogCache(ttl_seconds=0))
+    first = repo.version()
+
+    inner.rows[1] = _product(1, stock=0)
+    assert repo.version() != first
+
+
+def test_price_update_behind_the_cache_changes_the_etag():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    inner = SqlAlchemyProductRepository(Session(bind=engine))
+    inner.save(_product(1))
+    repo = CachedProductRepository(inner, CatalogCache(ttl_seconds=0))
+    before = CatalogResponseCache.etag_for(repo.version(), "/products/1")
+
+    # SQL directo, como otro worker o el importador: no pasa por la caché
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE products SET price = 99.0 WHERE id = 1"))
+
+    after = CatalogResponseCache.etag_for(repo.version(), "/products/1")
+    assert after != before
+    assert repo.get_by_id(1).price == 99.0
+
+
+def test_get_all_shares_the_snapshot_without_copying():
+    inner = InMemoryProductRepository([_product(1), _product(2)])
+    repo = CachedProductRepository(inner, CatalogCache(ttl_seconds=60))
+
+    assert repo.get_all() is repo.get_all()
+    assert isinstance(repo.get_all(), tuple)
+
+
+def test_invalidate_during_async_load_is_not_lost():
+    cache = CatalogCache(ttl_seconds=60)
+    rows = [_product(1)]
+
+    async def loader():
+        # Una escritura invalida la caché mientras se lee el catálogo
+        loaded = list(rows)
+        rows.append(_product(2))
+        cache.invalidate(dirty=True)
+        return loaded
+
+    async def current():
+        return list(rows)
+
+    first = asyncio.run(cache.get_async(loader))
+    assert [p.id for p in first.products] == [1]
+
+    second = asyncio.run(cache.get_async(current))
+    assert [p.id for p in second.products] == [1, 2]
+    assert second.generation == first.generation + 1
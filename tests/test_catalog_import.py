@@ -0,0 +1,170 @@
+"""
+Tests de la importación masiva del catálogo sobre SQLite en memoria
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+from sqlalchemy import create_engine, func, inspect, select
+from sqlalchemy.orm import Session
+
+from src.infrastructure.db.catalog_import import CatalogImporter, detect_format, sync_id_sequence
+from src.infrastructure.db.models import Base, ProductModel
+
+CSV = """id,name,brand,category,size,color,price,stock,description
+1,Pegasus,Nike,Running,42,Negro,120,5,Amortiguación
+,Suede,Puma,Casual,40,Azul,80,10,
+2,Sin precio,Adidas,Running,41,Blanco,0,3,x
+,Sin marca,,Casual,40,Azul,80,1,x
+3,Gel Nimbus,Asics,Running,43,Azul,140,2,x
+"""
+
+
+def _engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def test_csv_import_validates_and_reports_rejected_rows():
+    engine = _engine()
+
+    report = CatalogImporter(engine, batch_size=2).run(io.StringIO(CSV), "csv")
+
+    assert (report.rows_read, report.imported, report.rejected) == (5, 3, 2)
+    assert report.batches == 2
+    assert [e["line"] for e in report.errors] == [4, 5]
+    assert "precio" in report.errors[0]["error"]
+    with Session(engine) as db:
+        assert db.scalar(select(func.count()).select_from(ProductModel)) == 3
+
+
+def test_jsonl_import_upserts_by_id():
+    engine = _engine()
+    importer = CatalogImporter(engine)
+    row = {"id": 7, "name": "Pegasus", "brand": "Nike", "category": "Running",
+           "size": 42, "color": "Negro", "price": 120, "stock": 5}
+    importer.run(io.StringIO(json.dumps(row) + "\n"), "jsonl")
+
+    updated = dict(row, price=99.5, stock=0)
+    report = importer.run(io.StringIO(json.dumps(updated) + "\n{roto\n"), "jsonl")
+
+    assert (report.imported, report.rejected) == (1, 1)
+    with Session(engine) as db:
+        product = db.get(ProductModel, 7)
+        assert (product.price, product.stock, product.size) == (99.5, 0, "42")
+
+
+def test_detect_format():
+    assert detect_format("catalogo.jsonl") == "jsonl"
+    assert detect_format("", "application/x-ndjson") == "jsonl"
+    assert detect_format("catalogo.csv") == "csv"
+
+
+def test_mixed_rows_with_and_without_id_get_distinct_ids():
+    engine = _engine()
+    rows = [
+        {"id": 10, "name": "Pegasus", "brand": "Nike", "category": "Running",
+         "size": 42, "color": "Negro", "price": 120, "stock": 5},
+        {"name": "Suede", "brand": "Puma", "category": "Casual",
+         "size": 40, "color": "Azul", "price": 80, "stock": 10},
+    ]
+    report = CatalogImporter(engine).run(io.StringIO("\n".join(json.dumps(r) for r in rows)), "jsonl")
+
+    assert (report.imported, report.rejected) == (2, 0)
+    with Session(engine) as db:
+        ids = sorted(db.scalars(select(ProductModel.id)))
+        assert ids == [10, 11]
+        db.add(ProductModel(name="Nuevo", brand="Asics", category="Running", size="41",
+                            color="Gris", price=90, stock=1, description=""))
+        db.commit()
+        assert db.scalar(select(func.max(ProductModel.id))) == 12
+
+
+class _RecordingConnection:
+    def __init__(self, dialect_name):
+        self.dialect = type("Dialect", (), {"name": dialect_name})()
+        self.statements = []
+
+    def exec_driver_sql(self, sql):
+        self.statements.append(sql)
+
+
+def test_id_sequence_is_synced_only_on_postgresql():
+    postgres, sqlite = _RecordingConnection("postgresql"), _RecordingConnection("sqlite")
+
+    sync_id_sequence(postgres)
+    sync_id_sequence(sqlite)
+
+    assert len(postgres.statements) == 1 and "setval(pg_get_serial_sequence('products', 'id')" in postgres.statements[0]
+    assert sqlite.statements == []
+
+
+def test_non_finite_prices_and_fractional_stock_are_rejected():
+    base = {"name": "Pegasus", "brand": "Nike", "category": "Running", "size": 42, "color": "Negro"}
+    lines = [
+        dict(base, price="nan", stock=1),
+        dict(base, price="inf", stock=1),
+        dict(base, price=100, stock=3.5),
+        dict(base, price=100, stock=True),
+        dict(base, price=100, stock=4.0),
+    ]
+    engine = _engine()
+
+    report = CatalogImporter(engine).run(io.StringIO("\n".join(json.dumps(r) for r in lines)), "jsonl")
+
+    assert (report.imported, report.rejected) == (1, 4)
+    assert [e["line"] for e in report.errors] == [1, 2, 3, 4]
+    with Session(engine) as db:
+        assert db.scalar(select(ProductModel.stock)) == 4
+
+
+def test_fractional_and_boolean_ids_are_rejected():
+    base = {"name": "Pegasus", "brand": "Nike", "category": "Running", "size": 42, "color": "Negro", "price": 100, "stock": 1}
+    lines = [dict(base, id=3.5), dict(base, id=True), dict(base, id="2.5"), dict(base, id=7.0)]
+    engine = _engine()
+
+    report = CatalogImporter(engine).run(io.StringIO("\n".join(json.dumps(r) for r in lines)), "jsonl")
+
+    assert (report.imported, report.rejected) == (1, 3)
+    assert [e["line"] for e in report.errors] == [1, 2, 3]
+    with Session(engine) as db:
+        assert db.scalars(select(ProductModel.id)).all() == [7]
+
+
+def test_crash_during_deferred_import_keeps_the_indexes(tmp_path):
+    db_path = tmp_path / "catalogo.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    expected = {index["name"] for index in inspect(engine).get_indexes("products")}
+    engine.dispose()
+
+    # El proceso muere (sin finally ni rollback) a mitad de una carga inicial
+    script = textwrap.dedent(
+        f"""
+        import io, os
+        from sqlalchemy import create_engine
+        from src.infrastructure.db.catalog_import import CatalogImporter
+
+        class Crash(io.StringIO):
+            def __iter__(self):
+                yield "name,brand,category,size,color,price,stock\\n"
+                for _ in range(10):
+                    yield "Pegasus,Nike,Running,42,Negro,120,5\\n"
+                os._exit(1)
+
+        CatalogImporter(create_engine("sqlite:///{db_path}"), batch_size=2, commit_rows=2).run(Crash(), "csv")
+        """
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", script], cwd=root, env=dict(os.environ, PYTHONPATH=root))
+    assert result.returncode == 1
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    assert {index["name"] for index in inspect(engine).get_indexes("products")} == expected
+    with Session(engine) as db:
+        assert db.scalar(select(func.count()).select_from(ProductModel)) == 0
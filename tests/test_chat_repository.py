@@ -0,0 +1,52 @@
+"""
+Tests del repositorio de chat: paginación por cursor sobre SQLite en memoria
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.domain.entities import ChatMessage
+from src.infrastructure.db.models import Base
+from src.infrastructure.repositories.chat_repository import SqlAlchemyChatRepository
+
+
+def _make_repo(total: int) -> SqlAlchemyChatRepository:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    repo = SqlAlchemyChatRepository(Session(bind=engine))
+    start = datetime.now(timezone.utc)
+    for i in range(total):
+        repo.save_message(
+            ChatMessage(
+                id=None,
+                session_id="s1",
+                role="user" if i % 2 == 0 else "assistant",
+                message=f"m{i}",
+                # Dos mensajes por turno comparten timestamp; desempata el id
+                timestamp=start + timedelta(seconds=i // 2),
+            )
+        )
+    return repo
+
+
+def test_recent_messages_returns_last_in_order():
+    repo = _make_repo(10)
+    messages = repo.get_recent_messages("s1", limit=3)
+    assert [m.message for m in messages] == ["m7", "m8", "m9"]
+
+
+def test_messages_page_before_and_after_cursors():
+    repo = _make_repo(10)
+    latest = repo.get_messages_page("s1", limit=3)
+    older = repo.get_messages_page("s1", limit=3, before=latest[0].id)
+    assert [m.message for m in older] == ["m4", "m5", "m6"]
+
+    newer = repo.get_messages_page("s1", limit=2, after=older[-1].id)
+    assert [m.message for m in newer] == ["m7", "m8"]
+
+
+def test_messages_page_empty_for_unknown_session():
+    repo = _make_repo(4)
+    assert repo.get_messages_page("otra", limit=5) == []
@@ -0,0 +1,100 @@
+"""
+Tests de la escritura diferida del historial con group commit
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.domain.entities import ChatMessage
+from src.infrastructure.db.models import Base
+from src.infrastructure.repositories.chat_repository import SqlAlchemyChatRepository
+from src.infrastructure.repositories.chat_write_behind import (
+    ChatWriteBehind,
+    WriteBehindChatRepository,
+)
+from src.infrastructure.observability.metrics import CHAT_WRITE_DROPPED_ROWS
+
+
+def _turn(session_id: str, n: int):
+    now = datetime.now(timezone.utc) + timedelta(seconds=n)
+    return [
+        ChatMessage(id=None, session_id=session_id, role="user", message=f"u{n}", timestamp=now),
+        ChatMessage(id=None, session_id=session_id, role="assistant", message=f"a{n}", timestamp=now),
+    ]
+
+
+def _setup(tmp_path, **kwargs):
+    engine = create_engine(f"sqlite:///{tmp_path / 'chat.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    writer = ChatWriteBehind(factory, **kwargs)
+    repo = WriteBehindChatRepository(SqlAlchemyChatRepository(factory()), writer)
+    return writer, repo, SqlAlchemyChatRepository(factory())
+
+
+def test_pending_messages_are_visible_before_commit(tmp_path):
+    writer, repo, direct = _setup(tmp_path, batch_interval_ms=10_000, batch_max_rows=1000)
+    repo.save_messages(_turn("s1", 1))
+    assert [m.message for m in repo.get_recent_messages("s1")] == ["u1", "a1"]
+    assert direct.get_recent_messages("s1") == []
+    writer.stop()
+
+
+def test_paginated_history_only_lists_committed_messages(tmp_path):
+    writer, repo, _ = _setup(tmp_path, batch_interval_ms=10_000, batch_max_rows=1000)
+    repo.save_messages(_turn("s1", 1))
+    assert repo.get_messages_page("s1", limit=10) == []
+
+    writer.stop()
+    page = repo.get_messages_page("s1", limit=10)
+    assert [m.message for m in page] == ["u1", "a1"]
+    assert all(m.id is not None for m in page)
+
+
+def test_stop_flushes_batches_in_one_commit(tmp_path):
+    writer, repo, direct = _setup(tmp_path, batch_interval_ms=10_000, batch_max_rows=1000)
+    for n in range(5):
+        repo.save_messages(_turn("s1", n))
+    writer.stop()
+
+    stored = direct.get_recent_messages("s1", limit=20)
+    assert len(stored) == 10
+    assert writer.stats()["batches"] == 1
+    assert writer.pending_for("s1") == []
+    # Sin duplicados al combinar con pendientes ya confirmados
+    assert len(repo.get_recent_messages("s1", limit=20)) == 10
+
+
+def test_full_queue_falls_back_to_direct_write(tmp_path):
+    writer, repo, direct = _setup(tmp_path, queue_size=1)
+    writer._thread = object()  # Simula un escritor ocupado que no consume la cola
+    repo.save_messages(_turn("s1", 1))
+    repo.save_messages(_turn("s1", 2))
+    assert [m.message for m in direct.get_recent_messages("s1")] == ["u2", "a2"]
+    assert writer.stats()["rejected"] == 1
+
+
+class _FailingCommitSession(Session):
+    def commit(self) -> None:
+        raise OperationalError("COMMIT", {}, Exception("database is locked"))
+
+
+def test_failed_batch_is_logged_counted_and_ids_are_reset(tmp_path, caplog):
+    engine = create_engine(f"sqlite:///{tmp_path / 'chat.db'}")
+    Base.metadata.create_all(bind=engine)
+    writer = ChatWriteBehind(sessionmaker(bind=engine, class_=_FailingCommitSession))
+    batch = _turn("s1", 1)
+    dropped = CHAT_WRITE_DROPPED_ROWS.value()
+
+    with caplog.at_level(logging.WARNING, logger="src.infrastructure.repositories.chat_write_behind"):
+        writer._write(batch)
+
+    assert [m.id for m in batch] == [None, None]
+    assert CHAT_WRITE_DROPPED_ROWS.value() == dropped + 2
+    assert writer.stats()["failed_rows"] == 2
+    assert [r.levelno for r in caplog.records] == [logging.WARNING, logging.WARNING, logging.ERROR]
+    assert caplog.records[-1].exc_info is not None
@@ -0,0 +1,93 @@
+"""
+Tests del contexto con presupuesto de tokens y resumen acumulado
+"""
+
+from datetime import datetime, timezone
+
+from src.application.context_builder import ContextBudget, ContextBuilder
+from src.domain.entities import ChatMessage, Product
+from src.infrastructure.llm_providers.tokens import CharRatioTokenEstimator, WordTokenEstimator
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _message(message_id: int, text: str) -> ChatMessage:
+    role = "user" if message_id % 2 else "assistant"
+    return ChatMessage(id=message_id, session_id="s1", role=role, message=text, timestamp=NOW)
+
+
+def _product(product_id: int) -> Product:
+    return Product(
+        id=product_id,
+        name=f"Modelo {product_id}",
+        brand="Nike",
+        category="Running",
+        size="42",
+        color="Negro",
+        price=100.0,
+        stock=3,
+        description="",
+    )
+
+
+def test_word_estimator_counts_and_truncates():
+    estimator = WordTokenEstimator(chars_per_piece=6)
+    assert estimator.count("Hola, zapatillas") == 1 + 1 + 2
+    assert estimator.truncate("uno dos tres cuatro", 2) == "uno dos"
+
+
+def test_long_message_is_truncated_and_history_fits_budget():
+    builder = ContextBuilder(
+        CharRatioTokenEstimator(),
+        ContextBudget(total_tokens=400, history_ratio=0.5, template_tokens=0),
+    )
+    history = [_message(1, "corto"), _message(2, "x" * 5000)]
+
+    window = builder.build("hola", history, [_product(1)])
+
+    texts = [m.message for m in window.context.messages]
+    assert len(texts[-1]) < 500 and texts[-1].endswith("…")
+    assert window.tokens["history"] <= 199
+    assert window.products == [_product(1)]
+
+
+def test_overflow_is_folded_into_summary_and_not_repeated():
+    builder = ContextBuilder(
+        CharRatioTokenEstimator(),
+        ContextBudget(total_tokens=2000, max_messages=2, template_tokens=0),
+    )
+    history = [
+        _message(1, "Busco zapatillas Nike talla 42"),
+        _message(2, "Te recomiendo las Pegasus. Son muy comodas"),
+        _message(3, "y en color negro"),
+        _message(4, "Tenemos negro disponible"),
+    ]
+
+    window = builder.build("gracias", history, [])
+    assert [m.id for m in window.context.messages] == [3, 4]
+    assert [m.id for m in window.overflow] == [1, 2]
+
+    summary = builder.fold("s1", None, window.overflow, NOW)
+    assert summary.covered_until_id == 2 and summary.message_count == 2
+    assert "Nike talla 42" in summary.summary
+    assert "Pegasus" in summary.summary
+
+    again = builder.build("otra", history, [], summary)
+    assert [m.id for m in again.context.messages] == [3, 4]
+    assert again.overflow == []
+    assert again.context.format_for_prompt().startswith("Resumen de la conversación anterior:")
+    assert builder.fold("s1", summary, again.overflow, NOW) is None
+
+
+def test_catalog_uses_remaining_budget():
+    builder = ContextBuilder(
+        CharRatioTokenEstimator(),
+        ContextBudget(total_tokens=100, history_ratio=0.5, template_tokens=0),
+    )
+    products = [_product(i) for i in range(1, 20)]
+
+    window = builder.build("hola", [], products)
+
+    assert 1 <= len(window.products) < len(products)
+    assert window.products == products[: len(window.products)]
+    assert window.tokens["catalog"] <= 99
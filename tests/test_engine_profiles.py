@@ -0,0 +1,58 @@
+"""
+Tests de los perfiles del engine y del ruteo de lecturas a la réplica
+"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.config import get_settings
+from src.domain.entities import Product
+from src.infrastructure.db.engine_profiles import (
+    engine_options,
+    install_sqlite_pragmas,
+    resolve_profile,
+    sqlite_pragmas,
+)
+from src.infrastructure.db.models import Base
+from src.infrastructure.repositories.product_repository import SqlAlchemyProductRepository
+
+
+def test_resolve_profile_from_url():
+    assert resolve_profile("sqlite:///./data/x.db") == "sqlite"
+    assert resolve_profile("postgresql+psycopg2://u@h/db") == "postgresql"
+    assert resolve_profile("mysql://u@h/db") == "default"
+    assert resolve_profile("sqlite:///x.db", "default") == "default"
+
+
+def test_postgresql_profile_sizes_the_pool():
+    options = engine_options("postgresql", get_settings())
+    assert options["pool_pre_ping"] is True
+    assert {"pool_size", "max_overflow", "pool_timeout", "pool_recycle"} <= options.keys()
+
+
+def test_sqlite_pragmas_applied_on_connect(tmp_path):
+    url = f"sqlite:///{tmp_path / 'perfil.db'}"
+    engine = create_engine(url)
+    install_sqlite_pragmas(engine, sqlite_pragmas(get_settings(), url))
+
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA cache_size").scalar() < 0
+
+
+def test_memory_database_skips_wal():
+    assert "journal_mode" not in sqlite_pragmas(get_settings(), "sqlite://")
+
+
+def test_repository_reads_from_replica_and_writes_to_primary():
+    primary, replica = create_engine("sqlite://"), create_engine("sqlite://")
+    for engine in (primary, replica):
+        Base.metadata.create_all(bind=engine)
+    repo = SqlAlchemyProductRepository(Session(bind=primary), Session(bind=replica))
+
+    saved = repo.save(Product(None, "Pegasus", "Nike", "Running", "42", "Negro", 120.0, 5, "x"))
+
+    assert saved.id == 1
+    assert repo.get_by_id(1) is None  # la réplica todavía no lo tiene
+    assert repo.get_all() == []
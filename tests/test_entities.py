@@ -44,3 +44,15 @@ def test_chat_context_format():
     formatted = ctx.format_for_prompt()
     assert "Usuario: Hola" in formatted
     assert "Asistente: Hola, ¿en que te ayudo?" in formatted
+
+
+def test_trusted_construction_matches_validated_entities():
+    fields = (1, "Test Shoe", "Test", "Running", "42", "Negro", 100.0, 5, "Producto de prueba")
+    trusted = Product.from_trusted(*fields)
+    assert trusted == Product(*fields)
+    assert not hasattr(trusted, "__dict__")
+
+    now = datetime.utcnow()
+    message = ChatMessage.from_trusted(7, "s1", "user", "Hola", now)
+    assert message == ChatMessage(7, "s1", "user", "Hola", now)
+    assert message.is_from_user()
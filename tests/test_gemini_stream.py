@@ -0,0 +1,55 @@
+"""
+Tests del streaming de GeminiService con un proveedor falso
+"""
+
+from typing import AsyncIterator, Iterator
+
+from src.domain.entities import ChatContext, Product
+from src.infrastructure.llm_providers.base import ILLMProvider
+from src.infrastructure.llm_providers.gemini_service import GeminiService
+
+
+class _FailingMidStreamProvider(ILLMProvider):
+    """Emite un fragmento y luego falla, como un corte de red"""
+
+    name = "fake"
+
+    def generate(self, prompt: str) -> str:
+        raise ConnectionError("sin conexion")
+
+    async def generate_async(self, prompt: str) -> str:
+        raise ConnectionError("sin conexion")
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        yield "Hola, "
+        raise ConnectionError("stream cortado")
+
+    async def stream_async(self, prompt: str) -> AsyncIterator[str]:
+        yield "Hola, "
+        raise ConnectionError("stream cortado")
+
+
+PRODUCTS = [
+    Product(
+        id=1,
+        name="Puma Suede Classic",
+        brand="Puma",
+        category="Casual",
+        size="40",
+        color="Azul",
+        price=80.0,
+        stock=10,
+        description="Clasico",
+    )
+]
+
+
+def test_stream_falls_back_with_reset_after_partial_output():
+    service = GeminiService(provider=_FailingMidStreamProvider())
+    chunks = list(service.stream_response("hola", PRODUCTS, ChatContext(messages=[])))
+
+    assert chunks[0].text == "Hola, " and not chunks[0].reset
+    assert chunks[1].reset
+    assert not any(c.reset for c in chunks[2:])
+    fallback = "".join(c.text for c in chunks[1:])
+    assert fallback == service._build_fallback_response("hola", PRODUCTS, ChatContext(messages=[]))
@@ -0,0 +1,55 @@
+"""
+Tests de la caché HTTP del catálogo: ETag, negociación y cuerpos comprimidos
+"""
+
+import gzip
+
+from src.infrastructure.api.http_cache import (
+    CatalogResponseCache,
+    cache_key,
+    choose_encoding,
+    etag_matches,
+)
+
+BODY = b'{"items": [' + b'{"name": "Pegasus"},' * 200 + b"]}"
+
+
+def test_choose_encoding_respects_q_values():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding("*") == choose_encoding("gzip")
+    assert choose_encoding("") is None
+
+
+def test_etag_matches_weak_and_lists():
+    etag = CatalogResponseCache.etag_for("abc123", "/products")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"otro", {etag[2:]}', etag)
+    assert not etag_matches('W/"otro"', etag)
+    assert etag != CatalogResponseCache.etag_for("def456", "/products")
+
+
+def test_bodies_are_compressed_once_per_version():
+    cache = CatalogResponseCache(min_compress_bytes=100)
+    key = cache_key("/products", [("sort", "name"), ("brand", "Nike")])
+    assert key == "/products?brand=Nike&sort=name"
+
+    assert cache.get("v1", key) is None
+    entry = cache.put("v1", key, BODY)
+    body, encoding = cache.encoded_body(entry, "gzip")
+    assert encoding == "gzip" and gzip.decompress(body) == BODY
+
+    again, _ = cache.encoded_body(cache.get("v1", key), "gzip")
+    assert again is body
+    assert cache.stats()["compressions"] == 1
+
+    # Otra versión del catálogo descarta los cuerpos anteriores
+    assert cache.get("v2", key) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_small_bodies_are_not_compressed():
+    cache = CatalogResponseCache(min_compress_bytes=10_000)
+    cache.get("v1", "/products/1")
+    entry = cache.put("v1", "/products/1", BODY)
+    assert cache.encoded_body(entry, "gzip") == (BODY, None)
@@ -0,0 +1,20 @@
+"""
+Tests del proveedor local determinista
+"""
+
+from src.infrastructure.llm_providers.local_provider import LocalProvider
+
+PROMPT = "Catálogo de productos:\n- Puma Suede Classic | Marca: Puma\nUsuario: hola"
+
+
+def test_output_is_deterministic_and_sized():
+    provider = LocalProvider(output_words=20)
+    first = provider.generate(PROMPT)
+    assert first == provider.generate(PROMPT)
+    assert len(first.split()) == 20
+    assert "Puma Suede Classic" in first
+
+
+def test_stream_rebuilds_same_text():
+    provider = LocalProvider(output_words=25)
+    assert "".join(provider.stream(PROMPT)) == provider.generate(PROMPT)
@@ -0,0 +1,99 @@
+"""
+Tests del subsistema de métricas: histogramas, formato de Prometheus,
+etapas por request, middleware y contadores de fallback del LLM
+"""
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+
+from src.domain.entities import ChatContext
+from src.infrastructure.api.middleware import MetricsMiddleware
+from src.infrastructure.llm_providers.gemini_service import GeminiService
+from src.infrastructure.llm_providers.local_provider import LocalProvider
+from src.infrastructure.observability.metrics import (
+    HTTP_REQUEST_SECONDS,
+    LLM_ERRORS,
+    LLM_FALLBACKS,
+    MetricsRegistry,
+    current_request,
+    end_request,
+    install_query_metrics,
+    stage,
+    start_request,
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("op_seconds", "Duración", ("op",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.labels("read").observe(value)
+    registry.counter("errors_total", "Errores").inc(2)
+
+    lines = registry.render().splitlines()
+    assert 'op_seconds_bucket{op="read",le="0.1"} 1' in lines
+    assert 'op_seconds_bucket{op="read",le="1"} 3' in lines
+    assert 'op_seconds_bucket{op="read",le="+Inf"} 4' in lines
+    assert 'op_seconds_count{op="read"} 4' in lines
+    assert "# TYPE op_seconds histogram" in lines
+    assert "errors_total 2" in lines
+
+
+def test_stages_and_queries_accumulate_in_current_request():
+    engine = create_engine("sqlite://")
+    install_query_metrics(engine)
+    request_metrics, token = start_request()
+    try:
+        with stage("history_fetch"):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+        assert current_request() is request_metrics
+    finally:
+        end_request(token)
+
+    assert request_metrics.db_queries == 2
+    assert request_metrics.stages["history_fetch"] > 0
+    assert current_request() is None
+
+
+def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        with stage("lookup"):
+            return {"id": item_id}
+
+    app.add_middleware(MetricsMiddleware, timing_log=False)
+    before = HTTP_REQUEST_SECONDS.count("GET", "/items/{item_id}", "200")
+
+    async def run() -> None:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.get("/items/1")
+            await client.get("/items/2")
+
+    asyncio.run(run())
+
+    assert HTTP_REQUEST_SECONDS.count("GET", "/items/{item_id}", "200") == before + 2
+
+
+class _BrokenProvider(LocalProvider):
+    def generate(self, prompt: str) -> str:
+        raise ConnectionError("sin red")
+
+
+def test_llm_failures_count_errors_and_fallbacks():
+    service = GeminiService(provider=_BrokenProvider())
+    fallbacks = LLM_FALLBACKS.value("error")
+    errors = LLM_ERRORS.value("local", "ConnectionError")
+
+    answer = service.generate_response("hola", [], ChatContext(messages=[]), use_cache=False)
+
+    assert answer
+    assert LLM_FALLBACKS.value("error") == fallbacks + 1
+    assert LLM_ERRORS.value("local", "ConnectionError") == errors + 1
@@ -0,0 +1,104 @@
+"""
+Tests de la búsqueda de productos: filtros, cursor y facetas sobre SQLite en memoria
+"""
+
+import base64
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.application.product_service import ProductService, decode_cursor
+from src.domain.entities import Product, ProductQuery
+from src.domain.exceptions import InvalidCursorError
+from src.infrastructure.db.models import Base
+from src.infrastructure.repositories.product_repository import SqlAlchemyProductRepository
+
+CATALOG = [
+    ("Pegasus", "Nike", "Running", "42", "Negro", 120.0, 5),
+    ("Air Max", "Nike", "Casual", "41", "Blanco", 150.0, 0),
+    ("Ultraboost", "Adidas", "Running", "42", "Negro", 150.0, 3),
+    ("Suede", "Puma", "Casual", "40", "Azul", 80.0, 10),
+    ("Gel Nimbus", "Asics", "Running", "43", "Azul", 140.0, 2),
+]
+
+
+def _make_repo() -> SqlAlchemyProductRepository:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    repo = SqlAlchemyProductRepository(Session(bind=engine))
+    for name, brand, category, size, color, price, stock in CATALOG:
+        repo.save(Product(None, name, brand, category, size, color, price, stock, "desc"))
+    return repo
+
+
+def test_search_filters_in_sql():
+    repo = _make_repo()
+
+    page = repo.search(ProductQuery(categories=["Running"], max_price=145, in_stock=True))
+    assert [p.name for p in page.products] == ["Pegasus", "Gel Nimbus"]
+
+    page = repo.search(ProductQuery(brands=["Nike", "Puma"], sort="price_asc"))
+    assert [p.name for p in page.products] == ["Suede", "Pegasus", "Air Max"]
+
+
+def test_cursor_walks_all_pages_without_repeating_ties():
+    service = ProductService(_make_repo())
+    seen = []
+    cursor = None
+    while True:
+        page = service.search_products(ProductQuery(sort="price_desc", limit=2), cursor=cursor)
+        seen.extend(p.name for p in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    # Air Max y Ultraboost empatan en precio; desempata el id
+    assert seen == ["Ultraboost", "Air Max", "Gel Nimbus", "Pegasus", "Suede"]
+
+
+def test_facets_ignore_their_own_filter():
+    repo = _make_repo()
+
+    page = repo.search(ProductQuery(brands=["Nike"], limit=1, with_facets=True))
+
+    assert page.total == 2
+    assert page.facets["brand"] == {"Adidas": 1, "Asics": 1, "Nike": 2, "Puma": 1}
+    assert page.facets["category"] == {"Casual": 1, "Running": 1}
+
+
+def test_cursor_from_another_sort_is_rejected():
+    service = ProductService(_make_repo())
+    cursor = service.search_products(ProductQuery(sort="name", limit=1)).next_cursor
+
+    with pytest.raises(InvalidCursorError):
+        service.search_products(ProductQuery(sort="price_asc"), cursor=cursor)
+    with pytest.raises(InvalidCursorError):
+        service.search_products(ProductQuery(), cursor="no-es-un-cursor")
+
+
+def _forge(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+
+@pytest.mark.parametrize(
+    "sort, payload",
+    [
+        ("price_asc", ["price_asc", "barato", 1]),
+        ("price_asc", ["price_asc", [1, 2], 1]),
+        ("price_asc", ["price_asc", True, 1]),
+        ("price_desc", ["price_desc", float("nan"), 1]),
+        ("name", ["name", 3, 1]),
+        ("id", ["id", 2.5, 1]),
+        ("price_asc", ["price_asc", 80.0, True]),
+        ("name", ["name", "Suede", "4"]),
+    ],
+)
+def test_forged_cursor_values_must_match_the_sort_type(sort, payload):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(sort, _forge(payload))
+
+
+def test_valid_cursor_values_are_accepted():
+    assert decode_cursor("price_asc", _forge(["price_asc", 80, 4])) == (80, 4)
+    assert decode_cursor("name", _forge(["name", "Suede", 4])) == ("Suede", 4)
@@ -0,0 +1,96 @@
+"""
+Tests del perfilado por muestreo: formato collapsed, almacenamiento de
+perfiles, muestreo 1 de cada N y middleware con header protegido
+"""
+
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from src.infrastructure.api.profiling import ProfiledRoute, ProfilingMiddleware
+from src.infrastructure.observability.profiling import (
+    ProfileStore,
+    RequestProfile,
+    RequestProfiler,
+    StackSampler,
+)
+
+
+def _busy(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_collapsed_lines_go_from_root_to_leaf():
+    def leaf():
+        return leaf.__code__
+
+    profile = RequestProfile("on_demand")
+    stack = (test_collapsed_lines_go_from_root_to_leaf.__code__, leaf())
+    profile.record(stack)
+    profile.record(stack)
+
+    (line,) = profile.collapsed()
+    frames, count = line.rsplit(" ", 1)
+    assert count == "2"
+    root, tip = frames.split(";")
+    assert root.startswith("test_collapsed_lines_go_from_root_to_leaf (tests/test_profiling.py:")
+    assert tip.startswith("leaf (")
+
+
+def test_store_lists_downloads_and_prunes(tmp_path):
+    store = ProfileStore(str(tmp_path), max_files=2)
+    names = [store.new_name("GET", "/products/7") for _ in range(3)]
+    for name in names:
+        store.save(name, RequestProfile("sampled"), {"route": "/products/{product_id}"})
+
+    listed = store.list()
+    assert [p["name"] for p in listed] == names[:0:-1]
+    assert listed[0]["route"] == "/products/{product_id}"
+    assert store.path_for(names[0]) is None
+    assert store.path_for(names[2]).endswith(".collapsed")
+    assert store.path_for("../secreto") is None
+
+
+def test_sample_every_profiles_one_in_n(tmp_path):
+    profiler = RequestProfiler(ProfileStore(str(tmp_path)), StackSampler(), sample_every=3)
+    assert [profiler.should_sample() for _ in range(6)] == [False, False, True, False, False, True]
+    disabled = RequestProfiler(ProfileStore(str(tmp_path)), StackSampler())
+    assert not any(disabled.should_sample() for _ in range(5))
+
+
+def test_middleware_profiles_sync_endpoint_only_with_valid_token(tmp_path):
+    app = FastAPI()
+    app.router.route_class = ProfiledRoute
+
+    @app.get("/work")
+    def work() -> dict:
+        _busy(0.05)
+        return {"ok": True}
+
+    store = ProfileStore(str(tmp_path))
+    profiler = RequestProfiler(store, StackSampler(interval_ms=1))
+    app.add_middleware(ProfilingMiddleware, profiler=profiler, admin_token="secret", interval_ms=1)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            plain = await client.get("/work", headers={"X-Profile": "1"})
+            forged = await client.get("/work?profile=1", headers={"X-Admin-Token": "otro"})
+            non_ascii = await client.get("/work", headers=[(b"X-Profile", b"1"), (b"X-Admin-Token", b"\xf1")])
+            profiled = await client.get("/work", headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+        return plain, forged, non_ascii, profiled
+
+    plain, forged, non_ascii, profiled = asyncio.run(run())
+
+    assert "x-profile-id" not in plain.headers and "x-profile-id" not in forged.headers
+    assert non_ascii.status_code == 200 and "x-profile-id" not in non_ascii.headers
+    name = profiled.headers["x-profile-id"]
+    (info,) = store.list()
+    assert info["name"] == name and info["route"] == "/work" and info["status"] == 200
+    with open(store.path_for(name), encoding="utf-8") as f:
+        collapsed = f.read()
+    assert "_busy (tests/test_profiling.py:" in collapsed
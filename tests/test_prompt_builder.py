@@ -0,0 +1,60 @@
+"""
+Tests del armado de prompts con partes precompiladas
+"""
+
+from dataclasses import replace
+
+from src.domain.entities import Product
+from src.infrastructure.llm_providers.prompt_builder import PromptBuilder
+
+
+def _product(product_id: int, name: str, price: float = 80.0) -> Product:
+    return Product(
+        id=product_id,
+        name=name,
+        brand="Puma",
+        category="Casual",
+        size="40",
+        color="Azul",
+        price=price,
+        stock=5,
+        description="Zapato casual",
+    )
+
+
+def test_prompt_matches_template():
+    builder = PromptBuilder()
+    products = [_product(1, "Puma Suede"), _product(2, "Puma RS-X")]
+
+    prompt = builder.build("Hola", products, "Usuario: hola\nAsistente: buenas")
+
+    assert prompt == (
+        "\nEres un asistente de ventas para una tienda de zapatos\n\n"
+        "Catálogo de productos:\n"
+        "- Puma Suede | Marca: Puma | Categoría: Casual | Talla: 40 | Color: Azul | Precio: 80.0 | Stock: 5\n"
+        "- Puma RS-X | Marca: Puma | Categoría: Casual | Talla: 40 | Color: Azul | Precio: 80.0 | Stock: 5\n\n"
+        "Historial reciente de la conversación:\n"
+        "Usuario: hola\nAsistente: buenas\n\n"
+        "Mensaje actual del usuario:\nUsuario: Hola\n\n"
+        "Responde en un tono amable, profesional y conciso\n"
+        "Solo recomienda productos del catálogo disponible\n"
+    )
+
+
+def test_catalog_parts_are_reused_until_product_changes():
+    builder = PromptBuilder()
+    products = [_product(1, "Puma Suede"), _product(2, "Puma RS-X")]
+
+    builder.build("uno", products, "")
+    builder.build("dos", products, "")
+    stats = builder.stats()
+    assert stats["line_misses"] == 2 and stats["line_hits"] == 2
+    assert stats["block_misses"] == 1 and stats["block_hits"] == 1
+    assert stats["builds"] == 2
+
+    changed = [replace(products[0], price=60.0), products[1]]
+    prompt = builder.build("tres", changed, "")
+    assert "Precio: 60.0" in prompt
+    stats = builder.stats()
+    assert stats["line_misses"] == 3
+    assert stats["block_misses"] == 2
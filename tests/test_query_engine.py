@@ -0,0 +1,63 @@
+"""
+Tests del motor local de consultas estructuradas
+"""
+
+from src.domain.entities import ChatContext, Product
+from src.infrastructure.llm_providers.gemini_service import GeminiService
+from src.infrastructure.llm_providers.local_provider import LocalProvider
+from src.infrastructure.search.query_engine import CatalogQueryEngine
+
+CATALOG = [
+    Product(1, "Nike Air Zoom Pegasus", "Nike", "Running", "42", "Negro", 120.0, 5, "Amortiguación"),
+    Product(2, "Adidas Ultraboost 21", "Adidas", "Running", "41", "Blanco", 150.0, 0, "Comodidad"),
+    Product(3, "Puma Suede Classic", "Puma", "Casual", "40", "Azul", 80.0, 10, "Clásico"),
+]
+
+
+def _engine() -> CatalogQueryEngine:
+    engine = CatalogQueryEngine()
+    engine.ensure_synced(CATALOG, 1)
+    return engine
+
+
+def test_parses_size_color_brand_and_price():
+    engine = _engine()
+
+    query = engine.parse("¿Tienen talla 42 en negra?")
+    assert query.sizes == {"42"} and query.colors == {"negro"}
+    assert query.confidence == 1.0
+
+    query = engine.parse("Nike por menos de 130")
+    assert query.brands == {"nike"} and query.max_price == 130.0
+
+    query = engine.parse("zapatillas para correr entre 100 y 200")
+    assert query.categories == {"running"}
+    assert (query.min_price, query.max_price) == (100.0, 200.0)
+
+
+def test_product_name_and_stock_intent():
+    engine = _engine()
+
+    query = engine.parse("¿hay stock del Ultraboost 21?")
+    assert query.product_ids == {2} and query.intent == "stock"
+    assert not query.sizes  # el 21 es parte del nombre, no una talla
+    assert "no tiene stock" in engine.answer(query)
+
+
+def test_answers_only_confident_queries_from_indexes():
+    engine = _engine()
+
+    answer = engine.answer_if_confident("Nike por menos de 130")
+    assert "Nike Air Zoom Pegasus" in answer and "Ultraboost" not in answer
+
+    assert engine.answer_if_confident("quiero algo elegante para una boda") is None
+    assert engine.answer_if_confident("y en azul?") is None  # depende del contexto
+    assert engine.stats()["answered"] == 1
+
+
+def test_fallback_uses_query_engine():
+    service = GeminiService(provider=LocalProvider(), query_engine=CatalogQueryEngine())
+
+    text = service._build_fallback_response("algo de Puma talla 40", CATALOG, ChatContext(messages=[]))
+
+    assert "Puma Suede Classic" in text and "Pegasus" not in text
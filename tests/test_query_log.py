@@ -0,0 +1,121 @@
+"""
+Tests de la instrumentación de consultas SQL: log de consultas lentas con
+su plan, detección de sentencias repetidas (N+1) y headers por request
+"""
+
+import asyncio
+import json
+import logging
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from src.infrastructure.api.middleware import MetricsMiddleware
+from src.infrastructure.observability.metrics import (
+    DB_REPEATED_STATEMENTS,
+    end_request,
+    install_query_metrics,
+    start_request,
+)
+
+
+def _engine():
+    # Una sola conexión compartida: el endpoint corre en otro hilo
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO items (name) VALUES ('a'), ('b'), ('c')"))
+    return engine
+
+
+def test_slow_select_is_logged_with_query_plan(caplog):
+    engine = create_engine("sqlite://")
+    install_query_metrics(engine, slow_query_ms=1e-6)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        caplog.clear()
+        with caplog.at_level(logging.WARNING, logger="src.infrastructure.observability.metrics"):
+            rows = conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": 1}).all()
+
+    assert rows == []
+    (record,) = [json.loads(r.getMessage()) for r in caplog.records]
+    assert record["event"] == "slow_query" and record["operation"] == "select"
+    assert record["statement"] == "SELECT name FROM items WHERE id = ?"
+    assert any("items" in line for line in record["plan"])
+
+
+def test_fast_queries_are_not_logged(caplog):
+    engine = _engine()
+    install_query_metrics(engine, slow_query_ms=10_000)
+    with caplog.at_level(logging.WARNING, logger="src.infrastructure.observability.metrics"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT * FROM items")).all()
+
+    assert not caplog.records
+
+
+def test_repeated_statements_are_grouped_by_parametrized_text():
+    engine = _engine()
+    install_query_metrics(engine)
+    request_metrics, token = start_request()
+    try:
+        with engine.connect() as conn:
+            for item_id in (1, 2, 3):
+                conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": item_id})
+            conn.execute(text("SELECT count(*) FROM items"))
+    finally:
+        end_request(token)
+
+    assert request_metrics.db_queries == 4
+    assert request_metrics.repeated_statements(3) == [("SELECT name FROM items WHERE id = ?", 3)]
+    assert request_metrics.repeated_statements(4) == []
+    assert request_metrics.repeated_statements(0) == []
+
+
+def test_middleware_adds_db_headers_and_flags_n_plus_one(caplog):
+    engine = _engine()
+    install_query_metrics(engine)
+    app = FastAPI()
+
+    @app.get("/names")
+    def names() -> list:
+        with engine.connect() as conn:
+            ids = [row.id for row in conn.execute(text("SELECT id FROM items"))]
+            return [conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": i}).scalar() for i in ids]
+
+    app.add_middleware(MetricsMiddleware, timing_log=False, db_headers=True, n_plus_one_threshold=3)
+    before = DB_REPEATED_STATEMENTS.value("/names")
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/names")
+
+    with caplog.at_level(logging.WARNING, logger="src.infrastructure.api.middleware"):
+        response = asyncio.run(run())
+
+    assert response.json() == ["a", "b", "c"]
+    assert response.headers["x-db-queries"] == "4"
+    assert float(response.headers["x-db-time-ms"]) > 0
+    warnings = [json.loads(r.getMessage()) for r in caplog.records if r.name == "src.infrastructure.api.middleware"]
+    assert [(w["event"], w["count"], w["route"]) for w in warnings] == [("repeated_query", 3, "/names")]
+    assert DB_REPEATED_STATEMENTS.value("/names") == before + 1
+
+
+def test_db_headers_are_off_by_default():
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping() -> dict:
+        return {"ok": True}
+
+    app.add_middleware(MetricsMiddleware, timing_log=False)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/ping")
+
+    assert "x-db-queries" not in asyncio.run(run()).headers
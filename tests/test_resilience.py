@@ -0,0 +1,222 @@
+"""
+Tests de la capa de resiliencia (timeout, reintentos y circuit breaker)
+"""
+
+import asyncio
+import threading
+import time
+from typing import AsyncIterator, Iterator, List
+
+import pytest
+
+from src.infrastructure.llm_providers.base import ILLMProvider
+from src.infrastructure.llm_providers.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ProviderSaturatedError,
+    ResilientProvider,
+    RetryBudget,
+)
+from src.infrastructure.observability.metrics import LLM_TIMEOUTS
+
+
+class _ScriptedProvider(ILLMProvider):
+    """Falla o responde según un guion de resultados"""
+
+    name = "fake"
+
+    def __init__(self, script: List[object], delay: float = 0.0) -> None:
+        self.script = list(script)
+        self.calls = 0
+        self.delay = delay
+
+    def _next(self) -> str:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        outcome = self.script.pop(0) if self.script else "ok"
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def generate(self, prompt: str) -> str:
+        return self._next()
+
+    async def generate_async(self, prompt: str) -> str:
+        return self._next()
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        yield self._next()
+
+    async def stream_async(self, prompt: str) -> AsyncIterator[str]:
+        yield self._next()
+
+
+def test_breaker_opens_then_half_opens_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, cool_down_s=0.05)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    time.sleep(0.06)
+    breaker.allow()  # llamada de prueba
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()  # solo una prueba a la vez
+    breaker.record_success()
+
+    stats = breaker.stats()
+    assert stats["state"] == "closed"
+    assert stats["opened"] == 1 and stats["half_opened"] == 1 and stats["closed"] == 1
+
+
+def test_transient_errors_are_retried_within_budget():
+    inner = _ScriptedProvider([ConnectionError("reset"), "hola"])
+    provider = ResilientProvider(inner, backoff_base_ms=1, backoff_max_ms=1)
+
+    assert provider.generate("p") == "hola"
+    assert inner.calls == 2
+    assert provider.stats()["retries"] == 1
+
+    no_budget = ResilientProvider(
+        _ScriptedProvider([ConnectionError("a"), "hola"]),
+        retry_budget=RetryBudget(ratio=0.0, max_tokens=0.0),
+    )
+    with pytest.raises(ConnectionError):
+        no_budget.generate("p")
+    assert no_budget.stats()["retries_denied"] == 1
+
+
+def test_non_retryable_errors_fail_fast_and_open_the_circuit():
+    inner = _ScriptedProvider([ValueError("x"), ValueError("y")])
+    provider = ResilientProvider(inner, breaker=CircuitBreaker(failure_threshold=2, cool_down_s=60))
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            provider.generate("p")
+    with pytest.raises(CircuitOpenError):
+        provider.generate("p")
+    assert inner.calls == 2
+
+
+def test_timeouts_apply_to_sync_and_async_calls():
+    provider = ResilientProvider(_ScriptedProvider([], delay=0.2), timeout_s=0.02, max_retries=0)
+    with pytest.raises(TimeoutError):
+        provider.generate("p")
+
+    class _Slow(_ScriptedProvider):
+        async def generate_async(self, prompt: str) -> str:
+            await asyncio.sleep(0.2)
+            return "tarde"
+
+    slow = ResilientProvider(_Slow([]), timeout_s=0.02, max_retries=0)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(slow.generate_async("p"))
+    assert slow.stats()["timeouts"] == 1
+
+
+def test_service_falls_back_immediately_while_open():
+    from src.domain.entities import ChatContext
+    from src.infrastructure.llm_providers.gemini_service import GeminiService
+
+    inner = _ScriptedProvider([])
+    breaker = CircuitBreaker(failure_threshold=1, cool_down_s=60)
+    breaker.record_failure()
+    service = GeminiService(provider=ResilientProvider(inner, breaker=breaker))
+    ctx = ChatContext(messages=[])
+
+    assert service.generate_response("hola", [], ctx) == service._build_fallback_response("hola", [], ctx)
+    assert list(service.stream_response("hola", [], ctx))
+    assert inner.calls == 0
+
+
+class _StalledStream(_ScriptedProvider):
+    """Emite un fragmento y se cuelga hasta que se libera el evento"""
+
+    def __init__(self) -> None:
+        super().__init__([])
+        self.release = threading.Event()
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        yield "hola"
+        self.release.wait(5)
+        yield "tarde"
+
+
+def test_sync_stream_times_out_between_chunks_and_counts_it():
+    inner = _StalledStream()
+    provider = ResilientProvider(inner, timeout_s=0.05, breaker=CircuitBreaker(failure_threshold=1))
+    before = LLM_TIMEOUTS.value("fake", "stream")
+    chunks = []
+    try:
+        with pytest.raises(TimeoutError):
+            for text in provider.stream("p"):
+                chunks.append(text)
+    finally:
+        inner.release.set()
+
+    assert chunks == ["hola"]
+    assert provider.stats()["timeouts"] == 1
+    assert LLM_TIMEOUTS.value("fake", "stream") == before + 1
+    assert provider.breaker.state == "open"
+
+
+def test_streams_respect_the_overall_deadline():
+    class _Trickle(_ScriptedProvider):
+        def stream(self, prompt: str) -> Iterator[str]:
+            while True:
+                time.sleep(0.01)
+                yield "."
+
+        async def stream_async(self, prompt: str) -> AsyncIterator[str]:
+            while True:
+                await asyncio.sleep(0.01)
+                yield "."
+
+    provider = ResilientProvider(_Trickle([]), timeout_s=1.0, stream_deadline_s=0.1)
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        for _ in provider.stream("p"):
+            pass
+    assert time.monotonic() - started < 0.5
+
+    async def consume():
+        async for _ in provider.stream_async("p"):
+            pass
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(consume())
+    assert provider.stats()["timeouts"] == 2
+
+
+def test_hung_calls_bound_the_pool_instead_of_queueing():
+    release = threading.Event()
+
+    class _Hung(_ScriptedProvider):
+        def generate(self, prompt: str) -> str:
+            release.wait(5)
+            return "tarde"
+
+    provider = ResilientProvider(_Hung([]), timeout_s=0.02, max_retries=0, max_workers=1)
+    try:
+        with pytest.raises(TimeoutError):
+            provider.generate("p")
+        assert provider.busy_workers == 1
+        for _ in range(3):
+            with pytest.raises(ProviderSaturatedError):
+                provider.generate("p")
+            with pytest.raises(ProviderSaturatedError):
+                list(provider.stream("p"))
+        stats = provider.stats()
+        assert stats["saturated"] == 6 and stats["failures"] == 1
+        # La saturación local no abre el circuito contra un proveedor sano
+        assert provider.breaker.state == "closed"
+    finally:
+        release.set()
+
+    deadline = time.monotonic() + 2
+    while provider.busy_workers and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert provider.busy_workers == 0
+    assert provider.generate("p") == "tarde"
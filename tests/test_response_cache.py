@@ -0,0 +1,133 @@
+"""
+Tests de la caché de respuestas del LLM
+"""
+
+import asyncio
+import threading
+from typing import AsyncIterator, Iterator
+
+from src.domain.entities import ChatContext, Product
+from src.infrastructure.llm_providers.base import ILLMProvider
+from src.infrastructure.llm_providers.gemini_service import GeminiService
+from src.infrastructure.llm_providers.response_cache import (
+    MemoryLRUTier,
+    ResponseCache,
+    SqliteTier,
+    make_cache_key,
+)
+
+
+class _CountingProvider(ILLMProvider):
+    name = "counting"
+
+    def __init__(self, fail: bool = False) -> None:
+        self.calls = 0
+        self.fail = fail
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("caido")
+        return f"respuesta {self.calls}"
+
+    async def generate_async(self, prompt: str) -> str:
+        return self.generate(prompt)
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        yield self.generate(prompt)
+
+    async def stream_async(self, prompt: str) -> AsyncIterator[str]:
+        yield self.generate(prompt)
+
+
+def _product(stock: int = 5) -> Product:
+    return Product(
+        id=1,
+        name="Nike Air Zoom Pegasus",
+        brand="Nike",
+        category="Running",
+        size="42",
+        color="Negro",
+        price=120.0,
+        stock=stock,
+        description="Para correr",
+    )
+
+
+def test_key_ignores_case_accents_and_punctuation():
+    a = make_cache_key("¿Qué zapatillas para correr tienen?", "", "v1")
+    b = make_cache_key("que zapatillas  para correr tienen", "", "v1")
+    assert a == b
+    assert a != make_cache_key("que zapatillas para correr tienen", "", "v2")
+
+
+def test_memory_tier_evicts_least_recently_used():
+    tier = MemoryLRUTier(max_entries=2)
+    tier.set("a", "1")
+    tier.set("b", "2")
+    tier.get("a")
+    tier.set("c", "3")
+    assert tier.get("b") is None
+    assert tier.get("a") == "1"
+
+
+def test_sqlite_hits_are_promoted_to_memory(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResponseCache(MemoryLRUTier(), SqliteTier(path)).set("k", "hola")
+
+    cache = ResponseCache(MemoryLRUTier(), SqliteTier(path))
+    assert cache.get("k") == "hola"
+    assert cache.get("k") == "hola"
+    stats = cache.stats()
+    assert stats["sqlite_hits"] == 1 and stats["memory_hits"] == 1
+
+
+def test_service_caches_provider_responses_only():
+    provider = _CountingProvider()
+    service = GeminiService(provider=provider, response_cache=ResponseCache(MemoryLRUTier()))
+    ctx = ChatContext(messages=[])
+
+    first = service.generate_response("Hola", [_product()], ctx)
+    assert service.generate_response("hola!", [_product()], ctx) == first
+    assert provider.calls == 1
+
+    # Bypass explicito y cambio de producto generan llamadas nuevas
+    service.generate_response("hola", [_product()], ctx, use_cache=False)
+    service.generate_response("hola", [_product(stock=1)], ctx)
+    assert provider.calls == 3
+
+    provider.fail = True
+    service.generate_response("otra", [_product()], ctx)
+    provider.fail = False
+    assert service.generate_response("otra", [_product()], ctx) != first
+    assert provider.calls == 5
+
+
+class _ThreadRecordingCache(ResponseCache):
+    """Anota en qué hilo se lee y escribe la caché"""
+
+    def __init__(self) -> None:
+        super().__init__(MemoryLRUTier())
+        self.threads = []
+
+    def get(self, key: str):
+        self.threads.append(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key: str, value: str) -> None:
+        self.threads.append(threading.get_ident())
+        super().set(key, value)
+
+
+def test_async_path_keeps_cache_io_off_the_event_loop():
+    cache = _ThreadRecordingCache()
+    service = GeminiService(provider=_CountingProvider(), response_cache=cache)
+
+    async def run():
+        answer = await service.generate_response_async("hola", [_product()], ChatContext(messages=[]))
+        return answer, threading.get_ident()
+
+    answer, loop_thread = asyncio.run(run())
+
+    assert answer and len(cache.threads) == 2
+    assert loop_thread not in cache.threads
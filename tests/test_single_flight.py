@@ -0,0 +1,65 @@
+"""
+Tests de la coalescencia de llamadas concurrentes
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.infrastructure.llm_providers.single_flight import SingleFlight
+
+
+def test_concurrent_threads_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    barrier = threading.Barrier(5)
+    results = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return "ok"
+
+    def worker():
+        barrier.wait()
+        results.append(flight.do("k", slow))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["ok"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"leaders": 1, "deduplicated": 4}
+
+
+def test_async_followers_receive_leader_error():
+    flight = SingleFlight()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise ConnectionError("caido")
+
+    async def main():
+        return await asyncio.gather(
+            *(flight.do_async("k", failing) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(isinstance(r, ConnectionError) for r in results)
+    assert flight.stats()["deduplicated"] == 2
+
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+    assert flight.do("k", lambda: 1) == 1
+    with pytest.raises(ValueError):
+        flight.do("k", lambda: (_ for _ in ()).throw(ValueError("x")))
+    assert flight.stats() == {"leaders": 2, "deduplicated": 0}
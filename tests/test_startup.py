@@ -0,0 +1,99 @@
+"""
+Tests del arranque: import sin efectos, SDK perezoso y estado de /ready
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import textwrap
+
+from src.infrastructure.api.startup import StartupTracker
+from src.infrastructure.llm_providers.gemini_provider import GeminiProvider
+from src.infrastructure.observability.metrics import LLM_ERRORS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_app_has_no_side_effects(tmp_path):
+    db_path = tmp_path / "app.db"
+    script = textwrap.dedent(
+        """
+        import sys
+        import src.infrastructure.api.main
+        print("google.generativeai" in sys.modules)
+        """
+    )
+    env = dict(
+        os.environ,
+        PYTHONPATH=ROOT,
+        DATABASE_URL=f"sqlite:///{db_path}",
+        LLM_PROVIDER="gemini",
+        LLM_CACHE_SQLITE_PATH=str(tmp_path / "llm_cache.db"),
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip() == "False"
+    assert not db_path.exists()
+    assert not (tmp_path / "llm_cache.db").exists()
+
+
+def test_gemini_provider_defers_sdk_until_first_use():
+    provider = GeminiProvider(api_key="")
+
+    assert not provider.loaded
+    provider.warm_up()
+    assert provider.loaded
+
+
+def test_gemini_provider_init_failure_is_logged_and_counted(monkeypatch, caplog):
+    import google.generativeai as genai
+
+    def broken_model(name):
+        raise ValueError("modelo inválido")
+
+    monkeypatch.setattr(genai, "GenerativeModel", broken_model)
+    errors = LLM_ERRORS.value("gemini", "ValueError")
+    provider = GeminiProvider(api_key="x")
+
+    with caplog.at_level(logging.WARNING, logger="src.infrastructure.llm_providers.gemini_provider"):
+        provider.warm_up()
+
+    assert provider.loaded and provider.health()["status"] == "degraded"
+    assert LLM_ERRORS.value("gemini", "ValueError") == errors + 1
+    assert "inicializar el modelo" in caplog.records[0].getMessage()
+
+
+def test_startup_tracker_reports_phases_and_readiness():
+    tracker = StartupTracker()
+    with tracker.phase("schema_ms"):
+        pass
+    tracker.mark("import_ms")
+
+    report = tracker.report()
+    assert not report["ready"] and report["time_to_ready_ms"] is None
+    assert set(report["phases_ms"]) == {"schema_ms", "import_ms"}
+
+    tracker.fail(RuntimeError("db caída"))
+    assert "error" in tracker.report() and not tracker.ready
+
+    tracker.mark_ready()
+    assert tracker.wait(0) and tracker.report()["time_to_ready_ms"] >= 0
+
+
+def test_gemini_streams_use_the_stream_deadline_not_the_call_timeout():
+    class _Model:
+        def __init__(self) -> None:
+            self.options = []
+
+        def generate_content(self, prompt, stream=False, request_options=None):
+            self.options.append((stream, request_options))
+            return iter(()) if stream else None
+
+    provider = GeminiProvider(api_key="x", timeout_s=20, stream_timeout_s=120)
+    provider._model = model = _Model()
+
+    assert list(provider.stream("hola")) == []
+    assert model.options == [(True, {"timeout": 120})]
@@ -0,0 +1,66 @@
+"""
+Tests del indice vectorial de productos con el embedder local
+"""
+
+import numpy as np
+
+from src.domain.entities import Product
+from src.infrastructure.embeddings.embedders import HashedNgramEmbedder
+from src.infrastructure.embeddings.vector_index import VectorProductIndex
+
+
+def _product(pid: int, name: str, brand: str, category: str, color: str) -> Product:
+    return Product(
+        id=pid,
+        name=name,
+        brand=brand,
+        category=category,
+        size="42",
+        color=color,
+        price=100.0,
+        stock=5,
+        description="Zapato de prueba",
+    )
+
+
+CATALOG = [
+    _product(1, "Nike Air Zoom Pegasus", "Nike", "Running", "Negro"),
+    _product(2, "Puma Suede Classic", "Puma", "Casual", "Azul"),
+    _product(3, "Timberland Premium Boot", "Timberland", "Boot", "Marron"),
+]
+
+
+def test_embeddings_are_normalized_float32():
+    vectors = HashedNgramEmbedder(dim=64).embed(["Nike Pegasus", ""])
+    assert vectors.dtype == np.float32
+    assert np.isclose(np.linalg.norm(vectors[0]), 1.0)
+    assert not vectors[1].any()
+
+
+def test_search_matches_spanish_paraphrase():
+    index = VectorProductIndex(HashedNgramEmbedder(), top_k=1)
+    index.sync(CATALOG)
+    assert index.search("zapatillas para correr")[0][0].id == 1
+    assert index.search("botas")[0][0].id == 3
+
+
+def test_sync_updates_and_deletes_rows():
+    index = VectorProductIndex(HashedNgramEmbedder(dim=128))
+    index.sync(CATALOG)
+    assert not index.sync(CATALOG)
+    assert index.sync(CATALOG[1:])
+    assert len(index) == 2
+    assert {p.id for p, _ in index.search("zapato", k=5, min_score=-1.0)} == {2, 3}
+
+
+def test_persisted_index_loads_memory_mapped(tmp_path):
+    path = str(tmp_path / "vectors.npy")
+    index = VectorProductIndex(HashedNgramEmbedder(dim=128), path=path)
+    index.sync(CATALOG)
+
+    warm = VectorProductIndex(HashedNgramEmbedder(dim=128), path=path)
+    assert len(warm) == 3
+    assert isinstance(warm.vectors, np.memmap)
+    # Sin cambios en el catalogo no se re-embebe nada
+    assert not warm.sync(CATALOG)
+    assert warm.search("pegasus")[0][0].id == 1